@@ -1,27 +1,175 @@
+import asyncio
+import codecs
+import hashlib
+import json
 import os
 import sys
+import tempfile
+import time
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Optional
-from fastapi import FastAPI
+from urllib.parse import urlparse
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-#from backend.db import save_policy
-
-from cookie_analyzer.core.engine import analyze_cookie_usage
-#from backend.db import save_cookie
-
+from pydantic import BaseModel, Field
+from backend.compression import DecompressRequest, accepted_encodings, max_size_from_env
+from backend.observability import (
+    REQUEST_SECONDS,
+    observe_llm,
+    observe_stages,
+    profile_request,
+    profiler_from_env,
+    render_metrics,
+    server_timing,
+    timing_enabled,
+)
 
+# Both pipelines, numpy and the Mongo driver are imported on first use (or
+# before the fork by `python -m backend.serve --preload`), so importing the
+# app stays cheap.
 
-# --- Make sure Python can import your policy package ---
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # PlainSight/
 POLICY_SRC = os.path.join(ROOT, "policy", "src")
-if POLICY_SRC not in sys.path:
-    sys.path.insert(0, POLICY_SRC)
 
-# Now we can import your pipeline
-from pipeline.run_pipeline import run_policy_pipeline  # type: ignore
-from pipeline.types import PolicyInput  # type: ignore
 
-app = FastAPI()
+def _policy_path() -> None:
+    # The policy pipeline lives in policy/src and imports itself as `pipeline`.
+    if POLICY_SRC not in sys.path:
+        sys.path.insert(0, POLICY_SRC)
+
+
+class PolicyPipeline:
+    """The policy pipeline and its per-process state, set up on first use."""
+
+    def __init__(self):
+        _policy_path()
+        from pipeline import batch, extract, pdf  # type: ignore
+        from pipeline.cache import cache_from_env  # type: ignore
+        from pipeline.incremental import (  # type: ignore
+            lookup_unchanged,
+            run_policy_pipeline_incremental,
+            snapshots_from_env,
+        )
+        from pipeline.openrouter_client import async_client_from_env  # type: ignore
+        from pipeline.types import PolicyInput  # type: ignore
+
+        self.run = run_policy_pipeline_incremental
+        self.lookup = lookup_unchanged
+        self.batch = batch
+        self.extract = extract
+        self.pdf = pdf
+        self.PolicyInput = PolicyInput
+        # Repeat visits to the same policy text skip the whole pipeline (and the LLM call).
+        self.cache = cache_from_env()
+        # Last capture of every URL, for paragraph-level change detection.
+        self.snapshots = snapshots_from_env()
+        # One pooled OpenRouter client shared by every request; its attempts
+        # feed the LLM latency histogram.
+        self.llm = async_client_from_env(observer=observe_llm)
+
+
+_policy: Optional[PolicyPipeline] = None
+
+
+def policy() -> PolicyPipeline:
+    global _policy
+    if _policy is None:
+        _policy = PolicyPipeline()
+    return _policy
+
+
+# Analysis history for the dashboard; only kept when MONGO_URI is set.
+if os.getenv("MONGO_URI"):
+    from backend.db import history_from_env
+
+    history = history_from_env()
+else:
+    history = None
+
+# Per-stage timings (Server-Timing + /metrics) and the opt-in slow-request profiler.
+STAGE_TIMING = timing_enabled()
+profiler = profiler_from_env()
+
+# Limits for /policy/analyze/pdf: file size, and pages read from the start.
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(50 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "300"))
+
+# Process pool for the batch endpoints, started on first use.
+_batch_pool: Optional[ProcessPoolExecutor] = None
+
+
+def batch_pool() -> ProcessPoolExecutor:
+    global _batch_pool
+    if _batch_pool is None:
+        from cookie_analyzer.core.domains import suffix_trie
+
+        _policy_path()
+        from pipeline.batch import default_workers  # type: ignore
+
+        suffix_trie()  # load the PSL once; forked workers inherit it
+        _batch_pool = ProcessPoolExecutor(max_workers=default_workers())
+    return _batch_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if history is not None:
+        await history.ensure_indexes()
+    yield
+    if _policy is not None:
+        await _policy.llm.aclose()
+    if history is not None:
+        await history.aclose()
+    if _batch_pool is not None:
+        _batch_pool.shutdown(cancel_futures=True)
+
+
+async def spool_body(request: Request, digest=None):
+    """
+    Copy a streamed request body into a spooled temp file (memory up to
+    8 MB, disk beyond) and return it rewound. The body has to be fully read
+    before a StreamingResponse starts, so big batches land on disk, not RAM.
+    `digest`, a hashlib object, is updated with the body as it is spooled.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    async for chunk in request.stream():
+        if digest is not None:
+            digest.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def spool_to_disk(request: Request, max_bytes: int, suffix: str = ""):
+    """
+    Write a streamed request body to a named temp file, for readers that
+    need a path (worker processes). Returns (path, size, sha256 hex); the
+    caller unlinks the file. 413 once the body passes `max_bytes`.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    f = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        with f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Body is larger than {max_bytes} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+    return f.name, size, digest.hexdigest()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Bodies may arrive gzip- or zstd-compressed (Content-Encoding).
+app.add_middleware(DecompressRequest, max_size=max_size_from_env())
 
 # TEMP for hackathon/dev: allow all. Later restrict to chrome-extension://<id>
 app.add_middleware(
@@ -31,17 +179,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    t0 = time.perf_counter()
+    with profile_request(profiler, request.url.path):
+        response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        (request.method, getattr(route, "path", "unmatched"), str(response.status_code)),
+        time.perf_counter() - t0,
+    )
+    return response
+
+
+def finish_timings(response: Response, pipeline: str, timings, t0: float) -> None:
+    if timings is None:
+        return
+    timings["total"] = (time.perf_counter() - t0) * 1000
+    response.headers["Server-Timing"] = server_timing(timings)
+    observe_stages(pipeline, timings)
+
+
 class PolicyReq(BaseModel):
     url: str
     title: str = ""
     raw_text: str
     captured_at: Optional[str] = None
+    category: str = ""
+
+
+class PolicyHashReq(BaseModel):
+    url: str
+    # sha256 of raw_text's UTF-8 bytes, or of the body sent to /policy/analyze/html or /pdf
+    content_hash: str = Field(pattern=r"^[0-9a-fA-F]{64}$")
+    title: str = ""
+    captured_at: Optional[str] = None
+    category: str = ""
+
+
 class Cookie(BaseModel):
     name: str
     domain: str
     expiry_days: int
     secure: bool
     sameSite: str
+    value: str = ""
 
 
 class Category(BaseModel):
@@ -70,30 +252,322 @@ class CookieReq(BaseModel):
 def health():
     return {"ok": True}
 
-@app.post("/policy/analyze")
-def analyze(req: PolicyReq):
-    inp = PolicyInput(
-        url=req.url,
-        title=req.title,
-        raw_text=req.raw_text,
-        captured_at=req.captured_at
-    )
+async def record_policy(url: str, category: str, out: dict, timings) -> None:
+    if history is None:
+        return
+    from cookie_analyzer.core.domains import registrable_domain
 
-    out = run_policy_pipeline(inp)
+    t = time.perf_counter()
+    site = registrable_domain(urlparse(url).hostname or url)
+    await history.record(site, url, out, category=category)
+    if timings is not None:
+        timings["persist"] = (time.perf_counter() - t) * 1000
 
-    #save_policy(req.url, out)
 
+def policy_response(out: dict) -> dict:
     return {
         "summary_simple": out.get("summary_simple", ""),
         "key_takeaways": out.get("key_takeaways", []),
         "policy_risk_score": out.get("policy_risk_score", 0),
         "risk_level": out.get("risk_level", "Low"),
+        "changes": out.get("changes"),
     }
+
+@app.post("/policy/analyze")
+async def analyze(req: PolicyReq, response: Response):
+    t0 = time.perf_counter()
+    timings = {} if STAGE_TIMING else None
+    p = policy()
+    inp = p.PolicyInput(
+        url=req.url,
+        title=req.title,
+        raw_text=req.raw_text,
+        captured_at=req.captured_at
+    )
+
+    out = await p.run(
+        inp, llm=p.llm, snapshots=p.snapshots, cache=p.cache, timings=timings
+    )
+    await record_policy(req.url, req.category, out, timings)
+    finish_timings(response, "policy", timings, t0)
+    return policy_response(out)
+
+@app.post("/policy/analyze/hash")
+async def analyze_by_hash(req: PolicyHashReq, response: Response):
+    """
+    First step of a conditional upload. When the URL's last capture had
+    exactly this text, returns {"status": "hit", ...} with the same fields
+    as /policy/analyze. Otherwise returns {"status": "need_body",
+    "encodings": [...]}, and the client POSTs the text to /policy/analyze,
+    compressed with one of those encodings (Content-Encoding header).
+    """
+    t0 = time.perf_counter()
+    timings = {} if STAGE_TIMING else None
+    p = policy()
+    inp = p.PolicyInput(url=req.url, title=req.title, raw_text="", captured_at=req.captured_at)
+
+    out = await p.lookup(inp, req.content_hash.lower(), p.snapshots, timings=timings)
+    if out is None:
+        finish_timings(response, "policy_hash", timings, t0)
+        return {"status": "need_body", "encodings": accepted_encodings()}
+
+    await record_policy(req.url, req.category, out, timings)
+    finish_timings(response, "policy_hash", timings, t0)
+    return {"status": "hit", **policy_response(out)}
+
+def iter_decoded(f, charset: str, size: int = 64 * 1024):
+    """Text chunks of binary file `f`, decoded incrementally (bad bytes become U+FFFD)."""
+    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    while True:
+        data = f.read(size)
+        if not data:
+            break
+        yield decoder.decode(data)
+    yield decoder.decode(b"", final=True)
+
+
+def body_charset(request: Request) -> str:
+    for param in request.headers.get("content-type", "").split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset":
+            try:
+                return codecs.lookup(value.strip('" ')).name
+            except LookupError:
+                raise HTTPException(status_code=415, detail=f"Unknown charset {value!r}")
+    return "utf-8"
+
+
+@app.post("/policy/analyze/html")
+async def analyze_html(
+    request: Request,
+    response: Response,
+    url: str,
+    title: str = "",
+    captured_at: Optional[str] = None,
+    category: str = "",
+):
+    """
+    Body: the policy page's HTML as fetched (text/html; charset defaults to
+    UTF-8). The fields of PolicyReq other than raw_text are query
+    parameters. Menus, banners, footers and other boilerplate are dropped
+    while the page is parsed, before cleaning; "html" in the response says
+    how many bytes of text that removed. The body's sha256 works with
+    /policy/analyze/hash, but only while the page is byte-identical: a
+    nonce or timestamp in the markup means the body is sent again, and the
+    snapshot diff then finds the text unchanged without asking the LLM.
+    """
+    t0 = time.perf_counter()
+    timings = {} if STAGE_TIMING else None
+    charset = body_charset(request)
+    p = policy()
+    sha = hashlib.sha256()
+    body = await spool_body(request, sha)
+    digest = sha.hexdigest()
+    stats = {}
+    try:
+        inp = p.PolicyInput(url=url, title=title, raw_text="", captured_at=captured_at)
+        out = await p.run(
+            inp, llm=p.llm, snapshots=p.snapshots, cache=p.cache, timings=timings,
+            source=p.extract.iter_html_text(iter_decoded(body, charset), stats=stats), raw_hash=digest,
+        )
+    finally:
+        body.close()
+
+    await record_policy(url, category, out, timings)
+    finish_timings(response, "policy_html", timings, t0)
+    return {**policy_response(out), "html": stats}
+
+@app.post("/policy/analyze/pdf")
+async def analyze_pdf(
+    request: Request,
+    response: Response,
+    url: str,
+    title: str = "",
+    captured_at: Optional[str] = None,
+    category: str = "",
+):
+    """
+    Body: the PDF file itself (application/pdf), up to PDF_MAX_BYTES.
+    The fields of PolicyReq other than raw_text are query parameters.
+    Pages are extracted in the batch worker pool and fed to the pipeline as
+    they come, up to PDF_MAX_PAGES; extraction stops once the cleaner has
+    enough text. The file's sha256 works with /policy/analyze/hash.
+    """
+    t0 = time.perf_counter()
+    timings = {} if STAGE_TIMING else None
+    p = policy()
+    path, size, digest = await spool_to_disk(request, PDF_MAX_BYTES, suffix=".pdf")
+    stats = {}
+    pages = None
+    try:
+        with open(path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                raise HTTPException(status_code=415, detail="Body is not a PDF")
+        inp = p.PolicyInput(url=url, title=title, raw_text="", captured_at=captured_at)
+        pages = p.pdf.iter_pdf_text(
+            path,
+            executor=batch_pool(),
+            max_pages=PDF_MAX_PAGES,
+            window=p.batch.default_workers(),
+            stats=stats,
+        )
+        out = await p.run(
+            inp, llm=p.llm, snapshots=p.snapshots, cache=p.cache, timings=timings,
+            source=pages, raw_hash=digest,
+        )
+    except p.pdf.PdfError as e:
+        raise HTTPException(status_code=422, detail=f"Unreadable PDF: {e}")
+    finally:
+        if pages is not None:
+            pages.close()
+        os.unlink(path)
+
+    await record_policy(url, category, out, timings)
+    finish_timings(response, "policy_pdf", timings, t0)
+    return {**policy_response(out), "pdf": {"bytes": size, **stats}}
+
+@app.post("/policy/analyze/batch")
+async def analyze_batch_endpoint(request: Request):
+    """
+    Body: one PolicyReq JSON object per line.
+    Response: one result per line in input order, each with "index" and
+    "timings_ms", then a final {"summary": {...}} line with docs/sec.
+    """
+    body = await spool_body(request)
+    p = policy()
+
+    async def _stream():
+        stats = {}
+        try:
+            async for result in p.batch.analyze_batch(
+                p.batch.read_jsonl(body),
+                executor=batch_pool(),
+                llm=p.llm,
+                llm_concurrency=p.batch.default_llm_concurrency(),
+                cache=p.cache,
+                stats=stats,
+            ):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            body.close()
+        yield json.dumps({"summary": stats}) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+@app.get("/policy/cache/stats")
+def policy_cache_stats():
+    p = policy()
+    return {**p.cache.stats(), "snapshots": p.snapshots.stats()}
+
+@app.get("/policy/llm/stats")
+def policy_llm_stats():
+    """Rate limiter, retry and circuit breaker counters and LLM latency."""
+    return policy().llm.stats()
+
+def require_history():
+    if history is None:
+        raise HTTPException(status_code=503, detail="History is not configured (set MONGO_URI)")
+    return history
+
+@app.get("/history")
+async def history_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    category: Optional[str] = None,
+    site: Optional[str] = None,
+):
+    """Newest first; pass the returned next_cursor to get the following page."""
+    store = require_history()
+    from backend.db import RISK_LEVELS
+
+    if risk_level and risk_level not in RISK_LEVELS:
+        raise HTTPException(status_code=422, detail=f"risk_level must be one of {', '.join(RISK_LEVELS)}")
+    try:
+        return await store.page(limit, cursor, risk_level, category, site)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.get("/history/summary")
+async def history_summary():
+    return await require_history().summary()
+
+@app.get("/history/rollups/{dim}")
+async def history_rollups(dim: str, start: Optional[date] = None, end: Optional[date] = None, limit: int = 20):
+    """
+    Counts per key of one rollup dimension (e.g. policy_risk, tracker,
+    third_party, flag), all-time or for days in [start, end], largest first.
+    """
+    store = require_history()
+    from backend.rollups import DIMENSIONS
+
+    if dim not in DIMENSIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown dimension; one of {', '.join(DIMENSIONS)}")
+    rows = await store.rollups.counts(dim, start, end, limit=max(0, limit))
+    return {"dim": dim, "start": start, "end": end, "counts": rows}
+
+@app.get("/history/rollups/{dim}/{key}")
+async def history_trend(dim: str, key: str, start: date, end: date):
+    """Per-day counts of one key, e.g. /history/rollups/policy_risk/High."""
+    store = require_history()
+    from backend.rollups import DIMENSIONS
+
+    if dim not in DIMENSIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown dimension; one of {', '.join(DIMENSIONS)}")
+    return {"dim": dim, "key": key, "days": await store.rollups.series(dim, key, start, end)}
+
 @app.post("/cookies/analyze")
-def analyze_cookies(req: CookieReq):
-    result = analyze_cookie_usage(req)
+async def analyze_cookies(req: CookieReq, response: Response):
+    from cookie_analyzer.core.engine import analyze_cookie_usage
+
+    t0 = time.perf_counter()
+    timings = {} if STAGE_TIMING else None
+    result = await asyncio.to_thread(analyze_cookie_usage, req, timings=timings)
+    if history is not None:
+        t = time.perf_counter()
+        await history.record_cookies(result)
+        if timings is not None:
+            timings["persist"] = (time.perf_counter() - t) * 1000
+    finish_timings(response, "cookies", timings, t0)
     return result
 
+@app.get("/cookies/rules/stats")
+def cookie_rule_stats():
+    # populated when COOKIE_RULE_STATS=1; bulk requests run in worker
+    # processes and are not included
+    from cookie_analyzer.rules.registry import rule_stats
+
+    return rule_stats()
+
+@app.post("/cookies/analyze/bulk")
+async def analyze_cookies_bulk(request: Request):
+    """
+    Body: one CookieReq JSON object per line (NDJSON).
+    Response: one result per line in input order, each with "index", then a
+    final {"summary": {...}} line with sites/sec. Lines are validated by the
+    workers, not by Pydantic; a bad line yields an "error" record.
+    """
+    from cookie_analyzer.core.batch import aiter_bulk
+
+    body = await spool_body(request)
+
+    async def _stream():
+        stats = {}
+        try:
+            async for line in aiter_bulk(body, batch_pool(), stats=stats):
+                yield line + "\n"
+        finally:
+            body.close()
+        yield json.dumps({"summary": stats}) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    llm_stats = _policy.llm.stats() if _policy is not None else None
+    history_stats = history.stats if history is not None else None
+    return PlainTextResponse(render_metrics(llm_stats, history_stats), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def root():
     return {"status": "PlainSight backend running"}
@@ -0,0 +1,137 @@
+"""
+Compressed request bodies.
+
+Clients may send any request body with `Content-Encoding: gzip` or
+`Content-Encoding: zstd` (zstd needs the zstandard package, as policy
+storage does). DecompressRequest, an ASGI middleware, inflates the body as
+it streams in, so endpoints, Pydantic and the NDJSON readers only ever see
+plain bytes. Inflated bodies larger than `max_size` are rejected with 413
+as soon as they cross it (a few KB of zstd can claim gigabytes); corrupt or
+truncated bodies get 400 and other encodings 415.
+"""
+import os
+import zlib
+from typing import List
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+_CHUNK = 64 * 1024
+# zstd output per input byte at most (a 4-byte RLE block is 128 KB)
+_ZSTD_MAX_RATIO = 32 * 1024
+
+
+def accepted_encodings() -> List[str]:
+    """Content-Encodings the backend can read, preferred first."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _GzipInflater:
+    def __init__(self, max_size: int):
+        self._d = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        self._left = max_size
+
+    def feed(self, data: bytes) -> bytes:
+        out = self._d.decompress(data, self._left + 1)
+        if len(out) > self._left:
+            raise _TooLarge
+        self._left -= len(out)
+        return out
+
+    def finish(self) -> bytes:
+        if not self._d.eof:
+            raise zlib.error("truncated gzip stream")
+        return b""
+
+
+class _ZstdInflater:
+    def __init__(self, max_size: int):
+        self._d = zstandard.ZstdDecompressor()
+        self._frame = self._d.decompressobj(write_size=_CHUNK)
+        self._left = max_size
+
+    def feed(self, data: bytes) -> bytes:
+        out = []
+        view = memoryview(data)
+        while view:
+            # a few bytes of zstd can inflate to megabytes: feed no more than
+            # could inflate to what is left of max_size, so an oversized body
+            # fails before holding much more than that
+            size = max(self._left // _ZSTD_MAX_RATIO, 64)
+            piece, view = bytes(view[:size]), view[size:]
+            while piece:
+                if self._frame.eof:  # concatenated frames are one stream
+                    self._frame = self._d.decompressobj(write_size=_CHUNK)
+                chunk = self._frame.decompress(piece)
+                if len(chunk) > self._left:
+                    raise _TooLarge
+                self._left -= len(chunk)
+                out.append(chunk)
+                piece = self._frame.unused_data if self._frame.eof else b""
+        return b"".join(out)
+
+    def finish(self) -> bytes:
+        if not self._frame.eof:
+            raise zstandard.ZstdError("truncated zstd frame")
+        return b""
+
+
+_INFLATERS = {"gzip": _GzipInflater, "zstd": _ZstdInflater}
+_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class DecompressRequest:
+    def __init__(self, app, max_size: int = DEFAULT_MAX_SIZE):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = scope["headers"]
+        encoding = next((v for k, v in headers if k == b"content-encoding"), b"").decode("latin-1").strip().lower()
+        if encoding in ("", "identity"):
+            return await self.app(scope, receive, send)
+
+        if encoding not in accepted_encodings():
+            response = PlainTextResponse(
+                f"Unsupported Content-Encoding {encoding!r}; use one of {', '.join(accepted_encodings())}",
+                status_code=415,
+            )
+            return await response(scope, receive, send)
+
+        inflater = _INFLATERS[encoding](self.max_size)
+        max_size = self.max_size
+
+        async def inflate():
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                body = inflater.feed(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body += inflater.finish()
+            except _TooLarge:
+                raise HTTPException(status_code=413, detail=f"Body inflates to more than {max_size} bytes")
+            except _ERRORS as e:
+                raise HTTPException(status_code=400, detail=f"Malformed {encoding} body: {e}")
+            return {**message, "body": body}
+
+        scope = dict(scope, headers=[(k, v) for k, v in headers if k not in (b"content-encoding", b"content-length")])
+        await self.app(scope, inflate, send)
+
+
+def max_size_from_env() -> int:
+    """MAX_INFLATED_BODY  largest accepted body after decompression, in bytes (default 64 MB)"""
+    return int(os.getenv("MAX_INFLATED_BODY", str(DEFAULT_MAX_SIZE)))
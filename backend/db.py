@@ -0,0 +1,617 @@
+"""
+Shared MongoDB persistence for the policy tracker.
+
+One pooled async (motor) client per process. Indexes are created at
+startup.
+
+Policy text is content-addressed: each distinct body is stored once in
+`policy_bodies` under its sha256, compressed (zstd when installed, zlib
+otherwise), and capture records in `polocies` only carry the hash. A body
+is written the first time its hash is seen; repeats cost one small capture
+record. zstd bodies may use a trained dictionary; dictionaries live in
+`compression_dicts` under an increasing version and every body records the
+version it needs, so old bodies stay readable after retraining. A version
+trained after startup (by `python -m backend.db train-dict` or another
+process) is loaded the first time a body needs it. Text is only fetched
+and decompressed when asked for.
+
+Captures go through a buffered writer that bulk-inserts when
+POLICY_WRITE_BUFFER documents are queued or POLICY_WRITE_DELAY seconds have
+passed, whichever comes first.
+
+Analysis results go to `analyses` (policies) and `cookie_analyses` through
+the same kind of writer. History is read a page at a time with keyset
+pagination (newest first, `_id` below the last one seen), so every page
+costs one index range scan however deep it is. Counts and trends come from
+the counters in backend.rollups, updated as each analysis is recorded.
+
+Any object with motor's collection API can stand in for the database, so
+tests can pass an in-memory one; MONGO_URI=mongomock:// picks
+mongomock-motor's.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from backend.rollups import RollupStore, cookie_counters, policy_counters, rollups_from_env
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # pragma: no cover - optional dependency
+    AsyncIOMotorClient = None
+
+DEFAULT_URI = "mongodb://localhost:27017"
+DB_NAME = "Polocies_tracker"
+POLICIES = "polocies"
+BODIES = "policy_bodies"
+DICTIONARIES = "compression_dicts"
+ANALYSES = "analyses"
+COOKIE_ANALYSES = "cookie_analyses"
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+# hashes known to be stored, so repeats skip the body round-trip entirely
+KNOWN_BODIES = 10_000
+DUPLICATE_KEY = 11000
+
+POLICY_INDEXES = [
+    # per-URL history, newest first; also serves plain url lookups
+    IndexModel([("url", ASCENDING), ("created_at", DESCENDING)], name="url_created_at"),
+    IndexModel([("created_at", DESCENDING)], name="created_at"),
+    IndexModel([("content_hash", ASCENDING)], name="content_hash"),
+]
+
+ANALYSIS_INDEXES = [
+    # _id (always indexed) orders the unfiltered history; these serve the filters
+    IndexModel([("risk_level", ASCENDING), ("_id", DESCENDING)], name="risk_level_id"),
+    IndexModel([("category", ASCENDING), ("_id", DESCENDING)], name="category_id"),
+    IndexModel([("site", ASCENDING), ("_id", DESCENDING)], name="site_id"),
+]
+COOKIE_ANALYSIS_INDEXES = [
+    IndexModel([("site", ASCENDING), ("_id", DESCENDING)], name="site_id"),
+]
+RISK_LEVELS = ("High", "Medium", "Low")
+MAX_PAGE = 200
+
+# Captures saved before bodies were split out still carry their text.
+LIST_PROJECTION = {"text": 0}
+
+
+def _jsonable(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc["_id"] = str(doc["_id"])
+    return doc
+
+
+class BufferedWriter:
+    """
+    Collects documents and writes them with one insert_many when
+    `max_docs` are queued or `max_delay` seconds after the first one.
+
+    A failed write keeps the documents that did not make it for the next
+    flush: all of them after a connection error, only the failed ones
+    after a partial bulk write (duplicates of already stored documents are
+    dropped). At most `max_pending` documents are kept while the database
+    is unreachable; older ones are dropped and counted. add() never raises
+    for a write error, so request handlers are not failed by an outage; a
+    timer retries, and add() only flushes again itself once a write
+    succeeds.
+    """
+
+    def __init__(self, collection, max_docs: int = 100, max_delay: float = 1.0, max_pending: int = 10_000):
+        self.collection = collection
+        self.max_docs = max_docs
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_docs)
+        self._pending: List[Dict[str, Any]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._failing = False
+        self.stats = {"queued": 0, "written": 0, "flushes": 0, "errors": 0, "duplicates": 0, "dropped": 0}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def add(self, doc: Dict[str, Any]) -> None:
+        self._pending.append(doc)
+        self.stats["queued"] += 1
+        self._trim()
+        if len(self._pending) >= self.max_docs and not self._failing:
+            try:
+                await self.flush()
+            except Exception:
+                pass  # counted in stats; the timer below retries
+        if self._pending and self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception:
+            # counted in stats; the documents stay queued for the next try
+            if self._pending and self._timer is None:
+                self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    def _trim(self) -> None:
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.stats["dropped"] += excess
+
+    async def flush(self) -> int:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+
+        docs, self._pending = self._pending, []
+        if not docs:
+            return 0
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # insert_many gave every document an _id; the ones that failed
+            # with a duplicate key are already stored
+            errors = e.details.get("writeErrors", [])
+            duplicates = {err["index"] for err in errors if err.get("code") == DUPLICATE_KEY}
+            failed = [docs[err["index"]] for err in errors if err["index"] not in duplicates]
+            self.stats["written"] += len(docs) - len(errors)
+            self.stats["duplicates"] += len(duplicates)
+            if failed:
+                self._failed(failed)
+                raise
+            self._failing = False
+        except Exception:
+            self._failed(docs)
+            raise
+        else:
+            self.stats["written"] += len(docs)
+            self._failing = False
+        self.stats["flushes"] += 1
+        return len(docs)
+
+    def _failed(self, docs: List[Dict[str, Any]]) -> None:
+        self.stats["errors"] += 1
+        self._failing = True
+        self._pending = docs + self._pending
+        self._trim()
+
+    async def aclose(self) -> None:
+        await self.flush()
+
+
+class MissingDictionary(LookupError):
+    """A body needs a compression dictionary that is not stored."""
+
+
+class BodyCodec:
+    """
+    Compresses policy bodies. New bodies use zstd with the active
+    dictionary (if any), or zlib when zstandard is not installed; any body
+    can be read back as long as its dictionary version is loaded.
+    """
+
+    def __init__(self):
+        self.dictionaries: Dict[int, bytes] = {}
+        self.active: Optional[int] = None
+        self._compressors: Dict[Optional[int], Any] = {}
+        self._decompressors: Dict[Optional[int], Any] = {}
+
+    def add_dictionary(self, version: int, data: bytes, activate: bool = True) -> None:
+        self.dictionaries[version] = data
+        if activate and (self.active is None or version > self.active):
+            self.active = version
+
+    def _dict(self, version: Optional[int]):
+        if version is None:
+            return None
+        if version not in self.dictionaries:
+            raise MissingDictionary(f"compression dictionary version {version} is not loaded")
+        return zstandard.ZstdCompressionDict(self.dictionaries[version])
+
+    def compress(self, raw: bytes) -> Tuple[str, Optional[int], bytes]:
+        if zstandard is None:
+            return "zlib", None, zlib.compress(raw, ZLIB_LEVEL)
+        version = self.active
+        if version not in self._compressors:
+            self._compressors[version] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self._dict(version))
+        return "zstd", version, self._compressors[version].compress(raw)
+
+    def decompress(self, codec: str, version: Optional[int], data: bytes) -> bytes:
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if codec != "zstd":
+            raise ValueError(f"unknown body codec {codec!r}")
+        if zstandard is None:
+            raise ImportError("This body is zstd-compressed: pip install zstandard")
+        if version not in self._decompressors:
+            self._decompressors[version] = zstandard.ZstdDecompressor(dict_data=self._dict(version))
+        return self._decompressors[version].decompress(data)
+
+
+class PolicyStore:
+    def __init__(self, db, max_buffer: int = 100, max_delay: float = 1.0):
+        self.policies = db[POLICIES]
+        self.bodies = db[BODIES]
+        self.dictionaries = db[DICTIONARIES]
+        self.codec = BodyCodec()
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        # max_buffer=0 writes every capture straight away
+        self.writer = BufferedWriter(self.policies, max_buffer, max_delay) if max_buffer > 0 else None
+        self.stats = {"bodies_written": 0, "bodies_deduped": 0, "raw_bytes": 0, "stored_bytes": 0}
+
+    async def ensure_indexes(self) -> None:
+        """Startup: create indexes and load every compression dictionary."""
+        await self.policies.create_indexes(POLICY_INDEXES)
+        async for d in self.dictionaries.find({}).sort("_id", ASCENDING):
+            self.codec.add_dictionary(d["_id"], bytes(d["data"]))
+
+    # --- bodies ---
+
+    def _remember(self, h: str) -> None:
+        self._known[h] = None
+        self._known.move_to_end(h)
+        if len(self._known) > KNOWN_BODIES:
+            self._known.popitem(last=False)
+
+    async def put_body(self, text: str) -> str:
+        """Store `text` unless its hash is already stored; returns the hash."""
+        raw = (text or "").encode("utf-8")
+        h = hashlib.sha256(raw).hexdigest()
+        if h in self._known or await self.bodies.find_one({"_id": h}, {"_id": 1}) is not None:
+            self._remember(h)
+            self.stats["bodies_deduped"] += 1
+            return h
+
+        codec, version, data = await asyncio.to_thread(self.codec.compress, raw)
+        try:
+            await self.bodies.insert_one({
+                "_id": h,
+                "codec": codec,
+                "dict_version": version,
+                "size": len(raw),
+                "data": data,
+                "created_at": datetime.utcnow(),
+            })
+            self.stats["bodies_written"] += 1
+            self.stats["raw_bytes"] += len(raw)
+            self.stats["stored_bytes"] += len(data)
+        except DuplicateKeyError:
+            # stored concurrently by another request or process
+            self.stats["bodies_deduped"] += 1
+        self._remember(h)
+        return h
+
+    async def _decompress(self, body: Dict[str, Any]) -> bytes:
+        version = body.get("dict_version")
+        if body["codec"] == "zstd" and version is not None and version not in self.codec.dictionaries:
+            # trained after startup, by the CLI or another process
+            d = await self.dictionaries.find_one({"_id": version})
+            if d is None:
+                raise MissingDictionary(
+                    f"body {body['_id']} needs compression dictionary version {version}, which is not stored"
+                )
+            self.codec.add_dictionary(version, bytes(d["data"]))
+        return self.codec.decompress(body["codec"], version, bytes(body["data"]))
+
+    async def get_text(self, h: str) -> Optional[str]:
+        """
+        The text stored under `h`, None if there is none. Raises
+        MissingDictionary if its compression dictionary is gone.
+        """
+        body = await self.bodies.find_one({"_id": h})
+        if body is None:
+            return None
+        return (await self._decompress(body)).decode("utf-8")
+
+    # --- captures ---
+
+    @staticmethod
+    def make_document(url: str, h: str, size: int) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "content_hash": h,
+            "size": size,
+            "created_at": datetime.utcnow(),
+        }
+
+    async def save(self, url: str, text: str) -> str:
+        """Returns "queued" when the capture went to the write buffer."""
+        h = await self.put_body(text)
+        doc = self.make_document(url, h, len(text or ""))
+        if self.writer is None:
+            await self.policies.insert_one(doc)
+            return "saved"
+        await self.writer.add(doc)
+        return "queued"
+
+    async def list_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        cursor = self.policies.find({}, LIST_PROJECTION).sort("created_at", DESCENDING).limit(limit)
+        return [_jsonable(doc) async for doc in cursor]
+
+    async def get(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        """One capture with its text, decompressed on demand."""
+        try:
+            oid = ObjectId(capture_id)
+        except InvalidId:
+            return None
+        doc = await self.policies.find_one({"_id": oid})
+        if doc is None:
+            return None
+        if "text" not in doc:
+            doc["text"] = await self.get_text(doc["content_hash"])
+        return _jsonable(doc)
+
+    async def train_dictionary(self, samples: int = 1000, dict_size: int = 112_640) -> int:
+        """
+        Train a zstd dictionary on up to `samples` stored bodies, store it as
+        the next version and use it for new bodies. Returns the version.
+        """
+        if zstandard is None:
+            raise ImportError("Dictionary training needs zstandard: pip install zstandard")
+        texts = []
+        async for body in self.bodies.find({}).sort("created_at", DESCENDING).limit(samples):
+            texts.append(await self._decompress(body))
+        trained = await asyncio.to_thread(zstandard.train_dictionary, dict_size, texts)
+
+        latest = await self.dictionaries.find_one({}, sort=[("_id", DESCENDING)])
+        version = (latest["_id"] + 1) if latest else 1
+        await self.dictionaries.insert_one({
+            "_id": version,
+            "codec": "zstd",
+            "data": trained.as_bytes(),
+            "samples": len(texts),
+            "created_at": datetime.utcnow(),
+        })
+        self.codec.add_dictionary(version, trained.as_bytes())
+        return version
+
+    async def aclose(self) -> None:
+        if self.writer is not None:
+            await self.writer.aclose()
+
+
+class HistoryStore:
+    """Analysis history: one document per analyzed page or cookie jar."""
+
+    def __init__(self, db, max_buffer: int = 100, max_delay: float = 1.0, rollups: Optional[RollupStore] = None):
+        self.analyses = db[ANALYSES]
+        self.cookie_analyses = db[COOKIE_ANALYSES]
+        self.rollups = rollups if rollups is not None else RollupStore(db, max_delay=max_delay)
+        buffered = max_buffer > 0
+        self.writer = BufferedWriter(self.analyses, max_buffer, max_delay) if buffered else None
+        self.cookie_writer = BufferedWriter(self.cookie_analyses, max_buffer, max_delay) if buffered else None
+        self.stats = {"recorded": 0, "unchanged": 0, "errors": 0}
+
+    async def ensure_indexes(self) -> None:
+        await self.analyses.create_indexes(ANALYSIS_INDEXES)
+        await self.cookie_analyses.create_indexes(COOKIE_ANALYSIS_INDEXES)
+        await self.rollups.ensure_indexes()
+
+    @staticmethod
+    def make_document(site: str, url: str, result: Dict[str, Any], category: str = "") -> Dict[str, Any]:
+        return {
+            "site": site,
+            "url": url,
+            "category": category or "Uncategorized",
+            "risk_level": result.get("risk_level", "Low"),
+            "score": result.get("policy_risk_score", 0),
+            "summary": result.get("summary_simple", ""),
+            "takeaways": result.get("key_takeaways", []),
+            "created_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    def make_cookie_document(result: Dict[str, Any]) -> Dict[str, Any]:
+        facts = result.get("facts", {})
+        return {
+            "site": result["site_domain"],
+            "risk_level": result["risk_level"],
+            "flags": result["flags"],
+            "third_party_domains": sorted({d.lstrip(".") for d in facts.get("third_party_domains", [])}),
+            "tracker_vendors": facts.get("tracker_vendors", []),
+            "created_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    async def _insert(collection, writer: Optional[BufferedWriter], doc: Dict[str, Any]) -> None:
+        if writer is None:
+            await collection.insert_one(doc)
+        else:
+            await writer.add(doc)
+
+    def _failed(self, what: str, error: Exception) -> None:
+        self.stats["errors"] += 1
+        print(f"HISTORY: could not record {what}: {error!r}", file=sys.stderr)
+
+    async def record(self, site: str, url: str, result: Dict[str, Any], category: str = "") -> bool:
+        """
+        Persist a policy pipeline result. A re-capture whose text did not
+        change (result["changes"]["status"] == "unchanged") is not recorded
+        again, so counts are of analyses, not visits. Write errors are
+        counted in stats and printed, never raised: the analysis itself
+        succeeded. Returns whether the result was recorded.
+        """
+        if (result.get("changes") or {}).get("status") == "unchanged":
+            self.stats["unchanged"] += 1
+            return False
+        doc = self.make_document(site, url, result, category)
+        try:
+            await self._insert(self.analyses, self.writer, doc)
+            await self.rollups.add(policy_counters(doc))
+        except Exception as e:
+            self._failed(url, e)
+            return False
+        self.stats["recorded"] += 1
+        return True
+
+    async def record_cookies(self, result: Dict[str, Any]) -> bool:
+        """Persist an analyze_cookie_usage result; errors as in record()."""
+        doc = self.make_cookie_document(result)
+        try:
+            await self._insert(self.cookie_analyses, self.cookie_writer, doc)
+            await self.rollups.add(cookie_counters(doc))
+        except Exception as e:
+            self._failed(f"cookies of {doc['site']}", e)
+            return False
+        self.stats["recorded"] += 1
+        return True
+
+    async def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        category: Optional[str] = None,
+        site: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Newest first. `cursor` is the `next_cursor` of the previous page;
+        `next_cursor` is None on the last page.
+        """
+        query: Dict[str, Any] = {}
+        for field, value in (("risk_level", risk_level), ("category", category), ("site", site)):
+            if value:
+                query[field] = value
+        if cursor:
+            try:
+                query["_id"] = {"$lt": ObjectId(cursor)}
+            except InvalidId:
+                raise ValueError(f"invalid cursor {cursor!r}")
+
+        limit = max(1, min(limit, MAX_PAGE))
+        # one extra document tells whether there is a next page
+        docs = [_jsonable(d) async for d in self.analyses.find(query).sort("_id", DESCENDING).limit(limit + 1)]
+        more = len(docs) > limit
+        docs = docs[:limit]
+        return {"items": docs, "next_cursor": docs[-1]["_id"] if more else None}
+
+    async def summary(self) -> Dict[str, Any]:
+        """
+        Total, counts per risk level, count / risk mix / mean score per
+        category, and when the latest analysis was recorded. Read from the
+        all-time rollup counters.
+        """
+        rollups = self.rollups
+        risk_levels = {level: 0 for level in RISK_LEVELS}
+        for row in await rollups.counts("policy_risk"):
+            risk_levels[row["key"]] = row["n"]
+
+        scores = {row["key"]: row["n"] for row in await rollups.counts("category_score")}
+        categories: Dict[str, Dict[str, Any]] = {
+            row["key"]: {"count": row["n"], "risk_levels": {level: 0 for level in RISK_LEVELS}}
+            for row in await rollups.counts("policy_category")
+        }
+        for row in await rollups.counts("category_risk"):
+            category, _, level = row["key"].rpartition("|")
+            if category in categories:
+                categories[category]["risk_levels"][level] = row["n"]
+
+        latest = await self.analyses.find_one({}, {"created_at": 1}, sort=[("_id", DESCENDING)])
+        return {
+            "total": sum(risk_levels.values()),
+            "last_analyzed": latest["created_at"].isoformat() if latest else None,
+            "risk_levels": risk_levels,
+            "categories": [
+                {
+                    "category": name,
+                    "count": c["count"],
+                    "mean_score": round(scores.get(name, 0) / c["count"], 2),
+                    "risk_levels": c["risk_levels"],
+                }
+                for name, c in categories.items()
+            ],
+        }
+
+    async def aclose(self) -> None:
+        if self.writer is not None:
+            await self.writer.aclose()
+            await self.cookie_writer.aclose()
+        await self.rollups.aclose()
+
+
+def database_from_env(default_uri: str = DEFAULT_URI):
+    """
+    MONGO_URI       connection string (default: `default_uri`);
+                    mongomock:// uses an in-memory database
+    MONGO_DB        database name (default Polocies_tracker)
+    MONGO_MAX_POOL  max pooled connections (default 50)
+    """
+    uri = os.getenv("MONGO_URI") or default_uri
+    if uri.startswith("mongomock://"):
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        if AsyncIOMotorClient is None:
+            raise ImportError("MongoDB persistence needs motor: pip install cookie-analyzer[mongo]")
+        client = AsyncIOMotorClient(
+            uri,
+            maxPoolSize=int(os.getenv("MONGO_MAX_POOL", "50")),
+            serverSelectionTimeoutMS=5000,
+        )
+    return client[os.getenv("MONGO_DB", DB_NAME)]
+
+
+def store_from_env(default_uri: str = DEFAULT_URI) -> PolicyStore:
+    """
+    database_from_env() plus
+    POLICY_WRITE_BUFFER  documents per bulk insert, 0 = no buffering (default 100)
+    POLICY_WRITE_DELAY   max seconds a document waits in the buffer (default 1)
+    """
+    return PolicyStore(
+        database_from_env(default_uri),
+        max_buffer=int(os.getenv("POLICY_WRITE_BUFFER", "100")),
+        max_delay=float(os.getenv("POLICY_WRITE_DELAY", "1")),
+    )
+
+
+def history_from_env(default_uri: str = DEFAULT_URI) -> HistoryStore:
+    """
+    database_from_env() plus POLICY_WRITE_BUFFER / POLICY_WRITE_DELAY and
+    rollups_from_env()'s ROLLUP_MAX_KEYS / ROLLUP_FLUSH_DELAY.
+    """
+    db = database_from_env(default_uri)
+    return HistoryStore(
+        db,
+        max_buffer=int(os.getenv("POLICY_WRITE_BUFFER", "100")),
+        max_delay=float(os.getenv("POLICY_WRITE_DELAY", "1")),
+        rollups=rollups_from_env(db),
+    )
+
+
+async def _train(args) -> None:
+    store = store_from_env()
+    await store.ensure_indexes()
+    version = await store.train_dictionary(samples=args.samples, dict_size=args.size)
+    print(f"Trained zstd dictionary version {version}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Policy store maintenance")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    train = sub.add_parser("train-dict", help="Train a new zstd dictionary on stored bodies")
+    train.add_argument("--samples", type=int, default=1000)
+    train.add_argument("--size", type=int, default=112_640, help="Dictionary size in bytes")
+    args = ap.parse_args()
+
+    if args.cmd == "train-dict":
+        asyncio.run(_train(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Request and stage timing for the backend.
+
+- Stage timings: the pipelines fill a `timings` dict (milliseconds per
+  stage) when given one. Endpoints return it as a Server-Timing header and
+  add it to the stage histogram. SERVER_TIMING=0 stops passing the dict, so
+  the pipelines skip their timing work altogether.
+- /metrics: request latency per route, stage latency per pipeline and
+  LLM call latency per outcome, as Prometheus histograms in the text
+  exposition format, plus the LLM client's counters and breaker state and
+  the analysis history's write counters.
+- Sampling profiler, off unless PROFILE_SLOW_MS is set: while requests are
+  in flight a background thread samples every thread's stack each
+  PROFILE_INTERVAL_MS; a request slower than PROFILE_SLOW_MS writes its
+  samples as collapsed stacks (`frame;frame;frame count` lines, the input
+  of flamegraph.pl, speedscope and inferno) into PROFILE_DIR. Samples
+  cover the whole process, so concurrent requests show up in each other's
+  profiles.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def timing_enabled() -> bool:
+    return os.getenv("SERVER_TIMING", "1") not in ("", "0")
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Server-Timing header value for milliseconds per stage."""
+    return ", ".join(f"{name};dur={ms:.2f}" for name, ms in timings.items())
+
+
+class Histogram:
+    """A labelled Prometheus histogram; observe() takes seconds."""
+
+    def __init__(self, name: str, doc: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # labels -> bucket counts..., +Inf, sum
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], seconds: float) -> None:
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f'{self.name}_bucket{{{base}{sep}le="{le}"}} {cumulative}'
+            braces = f"{{{base}}}" if base else ""
+            yield f"{self.name}_sum{braces} {series[-1]}"
+            yield f"{self.name}_count{braces} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "plainsight_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram(
+    "plainsight_stage_duration_seconds", "Time per pipeline stage.", ("pipeline", "stage")
+)
+
+
+LLM_SECONDS = Histogram(
+    "plainsight_llm_attempt_duration_seconds", "Time per LLM HTTP attempt.", ("outcome",)
+)
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def observe_llm(outcome: str, seconds: float) -> None:
+    LLM_SECONDS.observe((outcome,), seconds)
+
+
+def render_llm(stats: Dict) -> Iterator[str]:
+    """Counters and breaker state from AsyncOpenRouterClient.stats()."""
+    for name in ("calls", "ok", "failed", "rejected", "short_circuited", "attempts", "retries"):
+        yield f"# TYPE plainsight_llm_{name}_total counter"
+        yield f"plainsight_llm_{name}_total {stats[name]}"
+    yield "# TYPE plainsight_llm_throttled_seconds_total counter"
+    yield f"plainsight_llm_throttled_seconds_total {stats['throttled_s']}"
+    yield "# HELP plainsight_llm_breaker_state 0 closed, 1 half-open, 2 open."
+    yield "# TYPE plainsight_llm_breaker_state gauge"
+    yield f"plainsight_llm_breaker_state {_BREAKER_STATES[stats['breaker']['state']]}"
+    yield "# TYPE plainsight_llm_breaker_opened_total counter"
+    yield f"plainsight_llm_breaker_opened_total {stats['breaker']['opened']}"
+
+
+def render_history(stats: Dict) -> Iterator[str]:
+    """Counters from HistoryStore.stats."""
+    for name in ("recorded", "unchanged", "errors"):
+        yield f"# TYPE plainsight_history_{name}_total counter"
+        yield f"plainsight_history_{name}_total {stats[name]}"
+
+
+def observe_stages(pipeline: str, timings: Dict[str, float]) -> None:
+    for stage, ms in timings.items():
+        STAGE_SECONDS.observe((pipeline, stage), ms / 1000)
+
+
+def render_metrics(llm_stats: Optional[Dict] = None, history_stats: Optional[Dict] = None) -> str:
+    lines = [*REQUEST_SECONDS.render(), *STAGE_SECONDS.render(), *LLM_SECONDS.render()]
+    if llm_stats is not None:
+        lines.extend(render_llm(llm_stats))
+    if history_stats is not None:
+        lines.extend(render_history(history_stats))
+    return "\n".join(lines) + "\n"
+
+
+# --- sampling profiler ---
+
+def _collapse(frame, limit: int = 128) -> str:
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class SamplingProfiler:
+    def __init__(self, slow_ms: float, interval_ms: float = 5.0, out_dir: Optional[str] = None):
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.out_dir = out_dir or os.path.join(tempfile.gettempdir(), "plainsight-profiles")
+        self._active: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"sampled_requests": 0, "dumped": 0}
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while True:
+            self._wake.wait()
+            with self._lock:
+                targets = list(self._active.values())
+                if not targets:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [
+                f"{names.get(ident, ident)};{_collapse(frame)}"
+                for ident, frame in frames.items()
+                if ident != me
+            ]
+            del frames
+            for samples in targets:
+                samples.update(stacks)
+            time.sleep(self.interval)
+
+    @contextmanager
+    def request(self, name: str):
+        """Sample the process while the block runs; dump it if it was slow."""
+        samples: Counter = Counter()
+        token = id(samples)
+        with self._lock:
+            self._active[token] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                del self._active[token]
+            self.stats["sampled_requests"] += 1
+            if elapsed_ms >= self.slow_ms and samples:
+                self._dump(name, elapsed_ms, samples)
+
+    def _dump(self, name: str, elapsed_ms: float, samples: Counter) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = "".join(c if c.isalnum() else "_" for c in name.strip("/")) or "root"
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{elapsed_ms:.0f}ms.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.stats["dumped"] += 1
+
+
+def profiler_from_env() -> Optional[SamplingProfiler]:
+    """
+    PROFILE_SLOW_MS      dump requests at least this slow; unset = profiler off
+    PROFILE_INTERVAL_MS  sampling interval (default 5)
+    PROFILE_DIR          where .folded files go (default <tmp>/plainsight-profiles)
+    """
+    slow = os.getenv("PROFILE_SLOW_MS")
+    if not slow:
+        return None
+    return SamplingProfiler(
+        slow_ms=float(slow),
+        interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        out_dir=os.getenv("PROFILE_DIR") or None,
+    )
+
+
+def profile_request(profiler: Optional[SamplingProfiler], name: str):
+    return profiler.request(name) if profiler is not None else nullcontext()
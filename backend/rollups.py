@@ -0,0 +1,279 @@
+"""
+Pre-aggregated counters over the analysis history.
+
+Every persisted analysis bumps a handful of counters, one document per
+(day, dimension, key) in `rollups`, plus an all-time bucket (day "all"):
+
+    analyses          "policy" / "cookies"     analyses recorded
+    policy_risk       High / Medium / Low      policy risk level
+    policy_category   site category            policy analyses per category
+    category_risk     "<category>|<level>"     risk mix per category
+    category_score    site category            sum of policy scores
+    cookie_risk       high / medium / low      cookie risk level
+    flag              cookie flag              sites raising the flag
+    third_party       cookie domain            sites setting its cookies
+    tracker           vendor                   sites with its trackers
+
+Queries read the counters for a day range (or the all-time bucket), so
+their cost depends on the number of days and keys asked for, not on how
+many analyses are stored. Increments are summed in memory and written as
+one bulk of $inc upserts when ROLLUP_FLUSH_DELAY seconds have passed or
+ROLLUP_MAX_KEYS distinct counters are pending. mongomock (the
+MONGO_URI=mongomock:// stand-in) cannot take pymongo's UpdateOne in a
+bulk, so there each counter is one update_one. A failed write keeps its
+increments pending and is retried by a timer; it is never raised into
+the request that added them. Counters that were pending when a process
+died are lost; rebuild from the raw history with
+
+    python -m backend.rollups rebuild
+"""
+import argparse
+import asyncio
+import os
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+ROLLUPS = "rollups"
+ALL_TIME = "all"
+
+DIMENSIONS = (
+    "analyses",
+    "policy_risk",
+    "policy_category",
+    "category_risk",
+    "category_score",
+    "cookie_risk",
+    "flag",
+    "third_party",
+    "tracker",
+)
+
+ROLLUP_INDEXES = [
+    IndexModel([("dim", ASCENDING), ("day", ASCENDING), ("n", DESCENDING)], name="dim_day_n"),
+    IndexModel([("dim", ASCENDING), ("key", ASCENDING), ("day", ASCENDING)], name="dim_key_day"),
+]
+
+Counters = Counter  # (day, dim, key) -> increment
+
+
+def _day(created_at: Optional[datetime]) -> str:
+    return (created_at or datetime.utcnow()).date().isoformat()
+
+
+def _add(counters: Counters, day: str, dim: str, key: str, n: int = 1) -> None:
+    counters[(day, dim, key)] += n
+    counters[(ALL_TIME, dim, key)] += n
+
+
+def policy_counters(doc: Dict[str, Any], counters: Optional[Counters] = None) -> Counters:
+    """Counters for one `analyses` document."""
+    counters = Counters() if counters is None else counters
+    day = _day(doc.get("created_at"))
+    category = doc.get("category") or "Uncategorized"
+    _add(counters, day, "analyses", "policy")
+    _add(counters, day, "policy_risk", doc["risk_level"])
+    _add(counters, day, "policy_category", category)
+    _add(counters, day, "category_risk", f"{category}|{doc['risk_level']}")
+    _add(counters, day, "category_score", category, doc.get("score", 0))
+    return counters
+
+
+def cookie_counters(doc: Dict[str, Any], counters: Optional[Counters] = None) -> Counters:
+    """Counters for one `cookie_analyses` document."""
+    counters = Counters() if counters is None else counters
+    day = _day(doc.get("created_at"))
+    _add(counters, day, "analyses", "cookies")
+    _add(counters, day, "cookie_risk", doc["risk_level"])
+    for flag in doc.get("flags", []):
+        _add(counters, day, "flag", flag)
+    for domain in doc.get("third_party_domains", []):
+        _add(counters, day, "third_party", domain)
+    for vendor in doc.get("tracker_vendors", []):
+        _add(counters, day, "tracker", vendor)
+    return counters
+
+
+def _updates(counters: Counters) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(filter, update) of one $inc upsert per counter."""
+    return [
+        ({"_id": f"{day}|{dim}|{key}"}, {"$inc": {"n": n}, "$setOnInsert": {"day": day, "dim": dim, "key": key}})
+        for (day, dim, key), n in counters.items()
+        if n
+    ]
+
+
+def _is_mongomock(collection) -> bool:
+    # mongomock-motor wraps a mongomock collection in motor's class
+    return type(getattr(collection, "delegate", collection)).__module__.split(".")[0] == "mongomock"
+
+
+class RollupStore:
+    def __init__(self, db, max_keys: int = 5000, max_delay: float = 1.0):
+        self.rollups = db[ROLLUPS]
+        self.max_keys = max_keys
+        self.max_delay = max_delay
+        self._pending = Counters()
+        self._timer: Optional[asyncio.Task] = None
+        self._failing = False
+        self._bulk = not _is_mongomock(self.rollups)
+        self.stats = {"increments": 0, "upserts": 0, "flushes": 0, "errors": 0}
+
+    async def ensure_indexes(self) -> None:
+        await self.rollups.create_indexes(ROLLUP_INDEXES)
+
+    # --- writes ---
+
+    async def _write(self, updates: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        if self._bulk:
+            await self.rollups.bulk_write([UpdateOne(f, u, upsert=True) for f, u in updates], ordered=False)
+        else:
+            for f, u in updates:
+                await self.rollups.update_one(f, u, upsert=True)
+
+    async def add(self, counters: Counters) -> None:
+        """Never raises for a write error; see flush()."""
+        self._pending.update(counters)
+        self.stats["increments"] += len(counters)
+        if (len(self._pending) >= self.max_keys or self.max_delay <= 0) and not self._failing:
+            try:
+                await self.flush()
+            except Exception:
+                pass  # counted in stats; the timer below retries
+        if self._pending and self._timer is None and (self._failing or self.max_delay > 0):
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        # retries after an error wait at least a second, also with max_delay 0
+        await asyncio.sleep(max(self.max_delay, 1.0) if self._failing else self.max_delay)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception:
+            # counted in stats; the increments stay pending for the next try
+            if self._pending and self._timer is None:
+                self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def flush(self) -> int:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, Counters()
+        updates = _updates(pending)
+        if not updates:
+            return 0
+        try:
+            await self._write(updates)
+        except Exception:
+            # $inc is not idempotent; a partly applied bulk may be counted
+            # twice on retry, which a rebuild corrects
+            self.stats["errors"] += 1
+            self._failing = True
+            self._pending.update(pending)
+            raise
+        self._failing = False
+        self.stats["upserts"] += len(updates)
+        self.stats["flushes"] += 1
+        return len(updates)
+
+    async def aclose(self) -> None:
+        await self.flush()
+
+    # --- queries ---
+
+    async def counts(
+        self,
+        dim: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        limit: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Counter totals per key for days in [start, end], largest first.
+        Without a range the all-time bucket is read directly.
+        """
+        if start is None and end is None:
+            cursor = self.rollups.find({"dim": dim, "day": ALL_TIME}, {"key": 1, "n": 1, "_id": 0})
+            return [{"key": d["key"], "n": d["n"]} async for d in cursor.sort("n", DESCENDING).limit(limit)]
+
+        days: Dict[str, Any] = {"$ne": ALL_TIME}
+        if start is not None:
+            days["$gte"] = start.isoformat()
+        if end is not None:
+            days["$lte"] = end.isoformat()
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": {"dim": dim, "day": days}},
+            {"$group": {"_id": "$key", "n": {"$sum": "$n"}}},
+            {"$sort": {"n": -1, "_id": 1}},
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        return [{"key": d["_id"], "n": d["n"]} async for d in self.rollups.aggregate(pipeline)]
+
+    async def series(self, dim: str, key: str, start: date, end: date) -> List[Dict[str, Any]]:
+        """Per-day counts of one key; days without any are left out."""
+        cursor = self.rollups.find(
+            {"dim": dim, "key": key, "day": {"$gte": start.isoformat(), "$lte": end.isoformat()}},
+            {"day": 1, "n": 1, "_id": 0},
+        ).sort("day", ASCENDING)
+        return [{"day": d["day"], "n": d["n"]} async for d in cursor]
+
+    # --- rebuild ---
+
+    async def rebuild(self, analyses, cookie_analyses, batch: int = 5000) -> Dict[str, int]:
+        """
+        Recompute every counter from the raw history and replace the
+        current ones. Analyses recorded while this runs may be missed.
+        """
+        counters = Counters()
+        docs = 0
+        for collection, count in ((analyses, policy_counters), (cookie_analyses, cookie_counters)):
+            async for doc in collection.find({}, {"summary": 0, "takeaways": 0}):
+                count(doc, counters)
+                docs += 1
+
+        await self.flush()
+        await self.rollups.delete_many({})
+        updates = _updates(counters)
+        for i in range(0, len(updates), batch):
+            await self._write(updates[i:i + batch])
+        return {"analyses": docs, "counters": len(updates)}
+
+
+def rollups_from_env(db) -> RollupStore:
+    """
+    ROLLUP_MAX_KEYS     distinct pending counters that force a flush (default 5000)
+    ROLLUP_FLUSH_DELAY  max seconds an increment stays pending, 0 = write at once (default 1)
+    """
+    return RollupStore(
+        db,
+        max_keys=int(os.getenv("ROLLUP_MAX_KEYS", "5000")),
+        max_delay=float(os.getenv("ROLLUP_FLUSH_DELAY", "1")),
+    )
+
+
+async def _rebuild() -> None:
+    from backend.db import ANALYSES, COOKIE_ANALYSES, database_from_env
+
+    db = database_from_env()
+    store = RollupStore(db)
+    await store.ensure_indexes()
+    result = await store.rebuild(db[ANALYSES], db[COOKIE_ANALYSES])
+    print(f"Rebuilt {result['counters']} counters from {result['analyses']} analyses")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Analysis history rollups")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="Recompute all counters from the raw history")
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        asyncio.run(_rebuild())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Run the backend as several worker processes sharing one listening socket.
+
+    python -m backend.serve --workers 4 --preload
+
+Without --preload every worker imports the app and loads its tables
+itself. With it, the parent imports both pipelines, FastAPI and the Mongo
+driver, builds the public suffix trie, the cookie knowledge base and the
+policy regexes, freezes them out of the garbage collector's reach and only
+then forks: workers start at once and share those pages copy-on-write
+instead of holding one copy each. Anything that opens a connection (Mongo,
+the LLM client, caches) is still created inside each worker, after the
+fork. Needs os.fork, so not on Windows; run uvicorn directly there.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+
+
+def warm_up() -> None:
+    """
+    Import and build everything the app loads lazily. backend.app itself is
+    left to the workers: importing it creates the Mongo client, which must
+    not cross a fork.
+    """
+    import fastapi  # noqa: F401
+    import backend.observability  # noqa: F401
+
+    if POLICY_SRC not in sys.path:
+        sys.path.insert(0, POLICY_SRC)
+    from pipeline import batch, cache, extract, incremental, patterns, pdf  # type: ignore  # noqa: F401
+    from cookie_analyzer.core import batch as cookie_batch  # noqa: F401
+    from cookie_analyzer.core.engine import prewarm
+
+    patterns.prewarm()
+    prewarm()
+    if os.getenv("MONGO_URI"):
+        import backend.db  # noqa: F401
+
+
+def serve(sock: socket.socket, args) -> None:
+    import uvicorn
+
+    config = uvicorn.Config("backend.app:app", log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve the PlainSight backend with pre-forked workers")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--preload", action="store_true", help="Warm up once, then fork the workers")
+    ap.add_argument("--keep-alive", type=int, default=5, help="Idle keep-alive timeout in seconds")
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("backend.serve needs os.fork; run `uvicorn backend.app:app` instead")
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    if args.preload:
+        t0 = time.perf_counter()
+        warm_up()
+        gc.freeze()  # inherited objects are never scanned, so their pages stay shared
+        print(f"Warmed up in {(time.perf_counter() - t0) * 1000:.0f} ms", file=sys.stderr)
+
+    workers = {}  # pid -> start time
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                serve(sock, args)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            os._exit(code)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+    print(f"Serving on {args.host}:{args.port} with {args.workers} workers", file=sys.stderr)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if stopping or started is None:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if code and time.monotonic() - started < 1.0:
+            print(f"Worker {pid} failed on startup (exit code {code}); stopping", file=sys.stderr)
+            stop(signal.SIGTERM, None)
+            sys.exit(code if code > 0 else 1)
+        print(f"Worker {pid} exited with code {code}; starting another", file=sys.stderr)
+        spawn()
+
+
+if __name__ == "__main__":
+    main()
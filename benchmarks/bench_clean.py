@@ -0,0 +1,104 @@
+"""
+Check clean_text against the multi-pass implementation it replaced and
+compare time and peak memory on a multi-megabyte page.
+
+    python -m benchmarks.bench_clean
+"""
+import os
+import random
+import re
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+
+from pipeline.clean import clean_text  # type: ignore  # noqa: E402
+from benchmarks.bench_section import load_policy_text  # noqa: E402
+
+
+def legacy_clean_text(text: str) -> str:
+    t = (text or "").replace("\r", "\n")
+    t = re.sub(r"[ \t]+", " ", t)
+    t = re.sub(r"\n{3,}", "\n\n", t)
+
+    lines = [ln.strip() for ln in t.split("\n")]
+    out = []
+    last = None
+    for ln in lines:
+        if len(ln) < 3:
+            continue
+        low = ln.lower()
+        if low in {"home", "about", "contact", "login", "sign up", "privacy", "terms", "cookies"}:
+            continue
+        if last is not None and ln == last:
+            continue
+        out.append(ln)
+        last = ln
+
+    cleaned = "\n".join(out).strip()
+
+    if len(cleaned) > 120_000:
+        cleaned = cleaned[:120_000]
+
+    return cleaned
+
+
+PIECES = [
+    "Home", "ABOUT", " privacy ", "We collect\tyour  email.", "We collect\tyour  email.",
+    "ok", "a", "", " ", "\t\t", " nbsp ", "\x0bvt", "Sign up", "sign  up",
+    "Third party partners may receive data.", "x" * 300,
+]
+SEPARATORS = ["\n", "\r\n", "\r", "\n\n\n\n", " \n ", "\t\n"]
+
+
+def fuzz_text(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(PIECES) + rng.choice(SEPARATORS) for _ in range(n))
+
+
+def check_identical(rounds: int = 2000) -> None:
+    rng = random.Random(5)
+    for _ in range(rounds):
+        text = fuzz_text(rng, rng.randint(0, 60))
+        expected = legacy_clean_text(text)
+        assert clean_text(text) == expected, repr(text)
+
+        # the same text fed as arbitrary chunks
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, 5)))
+        chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        assert clean_text(iter(chunks)) == expected, repr(chunks)
+
+    # budget cut-off, including a duplicate line straddling the limit
+    big = fuzz_text(rng, 5000) + ("y" * 70_000 + "\n") * 3
+    assert clean_text(big) == legacy_clean_text(big)
+    big = ("z" * 70_000 + "\n") * 3
+    assert clean_text(big) == legacy_clean_text(big)
+
+
+def peak_kib(fn, text) -> float:
+    tracemalloc.start()
+    fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    check_identical()
+    print("output identical to legacy clean_text")
+
+    # A pasted multi-megabyte page, most of which falls past the 120k budget.
+    page = "\n".join(load_policy_text()[i:i + 200] for i in range(0, 20_000, 200))
+    page = (page + "\n") * 1000
+    print(f"input: {len(page) / 1e6:.1f} M chars")
+
+    for name, fn in [("legacy", legacy_clean_text), ("current", clean_text)]:
+        best = min(timeit.repeat(lambda: fn(page), number=3, repeat=3)) / 3
+        print(f"{name:8s} {best * 1000:8.2f} ms  peak {peak_kib(fn, page):10.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
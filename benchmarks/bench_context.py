@@ -0,0 +1,84 @@
+"""
+Compare the policy text the LLM prompt used to get (the first 12,000
+characters) with pack_context() at a few token budgets: prompt size,
+packing time, and how many of the signals, data categories and risk
+sections found in the whole policy the prompt still covers.
+
+    python -m benchmarks.bench_context
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+
+from pipeline.clean import clean_text  # type: ignore  # noqa: E402
+from pipeline.context import GAP, _packed, estimate_tokens, pack_context  # type: ignore  # noqa: E402
+from pipeline.section import classify_chunk  # type: ignore  # noqa: E402
+from pipeline.signals import scan_policy_text  # type: ignore  # noqa: E402
+from benchmarks.corpus import POLICY_SIZES, SECTIONS, make_policy  # noqa: E402
+
+BUDGETS = [500, 1000, 2000, 3000]
+SEEDS = 5
+LEGACY_CHARS = 12_000
+
+
+def ordered_policy(size: int) -> str:
+    """
+    Sections in the usual order: a long collection/sharing/cookies part
+    that fills `size`, then retention, rights and contact, which the first
+    12,000 characters never reach on long policies.
+    """
+    head = ["Information We Collect", "How We Share Information", "Cookies and Tracking"]
+    tail = ["Data Retention", "Your Rights", "Children's Privacy", "Contact Us"]
+    parts, n = [], 0
+    while n < size:
+        for heading in head:
+            block = "\n".join([heading, *(f"{s} (clause {n}.{i})" for i, s in enumerate(SECTIONS[heading]))])
+            parts.append(block)
+            n += len(block)
+    parts.extend("\n".join([heading, *SECTIONS[heading]]) for heading in tail)
+    return "\n\n".join(parts)
+
+
+def covered(text: str) -> set:
+    signals, data = scan_policy_text(text.lower())
+    sections = {classify_chunk(p.lower()) for p in text.split("\n") if p and p != GAP}
+    return {n for n, hit in signals.items() if hit} | set(data) | {f"section:{s}" for s in sections}
+
+
+def check_budget() -> None:
+    for size in POLICY_SIZES:
+        for seed in range(SEEDS):
+            cleaned = clean_text(make_policy(size, seed))
+            for budget in BUDGETS:
+                packed = pack_context(cleaned, budget)
+                assert estimate_tokens(packed) <= budget * 1.05, (size, seed, budget)
+                assert pack_context(cleaned, budget) is packed  # served from the cache
+
+
+def main():
+    check_budget()
+    print("packed context stays within budget")
+
+    print(f"{'policy':>10s} {'prompt':>10s} {'tokens':>7s} {'pack ms':>8s} {'coverage':>9s}")
+    inputs = [(f"{size // 1000}kb", make_policy(size)) for size in POLICY_SIZES[1:]]
+    inputs += [(f"{size // 1000}kb ord", ordered_policy(size)) for size in POLICY_SIZES[1:3]]
+    for label, policy in inputs:
+        cleaned = clean_text(policy)
+        everything = covered(cleaned)
+        rows = [("[:12000]", cleaned[:LEGACY_CHARS], 0.0)]
+        for budget in BUDGETS:
+            ms = min(timeit.repeat(lambda: (_packed.clear(), pack_context(cleaned, budget)),
+                                   number=1, repeat=3)) * 1000
+            rows.append((f"{budget} tok", pack_context(cleaned, budget), ms))
+        for name, text, ms in rows:
+            got = covered(text) & everything
+            print(f"{label:>10s} {name:>10s} {estimate_tokens(text):7d} {ms:8.2f}"
+                  f" {len(got):4d}/{len(everything):<4d} missing: {', '.join(sorted(everything - got)) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare what reaches the policy pipeline when the extension sends a page's
+visible text (innerText) against extracting the policy from its HTML on
+the server: characters after clean_text, time spent downstream (clean,
+scan) and signal recall against the bare policy text.
+
+    python -m benchmarks.bench_extract
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+
+from pipeline.clean import clean_text  # type: ignore  # noqa: E402
+from pipeline.extract import extract_text, iter_html_text  # type: ignore  # noqa: E402
+from pipeline.signals import scan_policy_text  # type: ignore  # noqa: E402
+from benchmarks.corpus import POLICY_SIZES, make_policy, make_policy_html, page_text  # noqa: E402
+
+SEEDS = 5
+
+
+def found(cleaned: str) -> set:
+    signals, data = scan_policy_text(cleaned.lower())
+    return {name for name, hit in signals.items() if hit} | set(data)
+
+
+def check_recall() -> None:
+    """Everything the bare policy mentions is still found after extraction."""
+    for size in POLICY_SIZES:
+        for seed in range(SEEDS):
+            html = make_policy_html(size, seed)
+            expected = found(clean_text(make_policy(size, seed)))
+            missing = expected - found(clean_text(extract_text(html)))
+            assert not missing, (size, seed, missing)
+
+            # chunked input gives the same text
+            chunks = [html[i:i + 4096] for i in range(0, len(html), 4096)]
+            assert "".join(iter_html_text(chunks)) == extract_text(html)
+
+
+def downstream_ms(text: str) -> float:
+    best = min(timeit.repeat(lambda: scan_policy_text(clean_text(text).lower()), number=5, repeat=3))
+    return best / 5 * 1000
+
+
+def main():
+    check_recall()
+    print("signal recall: nothing the bare policy mentions is lost")
+
+    print(f"{'size':>8s} {'page chars':>11s} {'extracted':>10s} {'dropped B':>10s}"
+          f" {'page ms':>8s} {'extract ms':>10s} {'html->clean ms':>14s} {'false hits':>10s}")
+    for size in POLICY_SIZES:
+        html = make_policy_html(size)
+        page, stats = page_text(html), {}
+        extracted = extract_text(html, stats)
+        chunks = [html[i:i + 65536] for i in range(0, len(html), 65536)]
+        # as the backend runs it: parsing stops once clean_text has its budget
+        parse = min(timeit.repeat(lambda: clean_text(iter_html_text(chunks)), number=3, repeat=3)) / 3 * 1000
+        bare = found(clean_text(make_policy(size)))
+        print(f"{size:8d} {len(clean_text(page)):11d} {len(clean_text(extracted)):10d} {stats['dropped_bytes']:10d}"
+              f" {downstream_ms(page):8.2f} {downstream_ms(extracted):10.2f} {parse:14.2f}"
+              f" {len(found(clean_text(page)) - bare):5d} -> {len(found(clean_text(extracted)) - bare)}")
+
+
+if __name__ == "__main__":
+    main()
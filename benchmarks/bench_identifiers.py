@@ -0,0 +1,74 @@
+"""
+Identifier scoring for cookie jars of 10 to 5000 values: the old
+per-cookie regex check, score_identifiers() (that check below VECTOR_MIN
+values, prefiltered NumPy scoring from there), and the batched detector
+on every value (pure Python and NumPy paths). Jars are either mostly ids
+or mostly settings. Also checks that both batched paths give the same
+scores and that the prefilter never changes a decision.
+
+    python -m benchmarks.bench_identifiers
+"""
+import base64
+import random
+import re
+import timeit
+import uuid
+
+from cookie_analyzer.core.identifiers import IDENTIFIER_THRESHOLD, _score_python, _score_vectorized, score_identifiers
+
+LEGACY_UUID = re.compile(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", re.IGNORECASE)
+LEGACY_BASE64 = re.compile(r"^[A-Za-z0-9+/=]{20,}$")
+
+SETTINGS = ["true", "false", "en-US", "dark_mode_enabled", "1", "session_preferences_v2",
+            "%7B%22necessary%22%3Atrue%2C%22analytics%22%3Afalse%7D", "1697040000"]
+
+
+def make_values(n: int, seed: int = 0, id_share: float = 2 / 3) -> list[str]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        kind = rng.randrange(4) if rng.random() < id_share else 4
+        if kind == 0:
+            out.append(str(uuid.UUID(int=rng.getrandbits(128))))
+        elif kind == 1:
+            out.append(base64.b64encode(rng.randbytes(rng.randint(12, 48))).decode())
+        elif kind == 2:
+            out.append(rng.randbytes(rng.randint(8, 20)).hex())
+        elif kind == 3:
+            out.append(f"GA1.2.{rng.randint(1, 10**10)}.{rng.randint(1, 10**10)}")
+        else:
+            out.append(rng.choice(SETTINGS))
+    return out
+
+
+def legacy(values):
+    return [bool(LEGACY_UUID.match(v) or LEGACY_BASE64.match(v) or len(v) > 40) for v in values]
+
+
+def main():
+    values = make_values(20_000, seed=1)
+    full = _score_python(values)
+    assert full == _score_vectorized(values)
+    print("python and numpy scores identical")
+    decisions = [s >= IDENTIFIER_THRESHOLD for s in full]
+    assert [s >= IDENTIFIER_THRESHOLD for s in _score_vectorized(values, prefilter=True)] == decisions
+    print("prefilter keeps every decision")
+
+    for mix, id_share in (("mostly ids", 2 / 3), ("mostly settings", 1 / 6)):
+        print(mix)
+        for n in (10, 100, 1000, 2500, 5000):
+            jar = make_values(n, id_share=id_share)
+            number = max(1, 20_000 // n)
+            rows = [
+                ("legacy regex", lambda: legacy(jar)),
+                ("score_identifiers", lambda: score_identifiers(jar)),
+                ("batched python", lambda: _score_python(jar)),
+                ("batched numpy", lambda: _score_vectorized(jar)),
+            ]
+            for name, fn in rows:
+                best = min(timeit.repeat(fn, number=number, repeat=3)) / number
+                print(f"{n:5d} values  {name:17s} {best * 1e3:8.3f} ms  ({best / n * 1e6:5.2f} us/value)")
+
+
+if __name__ == "__main__":
+    main()
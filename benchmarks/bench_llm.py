@@ -0,0 +1,114 @@
+"""
+The LLM client against the fake OpenRouter server: what callers wait
+while the provider is healthy, rate limiting (429 + Retry-After), down
+(503 brownout, the breaker opens) and back (a probe closes it).
+"Unprotected" is the same client with no retries and a breaker that never
+opens, which is how every call behaved before; "protected" is also held
+to 50 calls/s, which is most of its extra wall time when healthy.
+
+    python -m benchmarks.bench_llm
+"""
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+
+from pipeline.openrouter_client import AsyncOpenRouterClient  # type: ignore  # noqa: E402
+from pipeline.resilience import LLMExecutor  # type: ignore  # noqa: E402
+from benchmarks.fake_openrouter import create_app, serve_in_thread, set_state  # noqa: E402
+
+CALLS = 40
+CONCURRENCY = 8
+
+
+def client(base: str, protected: bool, **executor) -> AsyncOpenRouterClient:
+    if protected:
+        settings = dict(rate=50, burst=10, retries=2, backoff_base=0.05, backoff_max=0.5,
+                        failure_threshold=5, reset_timeout=1.0)
+    else:
+        settings = dict(rate=0, burst=1, retries=0, failure_threshold=10**9)
+    settings.update(executor)
+    return AsyncOpenRouterClient(base_url=f"{base}/v1/chat/completions", timeout=5,
+                                 executor=LLMExecutor(**settings))
+
+
+async def run_calls(llm: AsyncOpenRouterClient, n: int = CALLS) -> dict:
+    slots = asyncio.Semaphore(CONCURRENCY)
+    waits = []
+
+    async def one(i: int):
+        async with slots:
+            t = time.perf_counter()
+            out = await llm.write_takeaways(f"We collect your email address. Policy number {i}.")
+            waits.append(time.perf_counter() - t)
+            return out is not None
+
+    t0 = time.perf_counter()
+    answered = sum(await asyncio.gather(*(one(i) for i in range(n))))
+    waits.sort()
+    return {
+        "answered": answered,
+        "wall_s": round(time.perf_counter() - t0, 2),
+        "p50_ms": round(waits[len(waits) // 2] * 1000, 1),
+        "max_ms": round(waits[-1] * 1000, 1),
+    }
+
+
+async def scenario(base: str, name: str, state: dict):
+    for protected in (False, True):
+        set_state(base, **state)
+        before = set_state(base)["requests"]
+        llm = client(base, protected)
+        result = await run_calls(llm)
+        stats = llm.stats()
+        await llm.aclose()
+        print(f"{name:10s} {'protected' if protected else 'unprotected':12s}"
+              f" answered {result['answered']:3d}/{CALLS}  wall {result['wall_s']:6.2f}s"
+              f"  p50 {result['p50_ms']:8.1f}ms  max {result['max_ms']:8.1f}ms"
+              f"  upstream {set_state(base)['requests'] - before:4d}"
+              f"  retries {stats['retries']:3d}  short-circuited {stats['short_circuited']:3d}"
+              f"  breaker {stats['breaker']['state']}")
+
+
+async def recovery(base: str):
+    """Brownout until the breaker opens, provider back, calls resume after one probe."""
+    set_state(base, latency=0.05, fail_rate=1.0, status=503, retry_after=None)
+    llm = client(base, True, reset_timeout=0.5)
+    await run_calls(llm, 10)
+    assert llm.stats()["breaker"]["state"] == "open"
+    set_state(base, fail_rate=0.0)
+    await asyncio.sleep(0.6)
+    # half-open: one probe goes out (concurrent callers still fall back); it succeeds
+    probe = await run_calls(llm, 1)
+    result = await run_calls(llm, 10)
+    stats = llm.stats()
+    await llm.aclose()
+    print(f"recovery:  probe answered {probe['answered']}/1, breaker {stats['breaker']['state']},"
+          f" then answered {result['answered']}/10; opened {stats['breaker']['opened']} time(s)")
+    assert stats["breaker"]["state"] == "closed" and result["answered"] == 10
+
+
+async def main_async():
+    os.environ.setdefault("OPENROUTER_API_KEY", "fake")
+    base, server = serve_in_thread(create_app())
+    try:
+        await scenario(base, "healthy", dict(latency=0.05, fail_rate=0.0, retry_after=None))
+        await scenario(base, "flaky 30%", dict(latency=0.05, fail_rate=0.3, status=503, retry_after=None))
+        await scenario(base, "429", dict(latency=0.02, fail_rate=0.5, status=429, retry_after=0.1))
+        await scenario(base, "brownout", dict(latency=1.0, fail_rate=1.0, status=503, retry_after=None))
+        await recovery(base)
+    finally:
+        server.should_exit = True
+
+
+def main():
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Stored bytes and write volume of the policy store: content-addressed,
+compressed bodies against the old one-document-per-capture layout with
+inline text. Policies are synthetic variants of policy/input.json, each
+re-captured many times, as the extension does on every visit. Runs on
+mongomock; no server needed.
+
+    python -m benchmarks.bench_policy_storage
+"""
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+
+import bson
+from mongomock_motor import AsyncMongoMockClient
+
+from backend.db import POLICIES, PolicyStore
+
+ROOT = Path(__file__).resolve().parent.parent
+POLICIES_N = 50
+CAPTURES_PER_POLICY = 20
+
+
+def corpus(seed: int = 0) -> list[str]:
+    with open(ROOT / "policy" / "input.json", encoding="utf-8") as f:
+        base = json.load(f)["policy_text"]
+    paragraphs = [p for p in base.split("\n") if p.strip()]
+    rng = random.Random(seed)
+    texts = []
+    for i in range(POLICIES_N):
+        body = paragraphs[:]
+        rng.shuffle(body)
+        texts.append(f"Privacy policy of example{i}.com\n" + "\n".join(body * 4))
+    return texts
+
+
+async def collection_bytes(collection) -> int:
+    return sum([len(bson.encode(doc)) async for doc in collection.find({})])
+
+
+async def main():
+    texts = corpus()
+    captures = [(f"https://example{i}.com/privacy", text) for i, text in enumerate(texts)] * CAPTURES_PER_POLICY
+
+    old = AsyncMongoMockClient()["bench"][POLICIES]
+    t0 = time.perf_counter()
+    for url, text in captures:
+        await old.insert_one({"url": url, "text": text, "created_at": datetime.utcnow()})
+    old_s = time.perf_counter() - t0
+    old_bytes = await collection_bytes(old)
+
+    store = PolicyStore(AsyncMongoMockClient()["bench"], max_buffer=100, max_delay=0.05)
+    await store.ensure_indexes()
+    t0 = time.perf_counter()
+    for url, text in captures:
+        await store.save(url, text)
+    await store.aclose()
+    new_s = time.perf_counter() - t0
+    capture_bytes = await collection_bytes(store.policies)
+    body_bytes = await collection_bytes(store.bodies)
+
+    doc = (await store.list_recent(1))[0]
+    t0 = time.perf_counter()
+    text = (await store.get(doc["_id"]))["text"]
+    read_ms = (time.perf_counter() - t0) * 1e3
+    assert text in texts
+
+    new_bytes = capture_bytes + body_bytes
+    print(f"{len(captures)} captures of {POLICIES_N} policies ({sum(map(len, texts)) // POLICIES_N} chars each)")
+    print(f"inline text:        {old_bytes / 1e6:8.2f} MB  {old_s * 1e3:7.1f} ms")
+    print(f"content-addressed:  {new_bytes / 1e6:8.2f} MB  {new_s * 1e3:7.1f} ms"
+          f"  (captures {capture_bytes / 1e6:.2f} MB, bodies {body_bytes / 1e6:.2f} MB)")
+    print(f"reduction:          {old_bytes / new_bytes:8.1f}x")
+    print(f"bodies written {store.stats['bodies_written']}, deduplicated {store.stats['bodies_deduped']}, "
+          f"compression {store.stats['raw_bytes'] / store.stats['stored_bytes']:.1f}x")
+    print(f"lazy read of one capture: {read_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Compare split_into_sections against the pre-compiled-scanner implementation
+it replaced, on the sample policy in policy/input.json.
+
+    python -m benchmarks.bench_section
+"""
+import json
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+
+from pipeline.clean import clean_text  # type: ignore  # noqa: E402
+from pipeline.section import SECTION_MAP, split_into_sections  # type: ignore  # noqa: E402
+
+
+def legacy_split_into_sections(cleaned: str):
+    chunks = [c.strip() for c in cleaned.split("\n\n") if c.strip()]
+    out = {}
+    out["other"] = ""
+
+    for ch in chunks:
+        ch_low = ch.lower()
+        best = "other"
+        best_score = 0
+
+        for sec, pats in SECTION_MAP.items():
+            score = 0
+            for p in pats:
+                if re.search(p, ch_low):
+                    score += 1
+            if score > best_score:
+                best_score = score
+                best = sec
+
+        out[best] = (out.get(best, "") + ch + "\n\n").strip()
+    return {k: v for k, v in out.items() if v.strip()}
+
+
+def load_policy_text() -> str:
+    with open(os.path.join(ROOT, "policy", "input.json"), "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return raw.get("raw_text") or raw.get("policy_text", "")
+
+
+def corpora():
+    text = load_policy_text() * 50
+    # What run_policy_pipeline actually passes in: clean_text drops blank
+    # lines, so this is a single 120k-character chunk.
+    yield "cleaned", clean_text(text)
+    # The same text broken into one paragraph per sentence.
+    yield "paragraphs", re.sub(r"(?<=[.!?])\s*", "\n\n", text)[:120_000]
+
+
+def main():
+    for corpus, cleaned in corpora():
+        assert split_into_sections(cleaned) == legacy_split_into_sections(cleaned)
+
+        for name, fn in [("legacy", legacy_split_into_sections), ("current", split_into_sections)]:
+            best = min(timeit.repeat(lambda: fn(cleaned), number=5, repeat=5)) / 5
+            print(f"{corpus:10s} {name:8s} {len(cleaned):>7d} chars  {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare the signal / data-category scan against the implementation it
+replaced (sectioning, join + lowercase, then every pattern with re.search).
+
+    python -m benchmarks.bench_signals
+"""
+import os
+import random
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+
+from pipeline.clean import clean_text  # type: ignore  # noqa: E402
+from pipeline.section import split_into_sections  # type: ignore  # noqa: E402
+from pipeline.signals import DATA_PATTERNS, scan_policy_text  # type: ignore  # noqa: E402
+from benchmarks.bench_section import load_policy_text  # noqa: E402
+
+
+def legacy_extract_data_collected(text: str):
+    low = text.lower()
+    found = []
+    for label, pat in DATA_PATTERNS:
+        if re.search(pat, low):
+            found.append(label)
+    return sorted(set(found))
+
+
+def legacy_extract_signals(sections):
+    full = "\n".join(sections.values()).lower()
+
+    return {
+        "mentions_tracking": bool(re.search(r"(track|tracking|analytics|advertis)", full)),
+        "mentions_third_party_sharing": bool(re.search(r"(third party|share(d)? with|partners|advertis|service provider)", full)),
+        "mentions_sale_of_data": bool(re.search(r"\bsell\b|\bsale of\b", full)),
+        "mentions_retention_limit": bool(re.search(r"(retain.*\d+ (day|month|year)s?|retention period|we keep.*\d+)", full)),
+        "mentions_opt_out": bool(re.search(r"(opt[- ]out|withdraw consent|unsubscribe|do not sell)", full)),
+        "mentions_deletion_right": bool(re.search(r"(delete your data|right to delete|erasure)", full)),
+    }
+
+
+def legacy(cleaned: str):
+    return legacy_extract_signals(split_into_sections(cleaned)), legacy_extract_data_collected(cleaned)
+
+
+def current(cleaned: str):
+    return scan_policy_text(cleaned.lower())
+
+
+# A typical consumer-site policy, paraphrased; every signal and data category appears.
+TYPICAL = """Privacy Policy
+We collect information you provide directly, such as your name, email address, phone number and payment details.
+We automatically collect device information, including your IP address, browser type, user agent and approximate location.
+We use cookies and similar tracking technologies for analytics and advertising purposes.
+We may share your personal data with service providers, advertising partners and affiliates.
+We do not sell your personal information. You can opt out of targeted advertising at any time.
+We retain your data for as long as your account is active and for 30 days thereafter.
+You have the right to access, correct or request erasure of your data. To delete your data, contact us.
+Security: we use encryption and other safeguards to protect your information.
+"""
+
+
+def corpora():
+    yield "sample", clean_text((load_policy_text() + "\n") * 50)
+    yield "typical", clean_text(TYPICAL * 200)
+    # Text pasted from a PDF often arrives as one enormous line; "retain"
+    # with no duration after it is the old regex's worst case.
+    yield "one-line", clean_text(" ".join(["we may retain records as required by law."] * 2500))
+
+
+def check_identical(rounds: int = 3000) -> None:
+    words = TYPICAL.replace("\n", " \n ").split(" ") + ["sell", "sale of", "we keep", "12", "months", "retention period"]
+    rng = random.Random(3)
+    for _ in range(rounds):
+        text = clean_text(" ".join(rng.choice(words) for _ in range(rng.randint(0, 80))))
+        assert current(text) == legacy(text), text
+
+
+def main():
+    check_identical()
+    print("results identical to legacy scan")
+
+    for corpus, cleaned in corpora():
+        assert current(cleaned) == legacy(cleaned)
+        for name, fn in [("legacy", legacy), ("current", current)]:
+            number = 1 if (corpus, name) == ("one-line", "legacy") else 5
+            best = min(timeit.repeat(lambda: fn(cleaned), number=number, repeat=3)) / number
+            print(f"{corpus:9s} {name:8s} {len(cleaned):>7d} chars  {best * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+Shared setup for the pytest-benchmark suites (benchmarks/suite_*.py).
+
+    pytest benchmarks                       # run, save JSON to benchmarks/results
+    pytest benchmarks --benchmark-compare   # also compare with the last saved run
+    pytest benchmarks -k cookies            # one suite
+
+Saved runs carry the commit they measured, so
+`pytest-benchmark --storage benchmarks/results compare` lines up runs
+across commits. The LLM is never called: OPENROUTER_API_KEY is cleared.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+if POLICY_SRC not in sys.path:
+    sys.path.insert(0, POLICY_SRC)
+os.environ.pop("OPENROUTER_API_KEY", None)
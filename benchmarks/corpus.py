@@ -0,0 +1,384 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+The same (size, seed) always gives byte-identical output, on any machine
+and Python version (only random.Random's documented-stable methods are
+used), so timings can be compared across commits.
+
+- policies of roughly POLICY_SIZES bytes: headed sections built from the
+  phrasing real policies use (collection, sharing, tracking, retention,
+  rights, children, contact), with the navigation lines, repeated footers
+  and ragged whitespace clean_text has to deal with
+- cookie jars of COOKIE_JAR_SIZES cookies, shaped like CookieReq: about
+  half first-party, third-party cookies drawn from a long-tailed (Zipf)
+  distribution over ad/analytics domains plus a tail of one-off hosts, and
+  values mixing identifiers, timestamps and flags
+- policy pages: the same policy as the HTML a browser would fetch, inside
+  a site header, menus, a consent banner, a sidebar and a footer
+- PDF policies of PDF_PAGES pages: the same policy text laid out as plain
+  text pages, in a minimal PDF written by hand (no PDF library needed)
+
+Write a corpus to disk (one JSON file per input) with
+
+    python -m benchmarks.corpus --out /tmp/corpus
+"""
+import argparse
+import json
+import os
+import random
+import string
+from functools import lru_cache
+from itertools import accumulate
+
+POLICY_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+COOKIE_JAR_SIZES = [5, 50, 500, 5000]
+PDF_PAGES = [1, 20, 200]
+
+SECTIONS = {
+    "Information We Collect": [
+        "We collect information you provide directly, such as your name, email address and phone number.",
+        "When you use our services we automatically collect your IP address, device identifiers and browser type.",
+        "We may collect precise location data from your device if you allow it.",
+        "Payment information, including card numbers and billing address, is processed by our payment providers.",
+        "We collect usage data such as pages viewed, links clicked and the time spent on each page.",
+    ],
+    "How We Share Information": [
+        "We share personal information with service providers who process it on our behalf.",
+        "We may disclose information to advertising partners and analytics providers.",
+        "We do not sell your personal information to third parties.",
+        "In connection with a merger or acquisition, your information may be transferred to the new owner.",
+        "We may share data with affiliates and subsidiaries for the purposes described in this policy.",
+    ],
+    "Cookies and Tracking": [
+        "We and our partners use cookies, pixels and similar tracking technologies.",
+        "Analytics cookies help us understand how visitors use the site.",
+        "Advertising cookies are used to show you relevant ads across other websites.",
+        "You can manage your cookie preferences at any time through the cookie settings link.",
+    ],
+    "Data Retention": [
+        "We retain personal information for as long as necessary to provide the services.",
+        "Account data is deleted within 30 days after you close your account.",
+        "Some information may be retained for up to 7 years to meet legal obligations.",
+    ],
+    "Your Rights": [
+        "You have the right to access, correct or delete your personal information.",
+        "You may opt out of marketing emails by clicking unsubscribe in any message.",
+        "You can withdraw your consent at any time without affecting prior processing.",
+        "Residents of certain regions may request a copy of their data in a portable format.",
+    ],
+    "Children's Privacy": [
+        "Our services are not directed to children under 13 and we do not knowingly collect their data.",
+    ],
+    "Contact Us": [
+        "If you have questions about this policy, contact our data protection officer at privacy@example.com.",
+    ],
+}
+NAV = ["Home", "About", "Contact", "Login", "Sign up", "Privacy", "Terms", "Cookies"]
+FOOTER = "© 2025 Example Inc. All rights reserved."
+
+FIRST_PARTY_HOSTS = ["", "www.", "shop.", "accounts.", "cdn."]
+# Ordered by how often they show up; drawn with Zipf weights.
+TRACKER_DOMAINS = [
+    ".doubleclick.net", ".google-analytics.com", ".facebook.com", ".google.com", ".youtube.com",
+    "bat.bing.com", ".linkedin.com", ".hotjar.com", ".criteo.com", ".adnxs.com", ".scorecardresearch.com",
+    ".twitter.com", ".tiktok.com", "cdn.segment.io", ".quantserve.com", ".rubiconproject.com",
+    ".pubmatic.com", ".taboola.com", ".outbrain.com", ".amazon-adsystem.com", ".casalemedia.com",
+    ".demdex.net", ".everesttech.net", ".mathtag.com", ".rlcdn.com", ".bluekai.com", ".krxd.net",
+]
+KNOWN_NAMES = ["_ga", "_gid", "_gat", "_fbp", "IDE", "test_cookie", "_gcl_au", "MUID", "_uetsid",
+               "_hjSessionUser_123", "bcookie", "OptanonConsent", "euconsent-v2", "sessionid", "csrftoken"]
+CATEGORY_SETS = [
+    [("Essential", "Strictly necessary cookies", True), ("Analytics", "Analytics cookies", False),
+     ("Marketing", "Advertising cookies", False)],
+    [("Essential", "Essential cookies only", True), ("Analytics", "Measure site usage", True)],
+    [("Functional", "Remember your preferences", True), ("Marketing", "Personalised ads", True)],
+]
+
+_ALNUM = string.ascii_letters + string.digits
+_HEXDIGITS = "0123456789abcdef"
+
+
+# --- policies ---
+
+def _noisy(rng: random.Random, line: str) -> str:
+    r = rng.random()
+    if r < 0.1:
+        return "  " + line.replace(" ", "  \t", 2)
+    if r < 0.15:
+        return line + "\r"
+    return line
+
+
+def make_policy(size: int, seed: int = 0) -> str:
+    """A policy of about `size` characters (never less)."""
+    rng = random.Random(f"policy-{size}-{seed}")
+    headings = list(SECTIONS)
+    parts = ["\n".join(NAV), "", "Privacy Policy", f"Last updated: 2025-{rng.randint(1, 12):02d}-01", ""]
+    length = sum(len(p) + 1 for p in parts)
+    while length < size:
+        heading = rng.choice(headings)
+        block = [heading]
+        for _ in range(rng.randint(1, 4)):
+            sentences = rng.sample(SECTIONS[heading], k=min(len(SECTIONS[heading]), rng.randint(1, 3)))
+            block.append(_noisy(rng, " ".join(sentences)))
+        if rng.random() < 0.2:
+            block.append(FOOTER)
+        block.append("")
+        if rng.random() < 0.2:
+            block.append("")  # runs of blank lines
+        parts.extend(block)
+        length += sum(len(p) + 1 for p in block)
+    return "\n".join(parts)
+
+
+@lru_cache(maxsize=None)
+def cached_policy(size: int, seed: int = 0) -> str:
+    return make_policy(size, seed)
+
+
+def policy_request(size: int, seed: int = 0) -> dict:
+    """A PolicyReq body."""
+    return {
+        "url": f"https://site{seed}.example.com/privacy",
+        "title": "Privacy Policy",
+        "raw_text": cached_policy(size, seed),
+    }
+
+
+# --- policy pages ---
+
+MENU = ["Products", "Pricing", "Customers", "Blog", "Careers", "Support", "Developers", "Partners"]
+DATA_ITEMS = ["Email address", "Phone number", "IP address", "Device identifiers", "Location data"]
+
+
+def _links(rng: random.Random, labels: list) -> str:
+    return "".join(f'<li><a href="/{label.lower().replace(" ", "-")}">{label}</a></li>'
+                   for label in rng.sample(labels, k=len(labels)))
+
+
+def make_policy_html(size: int, seed: int = 0) -> str:
+    """make_policy(size, seed) as a full web page: the policy text plus site chrome."""
+    from html import escape
+
+    rng = random.Random(f"page-{size}-{seed}")
+    body = []
+    for line in make_policy(size, seed).split("\n"):
+        line = line.strip()
+        if not line or line in NAV or line == FOOTER:
+            continue
+        if line == "Privacy Policy":
+            body.append("<h1>Privacy Policy</h1>")
+        elif line in SECTIONS:
+            body.append(f"<h2>{escape(line)}</h2>")
+            if line == "Information We Collect" and rng.random() < 0.5:
+                body.append("<p>Depending on how you use the services, this includes:</p>")
+                body.append("<ul>" + "".join(f"<li>{item}</li>" for item in rng.sample(DATA_ITEMS, k=3)) + "</ul>")
+        else:
+            body.append(f"<p>{escape(line)}</p>")
+
+    return "\n".join([
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Privacy Policy</title>",
+        "<style>body{font-family:sans-serif}.menu li{display:inline}</style>",
+        "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}</script>",
+        "</head><body>",
+        f'<header><div class="logo"><a href="/">Example</a></div><nav><ul class="menu">{_links(rng, NAV + MENU)}</ul></nav></header>',
+        '<div id="onetrust-banner-sdk"><p>We use cookies to give you the best experience, '
+        'analyse traffic and personalise ads. By clicking "Accept all" you agree to our use of cookies.</p>'
+        "<button>Accept all</button><button>Reject all</button><a href=\"#\">Cookie settings</a></div>",
+        '<div class="breadcrumbs"><a href="/">Home</a> › <a href="/legal">Legal</a> › Privacy</div>',
+        "<main><article>",
+        *body,
+        "</article></main>",
+        f'<div class="sidebar"><h3>Related</h3><ul>{_links(rng, ["Terms of Service", "Cookie Policy", "Security", "Accessibility"])}</ul></div>',
+        '<div class="newsletter"><h3>Stay in the loop</h3><p>Get product news once a month.</p></div>',
+        f'<footer><ul>{_links(rng, MENU)}</ul><p>{escape(FOOTER)}</p></footer>',
+        "</body></html>",
+    ])
+
+
+@lru_cache(maxsize=None)
+def cached_policy_html(size: int, seed: int = 0) -> str:
+    return make_policy_html(size, seed)
+
+
+def page_text(html: str) -> str:
+    """What the extension used to send for a page: every visible line of it (innerText)."""
+    from html.parser import HTMLParser
+
+    class _Text(HTMLParser):
+        def __init__(self):
+            super().__init__()
+            self.parts, self.hidden = [], 0
+
+        def handle_starttag(self, tag, attrs):
+            self.hidden += tag in ("script", "style", "head")
+            if tag in ("p", "li", "h1", "h2", "h3", "div", "br", "ul", "header", "footer"):
+                self.parts.append("\n")
+
+        def handle_endtag(self, tag):
+            self.hidden -= tag in ("script", "style", "head")
+
+        def handle_data(self, data):
+            if not self.hidden:
+                self.parts.append(data)
+
+    parser = _Text()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+
+# --- PDF policies ---
+
+LINES_PER_PAGE = 50
+LINE_WIDTH = 90
+
+
+def _pdf_string(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _pdf_lines(text: str) -> list:
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        while len(line) > LINE_WIDTH:
+            cut = line.rfind(" ", 0, LINE_WIDTH)
+            cut = cut if cut > 0 else LINE_WIDTH
+            lines.append(line[:cut])
+            line = line[cut:].lstrip()
+        lines.append(line)
+    return lines
+
+
+def make_pdf(pages: int, seed: int = 0) -> bytes:
+    """A policy PDF of exactly `pages` text pages (Helvetica, uncompressed streams)."""
+    lines = _pdf_lines(make_policy(pages * LINES_PER_PAGE * LINE_WIDTH, seed))
+    first_page = 4  # objects 1-3: catalog, page tree, font
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{first_page + 2 * i} 0 R" for i in range(pages)), pages),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i in range(pages):
+        chunk = lines[i * LINES_PER_PAGE:(i + 1) * LINES_PER_PAGE]
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"] + [f"{_pdf_string(ln)} Tj T*" for ln in chunk] + ["ET"]
+        stream = "\n".join(ops)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {first_page + 2 * i + 1} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{off:010d} 00000 n \n" for off in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+@lru_cache(maxsize=None)
+def cached_pdf(pages: int, seed: int = 0) -> bytes:
+    return make_pdf(pages, seed)
+
+
+# --- cookie jars ---
+
+def _value(rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.2:
+        return "".join(rng.choice(_HEXDIGITS) for _ in range(32))
+    if r < 0.3:
+        h = "".join(rng.choice(_HEXDIGITS) for _ in range(32))
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    if r < 0.4:
+        return f"GA1.2.{rng.randint(10**8, 10**9)}.{rng.randint(1_600_000_000, 1_750_000_000)}"
+    if r < 0.55:
+        return str(rng.randint(1_600_000_000_000, 1_750_000_000_000))
+    if r < 0.75:
+        return rng.choice(["0", "1", "true", "false", "en-US", "dark", "yes"])
+    if r < 0.9:
+        return "".join(rng.choice(_ALNUM) for _ in range(rng.randint(8, 64)))
+    return ""
+
+
+def make_cookie_jar(n: int, seed: int = 0) -> dict:
+    """A CookieReq body with `n` cookies."""
+    rng = random.Random(f"cookies-{n}-{seed}")
+    site = f"site{seed}.example.com" if seed % 3 else f"shop{seed}.co.uk"
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(TRACKER_DOMAINS) + 1)))
+
+    cookies = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.5:
+            domain = rng.choice(FIRST_PARTY_HOSTS) + site
+            if rng.random() < 0.5:
+                domain = "." + domain.lstrip(".")
+        elif r < 0.9:
+            domain = rng.choices(TRACKER_DOMAINS, cum_weights=cum_weights)[0]
+        else:
+            domain = f"t{rng.randint(0, 10 * n)}.{rng.choice(['net', 'com', 'io'])}"
+        name = rng.choice(KNOWN_NAMES) if rng.random() < 0.3 else f"c{i}_{rng.choice(_ALNUM)}"
+        cookies.append({
+            "name": name,
+            "domain": domain,
+            "expiry_days": rng.choice([0, 0, 1, 7, 30, 90, 180, 365, 395, 730]),
+            "secure": rng.random() < 0.7,
+            "sameSite": rng.choice(["lax", "strict", "no_restriction", "unspecified"]),
+            "value": _value(rng),
+        })
+
+    categories = rng.choice(CATEGORY_SETS)
+    return {
+        "site_domain": site,
+        "cookies": cookies,
+        "consent_ui": {
+            "accept_clicks": 1,
+            "reject_clicks": rng.choice([1, 2, 3]),
+            "manage_preferences_visible": rng.random() < 0.8,
+            "consent_required_to_proceed": rng.random() < 0.2,
+            "categories": [
+                {"label": label, "description": description, "prechecked": prechecked}
+                for label, description, prechecked in categories
+            ],
+        },
+        "cmp_detected": rng.choice(["onetrust", "cookiebot", "didomi", "unknown"]),
+    }
+
+
+@lru_cache(maxsize=None)
+def cached_cookie_jar(n: int, seed: int = 0) -> dict:
+    """Shared between benchmarks; do not mutate."""
+    return make_cookie_jar(n, seed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write the synthetic benchmark corpus")
+    ap.add_argument("--out", required=True, help="Output directory")
+    ap.add_argument("--seeds", type=int, default=1, help="Inputs per size")
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for seed in range(args.seeds):
+        for size in POLICY_SIZES:
+            with open(os.path.join(args.out, f"policy-{size}-{seed}.json"), "w", encoding="utf-8") as f:
+                json.dump(policy_request(size, seed), f)
+        for n in COOKIE_JAR_SIZES:
+            with open(os.path.join(args.out, f"cookies-{n}-{seed}.json"), "w", encoding="utf-8") as f:
+                json.dump(make_cookie_jar(n, seed), f)
+        for pages in PDF_PAGES:
+            with open(os.path.join(args.out, f"policy-{pages}p-{seed}.pdf"), "wb") as f:
+                f.write(make_pdf(pages, seed))
+    print(f"Wrote {args.seeds * (len(POLICY_SIZES) + len(COOKIE_JAR_SIZES) + len(PDF_PAGES))} inputs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+A local stand-in for the OpenRouter chat completions API, for exercising
+the LLM client without a key, network or cost.
+
+    python -m benchmarks.fake_openrouter --port 8099 --latency 0.2 --fail-rate 0.3
+    OPENROUTER_URL=http://127.0.0.1:8099/v1/chat/completions OPENROUTER_API_KEY=x uvicorn backend.app:app
+
+Every request waits `latency` seconds, then fails with `status` (plus a
+Retry-After header if `retry_after` is set) with probability `fail_rate`,
+and otherwise answers with a fixed takeaways JSON. GET /_state shows the
+settings and counts; POST /_state with any of the settings changes them
+while it runs, so a script can start and end a brownout.
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+ANSWER = {
+    "summary_simple": "The site collects contact and device data and shares it with partners.",
+    "key_takeaways": ["Collects email and IP address", "Shares data with advertisers"],
+    "risks": ["Third-party sharing"],
+    "red_flags": [],
+}
+
+
+def create_app(latency: float = 0.0, fail_rate: float = 0.0, status: int = 503, retry_after=None, seed: int = 0):
+    app = FastAPI()
+    state = {"latency": latency, "fail_rate": fail_rate, "status": status, "retry_after": retry_after}
+    counts = {"requests": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+    rng = random.Random(seed)
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        await request.body()
+        counts["requests"] += 1
+        counts["in_flight"] += 1
+        counts["max_in_flight"] = max(counts["max_in_flight"], counts["in_flight"])
+        try:
+            await asyncio.sleep(state["latency"])
+        finally:
+            counts["in_flight"] -= 1
+        if rng.random() < state["fail_rate"]:
+            counts["failed"] += 1
+            headers = {"Retry-After": str(state["retry_after"])} if state["retry_after"] is not None else {}
+            return JSONResponse({"error": {"message": "fake failure"}}, status_code=state["status"], headers=headers)
+        return {"choices": [{"message": {"role": "assistant", "content": json.dumps(ANSWER)}}]}
+
+    @app.get("/_state")
+    def get_state():
+        return {**state, **counts}
+
+    @app.post("/_state")
+    async def set_state(request: Request):
+        state.update({k: v for k, v in (await request.json()).items() if k in state})
+        return {**state, **counts}
+
+    return app
+
+
+def serve_in_thread(app, port: int = 0) -> Tuple[str, "object"]:
+    """Run `app` on 127.0.0.1 in a daemon thread; returns (base URL, uvicorn server)."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}", server
+
+
+def set_state(base: str, **changes) -> Dict:
+    import httpx
+
+    return httpx.post(f"{base}/_state", json=changes).json()
+
+
+def main():
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description="Fake OpenRouter chat completions server")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency", type=float, default=0.0, help="Seconds before every answer")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests that fail")
+    ap.add_argument("--status", type=int, default=503, help="Status code of a failure")
+    ap.add_argument("--retry-after", type=float, help="Retry-After seconds sent with failures")
+    args = ap.parse_args()
+    uvicorn.run(create_app(args.latency, args.fail_rate, args.status, args.retry_after), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cold-start cost of the backend and both CLIs, from `python -X importtime`,
+saved as JSON per commit so runs can be diffed.
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --compare benchmarks/results/importtime-<old>.json
+
+Each entry point is imported in a fresh interpreter --runs times; the
+median run is reported with its slowest imports. Only importing is
+measured: work done on first use (pipelines, tables, numpy) is not.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from benchmarks.throughput import RESULTS_DIR, ROOT, _commit
+
+# name -> (module, working directory it is run from)
+TARGETS = {
+    "backend": ("backend.app", ROOT),
+    "cookie_cli": ("cookie_analyzer.main", ROOT),
+    "policy_cli": ("src.main", os.path.join(ROOT, "policy")),
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, depth, self µs, cumulative µs) per `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # 0 = imported by the -c statement
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_profile(module: str, cwd: str, top: int = 10) -> Dict:
+    """Import `module` in a fresh interpreter: wall time, its import time and the slowest imports."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - t0
+    rows = parse_importtime(proc.stderr)
+    end = next(i for i, (name, depth, _, _) in enumerate(rows) if name == module and depth == 0)
+    # a module's imports are listed right before it; interpreter startup (site) comes first
+    start = max((i + 1 for i in range(end) if rows[i][1] == 0), default=0)
+    subtree = rows[start:end]
+    return {
+        "wall_ms": round(wall * 1e3, 2),
+        "import_ms": round(rows[end][3] / 1e3, 2),
+        "modules": len(subtree) + 1,
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1e3, 2)}
+            for name, _, _, cumulative in sorted(subtree, key=lambda r: -r[3])[:top]
+        ],
+    }
+
+
+def run(args) -> Dict:
+    results = {}
+    for name, (module, cwd) in TARGETS.items():
+        if args.only and name not in args.only:
+            continue
+        import_profile(module, cwd)  # warm the OS file cache and the .pyc files
+        runs = [import_profile(module, cwd) for _ in range(args.runs)]
+        median = sorted(runs, key=lambda r: r["import_ms"])[len(runs) // 2]
+        results[name] = {
+            "module": module,
+            **median,
+            "import_ms_stdev": round(statistics.pstdev(r["import_ms"] for r in runs), 2),
+        }
+        print(f"{name:12s} import {median['import_ms']:8.1f} ms  process {median['wall_ms']:8.1f} ms"
+              f"  ({median['modules']} modules)", file=sys.stderr)
+
+    return {
+        "commit": _commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "runs": args.runs,
+        "targets": results,
+    }
+
+
+def compare(old: Dict, new: Dict) -> None:
+    print(f"{'target':12s} {old['commit']:>10s} {new['commit']:>10s}   change", file=sys.stderr)
+    for name, now in new["targets"].items():
+        before = old["targets"].get(name)
+        if before:
+            change = (now["import_ms"] - before["import_ms"]) / before["import_ms"] * 100
+            print(f"{name:12s} {before['import_ms']:10.1f} {now['import_ms']:10.1f}   {change:+6.1f}%",
+                  file=sys.stderr)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold-start import time of the entry points")
+    ap.add_argument("--runs", type=int, default=7, help="Fresh interpreters per target")
+    ap.add_argument("--only", nargs="*", help="Target names to run")
+    ap.add_argument("--out", help="Result file (default: benchmarks/results/importtime-<commit>.json)")
+    ap.add_argument("--compare", help="Earlier result file to compare with")
+    args = ap.parse_args()
+
+    result = run(args)
+    out = args.out or os.path.join(RESULTS_DIR, f"importtime-{result['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Wrote {out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
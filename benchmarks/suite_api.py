@@ -0,0 +1,109 @@
+"""End-to-end FastAPI requests through the ASGI stack (no network)."""
+import gzip
+import hashlib
+import itertools
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.corpus import (
+    PDF_PAGES, cached_cookie_jar, cached_pdf, cached_policy, cached_policy_html, policy_request,
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    from backend.app import app
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("n", [5, 50, 500], ids=lambda n: f"{n}cookies")
+def test_cookies_analyze(benchmark, client, n):
+    benchmark.group = "api /cookies/analyze"
+    body = cached_cookie_jar(n)
+    benchmark(lambda: client.post("/cookies/analyze", json=body).raise_for_status())
+
+
+@pytest.mark.parametrize("size", [10_000, 100_000], ids=lambda s: f"{s // 1000}kb")
+def test_policy_analyze(benchmark, client, size):
+    # a new text every call, so the result cache never answers
+    benchmark.group = "api /policy/analyze"
+    text = cached_policy(size)
+    counter = itertools.count()
+
+    def post():
+        i = next(counter)
+        body = {"url": f"https://site{i}.example.com/privacy", "raw_text": f"{text}\nRevision {i}."}
+        client.post("/policy/analyze", json=body).raise_for_status()
+
+    benchmark(post)
+
+
+def test_policy_hash_hit(benchmark, client):
+    # a repeat visit: only the hash goes over the wire
+    benchmark.group = "api /policy/analyze repeat visit"
+    body = policy_request(100_000)
+    client.post("/policy/analyze", json=body).raise_for_status()
+    check = {"url": body["url"], "content_hash": hashlib.sha256(body["raw_text"].encode("utf-8")).hexdigest()}
+    assert client.post("/policy/analyze/hash", json=check).json()["status"] == "hit"
+    benchmark(lambda: client.post("/policy/analyze/hash", json=check).raise_for_status())
+
+
+def test_policy_full_upload_repeat(benchmark, client):
+    benchmark.group = "api /policy/analyze repeat visit"
+    body = policy_request(100_000)
+    benchmark(lambda: client.post("/policy/analyze", json=body).raise_for_status())
+
+
+def test_policy_gzip_upload(benchmark, client):
+    benchmark.group = "api /policy/analyze"
+    text = cached_policy(100_000)
+    counter = itertools.count()
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+    def post():
+        i = next(counter)
+        body = {"url": f"https://gz{i}.example.com/privacy", "raw_text": f"{text}\nRevision {i}."}
+        client.post("/policy/analyze", content=gzip.compress(json.dumps(body).encode()), headers=headers).raise_for_status()
+
+    benchmark(post)
+
+
+def test_policy_html(benchmark, client):
+    benchmark.group = "api /policy/analyze/html"
+    body = cached_policy_html(100_000).encode()
+    counter = itertools.count()
+
+    def post():
+        url = f"https://html{next(counter)}.example.com/privacy"
+        client.post("/policy/analyze/html", params={"url": url}, content=body,
+                    headers={"Content-Type": "text/html; charset=utf-8"}).raise_for_status()
+
+    benchmark(post)
+
+
+@pytest.mark.parametrize("pages", PDF_PAGES, ids=lambda n: f"{n}pages")
+def test_policy_pdf(benchmark, client, pages):
+    # new URL every call, so the snapshot never answers and the file is parsed
+    benchmark.group = "api /policy/analyze/pdf"
+    body = cached_pdf(pages)
+    counter = itertools.count()
+
+    def post():
+        url = f"https://pdf{next(counter)}.example.com/privacy.pdf"
+        client.post("/policy/analyze/pdf", params={"url": url}, content=body,
+                    headers={"Content-Type": "application/pdf"}).raise_for_status()
+
+    benchmark(post)
+
+
+def test_cookies_bulk(benchmark, client):
+    benchmark.group = "api /cookies/analyze/bulk"
+    body = "\n".join(json.dumps(cached_cookie_jar(n, seed)) for seed in range(50) for n in (5, 50)).encode()
+    benchmark.pedantic(
+        lambda: client.post("/cookies/analyze/bulk", content=body).raise_for_status(),
+        rounds=5,
+        warmup_rounds=1,
+    )
@@ -0,0 +1,23 @@
+"""analyze_cookie_usage on synthetic jars of 5 - 5000 cookies."""
+import pytest
+
+from benchmarks.corpus import COOKIE_JAR_SIZES, cached_cookie_jar
+from cookie_analyzer.core.engine import analyze_cookie_usage
+from cookie_analyzer.core.normalizer import normalize_input
+
+jars = pytest.mark.parametrize("n", COOKIE_JAR_SIZES, ids=lambda n: f"{n}cookies")
+
+
+@jars
+def test_analyze_cookie_usage(benchmark, n):
+    benchmark.group = "analyze_cookie_usage"
+    data = normalize_input(cached_cookie_jar(n))
+    benchmark(analyze_cookie_usage, data)
+
+
+@jars
+def test_normalize_and_analyze(benchmark, n):
+    # what the bulk endpoint does per line after json.loads
+    benchmark.group = "normalize_and_analyze"
+    raw = cached_cookie_jar(n)
+    benchmark(lambda: analyze_cookie_usage(normalize_input(raw)))
@@ -0,0 +1,76 @@
+"""Policy pipeline stages on 1 KB - 1 MB synthetic policies."""
+import pytest
+
+from benchmarks.corpus import POLICY_SIZES, cached_policy, cached_policy_html
+from pipeline.clean import clean_text  # type: ignore
+from pipeline.context import _packed, pack_context  # type: ignore
+from pipeline.extract import iter_html_text  # type: ignore
+from pipeline.run_pipeline import run_policy_pipeline  # type: ignore
+from pipeline.score import score_policy  # type: ignore
+from pipeline.section import split_into_sections  # type: ignore
+from pipeline.signals import extract_data_collected, extract_signals, scan_policy_text  # type: ignore
+from pipeline.types import PolicyInput  # type: ignore
+
+sizes = pytest.mark.parametrize("size", POLICY_SIZES, ids=lambda s: f"{s // 1000}kb")
+
+
+@sizes
+def test_clean_text(benchmark, size):
+    benchmark.group = "clean_text"
+    raw = cached_policy(size)
+    benchmark(clean_text, raw)
+
+
+@sizes
+def test_extract_html(benchmark, size):
+    # page HTML -> clean text, as /policy/analyze/html runs it
+    benchmark.group = "extract_html"
+    html = cached_policy_html(size)
+    chunks = [html[i:i + 65536] for i in range(0, len(html), 65536)]
+    benchmark(lambda: clean_text(iter_html_text(chunks)))
+
+
+@sizes
+def test_split_into_sections(benchmark, size):
+    benchmark.group = "split_into_sections"
+    cleaned = clean_text(cached_policy(size))
+    benchmark(split_into_sections, cleaned)
+
+
+@sizes
+def test_extract_signals(benchmark, size):
+    benchmark.group = "extract_signals"
+    sections = split_into_sections(clean_text(cached_policy(size)))
+    benchmark(extract_signals, sections)
+
+
+@sizes
+def test_scan_policy_text(benchmark, size):
+    # what the pipeline runs in place of sections + extract_signals
+    benchmark.group = "scan_policy_text"
+    low = clean_text(cached_policy(size)).lower()
+    benchmark(scan_policy_text, low)
+
+
+@sizes
+def test_pack_context(benchmark, size):
+    # the uncached path: clear the packed-context cache every round
+    benchmark.group = "pack_context"
+    cleaned = clean_text(cached_policy(size))
+    benchmark(lambda: (_packed.clear(), pack_context(cleaned)))
+
+
+@sizes
+def test_score_policy(benchmark, size):
+    benchmark.group = "score_policy"
+    cleaned = clean_text(cached_policy(size))
+    signals = extract_signals(split_into_sections(cleaned))
+    data_collected = extract_data_collected(cleaned)
+    benchmark(score_policy, signals, data_collected)
+
+
+@sizes
+def test_run_policy_pipeline(benchmark, size):
+    benchmark.group = "run_policy_pipeline"
+    inp = PolicyInput(url="https://example.com/privacy", title="Privacy", raw_text=cached_policy(size))
+    benchmark(run_policy_pipeline, inp)
@@ -0,0 +1,14 @@
+"""Cold start: a fresh interpreter importing each entry point (python -X importtime)."""
+import pytest
+
+from benchmarks.importtime import TARGETS, import_profile
+
+
+@pytest.mark.parametrize("name", list(TARGETS))
+def test_cold_import(benchmark, name):
+    benchmark.group = "startup import"
+    module, cwd = TARGETS[name]
+    profile = benchmark.pedantic(lambda: import_profile(module, cwd), rounds=5, warmup_rounds=1)
+    # the benchmark times the whole process; this is the import alone
+    benchmark.extra_info["import_ms"] = profile["import_ms"]
+    benchmark.extra_info["slowest"] = profile["slowest"][:5]
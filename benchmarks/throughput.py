@@ -0,0 +1,151 @@
+"""
+Requests/sec and latency of the backend endpoints under concurrent load,
+saved as JSON per commit so runs can be diffed.
+
+    python -m benchmarks.throughput                       # in-process (ASGI)
+    python -m benchmarks.throughput --url http://localhost:8000
+    python -m benchmarks.throughput --compare benchmarks/results/throughput-<old>.json
+
+In-process runs skip the network and uvicorn, so they measure the app
+alone; --url measures a real deployment (start it without OPENROUTER_API_KEY
+to keep the LLM out of the numbers).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.corpus import cached_cookie_jar, cached_policy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def scenarios():
+    """name -> (method, path, body factory); factories get the request number."""
+    policy_10k = cached_policy(10_000)
+    bulk = "\n".join(json.dumps(cached_cookie_jar(50, seed)) for seed in range(100)).encode()
+    return {
+        "cookies_5": ("/cookies/analyze", lambda i: {"json": cached_cookie_jar(5)}),
+        "cookies_50": ("/cookies/analyze", lambda i: {"json": cached_cookie_jar(50)}),
+        "cookies_500": ("/cookies/analyze", lambda i: {"json": cached_cookie_jar(500)}),
+        # distinct texts, so every request misses the result cache
+        "policy_10kb_miss": ("/policy/analyze", lambda i: {"json": {
+            "url": f"https://site{i}.example.com/privacy", "raw_text": f"{policy_10k}\nRevision {i}.",
+        }}),
+        "policy_10kb_hit": ("/policy/analyze", lambda i: {"json": {
+            "url": "https://site0.example.com/privacy", "raw_text": policy_10k,
+        }}),
+        "cookies_bulk_100": ("/cookies/analyze/bulk", lambda i: {"content": bulk}),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, path: str, body, requests: int, concurrency: int) -> dict:
+    counter = itertools.count()
+    latencies = []
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            t0 = time.perf_counter()
+            resp = await client.post(path, **body(i))
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+
+    await client.post(path, **body(-1))  # warm-up
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - t0
+
+    latencies.sort()
+    pct = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e3, 3)  # noqa: E731
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "rps": round(requests / seconds, 1),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+async def run(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        sys.path.insert(0, os.path.join(ROOT, "policy", "src"))
+        os.environ.pop("OPENROUTER_API_KEY", None)
+        from backend.app import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    results = {}
+    async with client:
+        for name, (path, body) in scenarios().items():
+            if args.only and name not in args.only:
+                continue
+            requests = max(1, args.requests // 20) if "bulk" in name else args.requests
+            results[name] = await run_scenario(client, path, body, requests, args.concurrency)
+            print(f"{name:20s} {results[name]['rps']:10.1f} req/s  p50 {results[name]['p50_ms']:8.2f} ms"
+                  f"  p95 {results[name]['p95_ms']:8.2f} ms", file=sys.stderr)
+
+    return {
+        "commit": _commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": args.url or "in-process",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "scenarios": results,
+    }
+
+
+def compare(old: dict, new: dict) -> None:
+    print(f"{'scenario':20s} {old['commit']:>10s} {new['commit']:>10s}   change", file=sys.stderr)
+    for name, now in new["scenarios"].items():
+        before = old["scenarios"].get(name)
+        if before:
+            change = (now["rps"] - before["rps"]) / before["rps"] * 100
+            print(f"{name:20s} {before['rps']:10.1f} {now['rps']:10.1f}   {change:+6.1f}%", file=sys.stderr)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backend throughput benchmark")
+    ap.add_argument("--url", help="Base URL of a running backend (default: in-process)")
+    ap.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--only", nargs="*", help="Scenario names to run")
+    ap.add_argument("--out", help="Result file (default: benchmarks/results/throughput-<commit>.json)")
+    ap.add_argument("--compare", help="Earlier result file to compare with")
+    args = ap.parse_args()
+
+    result = asyncio.run(run(args))
+    out = args.out or os.path.join(RESULTS_DIR, f"throughput-{result['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Wrote {out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
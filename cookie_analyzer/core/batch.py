@@ -0,0 +1,148 @@
+"""
+Bulk cookie analysis: NDJSON in, NDJSON out, fanned out over a process pool.
+
+Lines are parsed, normalized and analyzed inside the workers, in chunks, so
+the parent process only moves raw lines out and encoded lines back. Results
+come back in input order and at most `window` chunks are in flight. Cookie
+values of a whole chunk are scored for identifiers in one batched call.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+from cookie_analyzer.core.engine import analyze_cookie_usage
+from cookie_analyzer.core.identifiers import score_identifiers
+from cookie_analyzer.core.normalizer import normalize_input
+from cookie_analyzer.core.schemas import CookieAnalyzerInput
+
+Line = Union[str, bytes]
+
+
+_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def _error(e: Exception) -> Dict[str, Any]:
+    return {"error": f"{type(e).__name__}: {e}"}
+
+
+def _parse_line(line: Line) -> Union[CookieAnalyzerInput, Dict[str, Any]]:
+    try:
+        return normalize_input(json.loads(line))
+    except _ERRORS as e:
+        return _error(e)
+
+
+def analyze_line(line: Line) -> Dict[str, Any]:
+    data = _parse_line(line)
+    if isinstance(data, dict):
+        return data
+    try:
+        return analyze_cookie_usage(data)
+    except _ERRORS as e:
+        return _error(e)
+
+
+def _analyze_chunk(start: int, lines: List[Line]) -> List[str]:
+    """Worker entry point: analyze a chunk and return encoded NDJSON lines."""
+    parsed = [_parse_line(line) for line in lines]
+    scores = score_identifiers([
+        c.value for data in parsed if not isinstance(data, dict) for c in data.cookies
+    ])
+
+    out = []
+    offset = 0
+    for i, data in enumerate(parsed):
+        if isinstance(data, dict):
+            result = data
+        else:
+            n = len(data.cookies)
+            try:
+                result = analyze_cookie_usage(
+                    data, features={"identifier_scores": scores[offset:offset + n]}
+                )
+            except _ERRORS as e:
+                result = _error(e)
+            offset += n
+        result["index"] = start + i
+        out.append(json.dumps(result))
+    return out
+
+
+def _chunks(lines: Iterable[Line], size: int) -> Iterator[tuple[int, List[Line]]]:
+    it = (ln for ln in lines if ln.strip())
+    start = 0
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _finish(stats: Optional[dict], sites: int, started: float) -> None:
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats["sites"] = sites
+    stats["seconds"] = round(elapsed, 3)
+    stats["sites_per_sec"] = round(sites / elapsed, 2) if elapsed > 0 else 0.0
+
+
+def iter_bulk(
+    lines: Iterable[Line],
+    executor: Executor,
+    chunk_size: int = 64,
+    window: int = 32,
+    stats: Optional[dict] = None,
+) -> Iterator[str]:
+    """Yield one encoded result per non-blank input line, in order."""
+    started = time.perf_counter()
+    pending: deque = deque()
+    sites = 0
+
+    for start, chunk in _chunks(lines, chunk_size):
+        pending.append(executor.submit(_analyze_chunk, start, chunk))
+        while len(pending) >= window or (pending and pending[0].done()):
+            done = pending.popleft().result()
+            sites += len(done)
+            yield from done
+
+    while pending:
+        done = pending.popleft().result()
+        sites += len(done)
+        yield from done
+
+    _finish(stats, sites, started)
+
+
+async def aiter_bulk(
+    lines: Iterable[Line],
+    executor: Executor,
+    chunk_size: int = 64,
+    window: int = 32,
+    stats: Optional[dict] = None,
+) -> AsyncIterator[str]:
+    """iter_bulk for use inside an event loop."""
+    started = time.perf_counter()
+    pending: deque = deque()
+    sites = 0
+
+    for start, chunk in _chunks(lines, chunk_size):
+        pending.append(asyncio.wrap_future(executor.submit(_analyze_chunk, start, chunk)))
+        while len(pending) >= window or (pending and pending[0].done()):
+            done = await pending.popleft()
+            sites += len(done)
+            for line in done:
+                yield line
+
+    while pending:
+        done = await pending.popleft()
+        sites += len(done)
+        for line in done:
+            yield line
+
+    _finish(stats, sites, started)
@@ -0,0 +1,114 @@
+"""
+Registrable-domain (eTLD+1) lookup backed by the Public Suffix List.
+
+The bundled list (cookie_analyzer/data/public_suffix_list.dat, or the file
+named by COOKIE_PSL_PATH) is loaded once into a trie keyed by reversed
+labels, so resolving a host walks at most one node per label. Results are
+memoized in a bounded LRU (COOKIE_DOMAIN_CACHE_SIZE, default 65536): the
+same tracker domains show up on most sites.
+
+Call suffix_trie() before forking worker processes to share the loaded
+trie with them.
+"""
+import ipaddress
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable
+
+PSL_PATH = Path(__file__).resolve().parent.parent / "data" / "public_suffix_list.dat"
+
+# Node keys that cannot be DNS labels.
+_RULE = "."        # a rule ends at this node
+_EXCEPTION = "!"   # an exception rule ends at this node
+
+Trie = Dict[str, "Trie"]
+
+
+def _rule_forms(rule: str) -> Iterable[str]:
+    yield rule
+    # Cookie domains arrive in ASCII (punycode) form.
+    try:
+        ascii_rule = rule.encode("idna").decode("ascii")
+    except UnicodeError:
+        return
+    if ascii_rule != rule:
+        yield ascii_rule
+
+
+def build_trie(lines: Iterable[str]) -> Trie:
+    root: Trie = {}
+    for line in lines:
+        rule = line.split(None, 1)[0] if line.strip() else ""
+        if not rule or rule.startswith("//"):
+            continue
+        exception = rule.startswith("!")
+        for form in _rule_forms(rule.lstrip("!").lower()):
+            node = root
+            for label in reversed(form.split(".")):
+                node = node.setdefault(label, {})
+            node[_EXCEPTION if exception else _RULE] = {}
+    return root
+
+
+@lru_cache(maxsize=None)
+def suffix_trie() -> Trie:
+    path = os.getenv("COOKIE_PSL_PATH") or PSL_PATH
+    with open(path, encoding="utf-8") as f:
+        return build_trie(f)
+
+
+def public_suffix_labels(labels: list, trie: Trie) -> int:
+    """
+    Number of trailing labels of `labels` that form the public suffix,
+    following the PSL algorithm: an exception rule wins, otherwise the
+    longest matching rule, otherwise the implicit "*" rule (one label).
+    """
+    n = 1
+    node = trie
+    for depth, label in enumerate(reversed(labels), start=1):
+        wildcard = node.get("*")
+        if wildcard is not None and _RULE in wildcard:
+            n = depth
+        child = node.get(label)
+        if child is None:
+            break
+        if _EXCEPTION in child:
+            return depth - 1
+        if _RULE in child:
+            n = depth
+        node = child
+    return n
+
+
+def normalize_host(domain: str) -> str:
+    """Cookie domain or site name -> bare lowercase host (".Example.com." -> "example.com")."""
+    return (domain or "").strip().lower().strip(".")
+
+
+@lru_cache(maxsize=int(os.getenv("COOKIE_DOMAIN_CACHE_SIZE", "65536")))
+def registrable_domain(domain: str) -> str:
+    """
+    The eTLD+1 of `domain` ("ads.example.co.uk" -> "example.co.uk").
+    IP addresses, single labels and hosts that are themselves public
+    suffixes are returned normalized but otherwise unchanged.
+    """
+    host = normalize_host(domain)
+    if not host or "." not in host:
+        return host
+    if host[-1].isdigit() or ":" in host:
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+
+    labels = host.split(".")
+    n = public_suffix_labels(labels, suffix_trie())
+    if n >= len(labels):
+        return host
+    return ".".join(labels[-(n + 1):])
+
+
+def is_third_party(cookie_domain: str, site_domain: str) -> bool:
+    return registrable_domain(cookie_domain) != registrable_domain(site_domain)
@@ -1,41 +1,30 @@
-from typing import Dict, Any, Set
+import time
+from typing import Dict, Any, Optional, Set
 
 from cookie_analyzer.core.schemas import CookieAnalyzerInput
-from cookie_analyzer.rules.ui_rules import run_ui_checks
-from cookie_analyzer.rules.cookie_rules import run_cookie_checks
-from cookie_analyzer.rules.deception_rules import run_deception_checks
-
-
-def analyze_cookie_usage(data: CookieAnalyzerInput) -> Dict[str, Any]:
-    flags: Set[str] = set()
-    facts: Dict[str, Any] = {}
-
-    # 1. Consent UI checks
-    run_ui_checks(
-        consent_ui=data.consent_ui,
-        flags=flags,
-    )
-
-    # 2. Cookie behavior checks
-    run_cookie_checks(
-        cookies=data.cookies,
-        consent_ui=data.consent_ui,
-        site_domain=data.site_domain,
-        flags=flags,
-        facts=facts,
-    )
-
-    # 3. Deception / misleading usage checks
-    run_deception_checks(
-        consent_ui=data.consent_ui,
-        cookies=data.cookies,
-        flags=flags,
-        facts=facts,
-    )
+from cookie_analyzer.rules.registry import RuleContext, run_rules
+# Imported for registration; rules run in this order.
+from cookie_analyzer.rules import ui_rules, cookie_rules, deception_rules  # noqa: F401
+
+
+def analyze_cookie_usage(
+    data: CookieAnalyzerInput,
+    features: Optional[Dict[str, Any]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    # 1-3. Consent UI, cookie behavior and deception checks
+    # (`features` may carry precomputed rule features, e.g. from a batch;
+    # `timings` receives milliseconds per rule module, plus "score")
+    ctx = RuleContext(data, features=features)
+    run_rules(ctx, timings)
+    flags, facts = ctx.flags, ctx.facts
 
     # 4. Risk scoring
+    t0 = time.perf_counter() if timings is not None else 0.0
     risk_level = _compute_risk_level(flags)
     summary = build_summary(flags, facts)
+    if timings is not None:
+        timings["score"] = timings.get("score", 0.0) + (time.perf_counter() - t0) * 1000
 
     return {
         "site_domain": data.site_domain,
@@ -48,6 +37,21 @@ def analyze_cookie_usage(data: CookieAnalyzerInput) -> Dict[str, Any]:
 
 
 
+def prewarm() -> None:
+    """
+    Load what the first analysis would otherwise load (public suffix trie,
+    cookie knowledge base, numpy), e.g. before forking workers that then
+    share it copy-on-write.
+    """
+    from cookie_analyzer.core import identifiers
+    from cookie_analyzer.core.domains import suffix_trie
+    from cookie_analyzer.core.knowledge import knowledge_base
+
+    suffix_trie()
+    knowledge_base()
+    identifiers.prewarm()
+
+
 def _compute_risk_level(flags: Set[str]) -> str:
     count = len(flags)
 
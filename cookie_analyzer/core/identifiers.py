@@ -0,0 +1,268 @@
+"""
+Batched detection of identifier-like cookie values.
+
+All values of a site (or of a whole bulk chunk) are scored in one pass.
+Each value gets a likelihood in [0, 1] of being a persistent identifier,
+built from its length, Shannon entropy relative to the largest entropy its
+alphabet allows, its character set, and a few known formats (UUID, JWT,
+Google Analytics client ids). Values scoring IDENTIFIER_THRESHOLD or more
+are treated as identifiers.
+
+Scoring only pays off on large batches. With numpy installed and at least
+VECTOR_MIN values, features come from a byte-count matrix (one row per
+value), and values that cannot reach the threshold are ruled out from
+their character classes and length before any byte is counted. Smaller
+jars, the usual single site, keep the old per-value regex check (UUID,
+long base64, over 40 characters), which is cheaper than any entropy work
+there: it scores 1.0 or 0.0. _score_python() is the reference the
+vectorized path is checked against. numpy is imported on the first batch
+large enough to use it (or by prewarm()), as it costs more to import than
+the rest of the analyzer together.
+"""
+import math
+import re
+from collections import Counter
+from typing import List, Sequence
+
+np = None  # numpy once _numpy() has imported it; False if it is not installed
+
+IDENTIFIER_THRESHOLD = 0.7
+# below this many values the regex check is faster than scoring
+VECTOR_MIN = 2500
+MIN_LENGTH = 8
+# Only the first MAX_BYTES bytes of a value are analysed.
+MAX_BYTES = 512
+
+_HEX = frozenset(b"0123456789abcdefABCDEF")
+_DIGITS = frozenset(b"0123456789")
+_UPPER = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_BASE64 = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=-_")
+_TOKEN = _BASE64 | frozenset(b".:")
+_GA_PREFIXES = (b"GA1.", b"GS1.", b"GS2.")
+_UUID_DASHES = (8, 13, 18, 23)
+
+# The check used before values were scored, kept for jars under VECTOR_MIN.
+_LEGACY_UUID = re.compile(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", re.IGNORECASE)
+_LEGACY_BASE64 = re.compile(r"^[A-Za-z0-9+/=]{20,}$")
+
+# c * log2(c) for every possible byte count
+_CLOG = [0.0] + [c * math.log2(c) for c in range(1, MAX_BYTES + 1)]
+
+
+def _numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - optional dependency
+            np = False
+        else:
+            np = numpy
+    return np or None
+
+
+def prewarm() -> None:
+    """Import numpy now rather than on the first large batch."""
+    _numpy()
+
+
+def _encode(value: str) -> bytes:
+    return (value or "").encode("utf-8", "replace")[:MAX_BYTES]
+
+
+def _score(length, entropy, alphabet, token, digits_only, has_digit, lower_words, known_format):
+    """
+    Scalar form of the scoring rule; _score_vectorized mirrors it.
+
+    Randomness is entropy over the most the alphabet allows at this length,
+    scaled down for values shorter than 16 bytes. Values without digits,
+    made of lowercase words, or with characters outside token alphabets
+    are mostly settings, not ids. Short numbers are usually timestamps.
+    """
+    if length < MIN_LENGTH:
+        return 0.0
+    score = min(entropy / math.log2(min(length, alphabet)), 1.0) * min(length, 16) / 16
+    if not has_digit:
+        score *= 0.6
+    if lower_words:
+        score *= 0.75
+    if not token:
+        score *= 0.5
+    if digits_only and length < 16:
+        score = min(score, 0.4)
+    if known_format:
+        score = max(score, 0.95)
+    # rint-style rounding, the same operation numpy does on whole arrays
+    return round(score * 1000) / 1000
+
+
+def _score_python(values: Sequence[str]) -> List[float]:
+    out = []
+    for value in values:
+        data = _encode(value)
+        length = len(data)
+        if length < MIN_LENGTH:
+            out.append(0.0)
+            continue
+
+        counts = Counter(data)
+        entropy = math.log2(length) - math.fsum(_CLOG[c] for c in counts.values()) / length
+        chars = counts.keys()
+
+        hex_only = _HEX.issuperset(chars)
+        digits_only = _DIGITS.issuperset(chars)
+        token = _TOKEN.issuperset(chars)
+        has_digit = not _DIGITS.isdisjoint(chars)
+        lower_words = token and not hex_only and _UPPER.isdisjoint(chars)
+        alphabet = 10 if digits_only else 16 if hex_only else 64 if token else 95
+
+        known_format = (
+            (length == 36 and all(data[i] == 0x2D for i in _UUID_DASHES)
+             and counts[0x2D] == 4 and _HEX.issuperset(chars - {0x2D}))
+            or (data.startswith(b"eyJ") and counts[0x2E] == 2 and _BASE64.issuperset(chars - {0x2E}))
+            or (data.startswith(_GA_PREFIXES) and (_DIGITS | {0x2E}).issuperset(data[4:]))
+        )
+        out.append(_score(
+            length, round(entropy * 1e6) / 1e6, alphabet, token, digits_only, has_digit, lower_words, known_format
+        ))
+    return out
+
+
+# Per byte: bit k set when it is outside _CLASSES[k], then one bit each for
+# digits and uppercase. The b"\n" after each value sets none.
+_CLASSES = [_HEX, _DIGITS, _TOKEN, _HEX | {0x2D}, _BASE64 | {0x2E}, _DIGITS | {0x2E}]
+_HEX_BIT, _DIGITS_BIT, _TOKEN_BIT, _HEX_DASH_BIT, _JWT_BIT, _GA_BIT = (1 << k for k in range(len(_CLASSES)))
+_DIGIT_BIT = 1 << len(_CLASSES)
+_UPPER_BIT = _DIGIT_BIT << 1
+# Byte counts are kept per code: the token alphabet first, then the newline,
+# then every other byte. Token-only values need TOKEN_CODES + 1 columns.
+_TOKEN_ORDER = sorted(_TOKEN) + [0x0A] + sorted(set(range(256)) - _TOKEN - {0x0A})
+TOKEN_CODES = len(_TOKEN)
+_luts = None  # (byte -> bits, byte -> code, c*log2(c)), built on first use
+
+
+def _tables():
+    global _luts
+    if _luts is None:
+        bits = [
+            sum(1 << k for k, cls in enumerate(_CLASSES) if b not in cls)
+            | (_DIGIT_BIT if b in _DIGITS else 0) | (_UPPER_BIT if b in _UPPER else 0)
+            for b in range(256)
+        ]
+        bits[0x0A] = 0
+        codes = np.zeros(256, dtype=np.uint8)
+        codes[_TOKEN_ORDER] = np.arange(256)
+        _luts = (np.array(bits, dtype=np.uint8), codes, np.array(_CLOG))
+    return _luts
+
+
+def _joined(values: Sequence[str]):
+    """
+    (bytes of every value, each followed by b"\n"; the values' lengths), or
+    None when a value holds a newline itself.
+    """
+    try:
+        text = "\n".join(values)
+    except TypeError:
+        text = "\n".join(v or "" for v in values)
+    if text.isascii():
+        flat = np.frombuffer(text.encode("ascii") + b"\n", dtype=np.uint8)
+    else:
+        flat = np.frombuffer(b"\n".join(_encode(v) for v in values) + b"\n", dtype=np.uint8)
+    ends = np.flatnonzero(flat == 0x0A)
+    if len(ends) != len(values):
+        return None
+    lengths = np.diff(ends, prepend=-1) - 1
+    if text.isascii() and lengths.max() > MAX_BYTES:
+        flat = np.frombuffer(b"\n".join(_encode(v) for v in values) + b"\n", dtype=np.uint8)
+        lengths = np.minimum(lengths, MAX_BYTES)
+    return flat, lengths
+
+
+def _score_vectorized(values: Sequence[str], prefilter: bool = False) -> List[float]:
+    """
+    _score_python over arrays. With `prefilter`, values that cannot reach
+    IDENTIFIER_THRESHOLD score 0 without their bytes being counted.
+    """
+    np = _numpy()
+    joined = _joined(values) if len(values) else None
+    if joined is None:
+        return _score_python(values)
+    flat, lengths = joined
+    n = len(lengths)
+    bits_lut, codes_lut, clog = _tables()
+    scores = np.zeros(n)
+
+    # Character classes: one OR over each value's bytes (and its newline).
+    starts = np.cumsum(lengths + 1) - lengths - 1
+    byte_bits = bits_lut.take(flat)
+    bits = np.bitwise_or.reduceat(byte_bits, starts)
+
+    def head(rows, columns):
+        return flat.take(np.minimum(starts[rows, None] + columns, len(flat) - 1))
+
+    # UUIDs and GA ids always score 0.95: with at most 17 and 13 distinct
+    # bytes, their entropy cannot take them any higher.
+    first = np.ascontiguousarray(head(slice(None), np.arange(4))).view("<u4").ravel()
+    ga = lengths >= MIN_LENGTH
+    ga &= np.logical_or.reduce([first == int.from_bytes(p, "little") for p in _GA_PREFIXES])
+    if ga.any():
+        # nothing but digits and dots past the prefix
+        rest = np.stack([starts[ga] + 4, starts[ga] + lengths[ga]], axis=1).ravel()
+        ga[ga] = np.bitwise_or.reduceat(byte_bits, rest)[::2] & _GA_BIT == 0
+    uuid = (lengths == 36) & (bits & _HEX_DASH_BIT == 0)
+    if uuid.any():
+        dashes = head(uuid, np.arange(36)) == 0x2D
+        uuid[uuid] = (dashes.sum(axis=1) == 4) & dashes[:, list(_UUID_DASHES)].all(axis=1)
+    certain = uuid | ga
+    scores[certain] = 0.95
+
+    token = bits & _TOKEN_BIT == 0
+    jwt = (first & 0xFFFFFF == int.from_bytes(b"eyJ", "little")) & (bits & _JWT_BIT == 0) & (lengths >= 3)
+    need = (lengths >= MIN_LENGTH) & ~certain
+    if prefilter:
+        # the highest score any entropy could give (see _score)
+        cap = np.minimum(lengths, 16) / 16 * np.where(bits & _DIGIT_BIT, 1.0, 0.6)
+        cap *= np.where(token & (bits & _HEX_BIT > 0) & (bits & _UPPER_BIT == 0), 0.75, 1.0)
+        cap[~token | ((bits & _DIGITS_BIT == 0) & (lengths < 16))] = 0.0
+        need &= (cap >= IDENTIFIER_THRESHOLD - 0.001) | jwt
+    rows = np.flatnonzero(need)
+    if not len(rows):
+        return scores.tolist()
+
+    # Byte counts of the rest, one row per value.
+    length, bits, token, jwt = lengths[rows], bits[rows], token[rows], jwt[rows]
+    width = TOKEN_CODES + 1 if token.all() else 256
+    cells = np.repeat(np.arange(len(rows)) * width, length + 1) + codes_lut.take(flat[np.repeat(need, lengths + 1)])
+    counts = np.bincount(cells, minlength=len(rows) * width).reshape(len(rows), width)
+    counts[:, TOKEN_CODES] = 0  # the newlines
+    entropy = np.log2(length) - np.take(clog, counts) @ np.ones(width) / length
+    entropy = np.rint(entropy * 1e6) / 1e6
+
+    hex_only, digits_only = bits & _HEX_BIT == 0, bits & _DIGITS_BIT == 0
+    lower_words = token & ~hex_only & (bits & _UPPER_BIT == 0)
+    alphabet = np.where(digits_only, 10, np.where(hex_only, 16, np.where(token, 64, 95)))
+    jwt &= counts[:, _TOKEN_ORDER.index(0x2E)] == 2
+
+    score = np.minimum(entropy / np.log2(np.minimum(length, alphabet)), 1.0) * np.minimum(length, 16) / 16
+    score = np.where(bits & _DIGIT_BIT, score, score * 0.6)
+    score = np.where(lower_words, score * 0.75, score)
+    score = np.where(token, score, score * 0.5)
+    score = np.where(digits_only & (length < 16), np.minimum(score, 0.4), score)
+    score = np.where(jwt, np.maximum(score, 0.95), score)
+    scores[rows] = score
+    return (np.rint(scores * 1000) / 1000).tolist()
+
+
+def _legacy_match(value: str) -> bool:
+    return bool(_LEGACY_UUID.match(value) or _LEGACY_BASE64.match(value) or len(value) > 40)
+
+
+def score_identifiers(values: Sequence[str]) -> List[float]:
+    """
+    Likelihood that each value is a persistent identifier, in input order.
+    Under VECTOR_MIN values (or without numpy) this is the regex check.
+    """
+    if len(values) >= VECTOR_MIN and _numpy() is not None:
+        return _score_vectorized(values, prefilter=True)
+    return [1.0 if value and _legacy_match(value) else 0.0 for value in values]
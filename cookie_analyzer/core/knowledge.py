@@ -0,0 +1,238 @@
+"""
+Known-cookie and tracker knowledge base.
+
+The source list (cookie_analyzer/data/known_cookies.tsv) is compiled offline
+into a sorted binary index:
+
+    python -m cookie_analyzer.core.knowledge build [--src TSV] [--out IDX]
+
+The index is memory-mapped read-only, so opening it costs microseconds and
+every worker process shares the same page-cache pages instead of holding a
+private copy. Lookups binary-search fixed-size records:
+
+- exact cookie names
+- cookie name prefixes ("_ga_", "_hjSession"), longest match wins
+- cookie domains, tried from the full host up through each parent domain
+
+Index layout (little-endian):
+
+    header   magic "CKB1", then u32 counts: names, prefixes, domains, vendors
+    tables   names, prefixes, domains, vendors; 16-byte records sorted by key
+             (key offset u32, key length u16, category u8, vendor u16,
+             parent i32 = index of the record's longest proper prefix in
+             the prefix table, or -1)
+    blob     UTF-8 keys
+"""
+import argparse
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cookie_analyzer.core.domains import normalize_host, registrable_domain
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SOURCE_PATH = DATA_DIR / "known_cookies.tsv"
+INDEX_PATH = DATA_DIR / "known_cookies.idx"
+
+CATEGORIES = ["essential", "functional", "analytics", "marketing", "consent"]
+NON_ESSENTIAL = {"functional", "analytics", "marketing"}
+
+MAGIC = b"CKB1"
+_HEADER = struct.Struct("<4sIIII")
+_RECORD = struct.Struct("<IHBxHxxi")
+_KEY_REF = struct.Struct("<IH")
+_KINDS = ("name", "prefix", "domain")
+
+
+@dataclass(frozen=True)
+class Classification:
+    category: str
+    vendor: str
+    match: str  # "name", "prefix" or "domain"
+
+
+# --- build ---
+
+def _read_source(lines: Iterable[str]) -> Dict[str, Dict[str, Tuple[str, str]]]:
+    tables: Dict[str, Dict[str, Tuple[str, str]]] = {kind: {} for kind in _KINDS}
+    for lineno, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        parts = line.split("\t")
+        if len(parts) < 3:
+            raise ValueError(f"line {lineno}: expected kind, key, category[, vendor]")
+        kind, key, category = parts[0], parts[1], parts[2]
+        vendor = parts[3] if len(parts) > 3 else ""
+        if kind not in tables:
+            raise ValueError(f"line {lineno}: unknown kind {kind!r}")
+        if category not in CATEGORIES:
+            raise ValueError(f"line {lineno}: unknown category {category!r}")
+        if kind == "domain":
+            key = normalize_host(key)
+        tables[kind][key] = (category, vendor)
+    return tables
+
+
+def build_index(lines: Iterable[str]) -> bytes:
+    tables = _read_source(lines)
+
+    vendors = sorted({vendor for table in tables.values() for _, vendor in table.values()})
+    vendor_ids = {vendor: i for i, vendor in enumerate(vendors)}
+
+    blob = bytearray()
+    sections = []
+
+    def add_table(keys: List[bytes], meta) -> None:
+        out = bytearray()
+        for i, key in enumerate(keys):
+            category, vendor, parent = meta(i, key)
+            out += _RECORD.pack(len(blob), len(key), category, vendor, parent)
+            blob.extend(key)
+        sections.append(bytes(out))
+
+    for kind in _KINDS:
+        table = tables[kind]
+        by_key = {key.encode("utf-8"): value for key, value in table.items()}
+        keys = sorted(by_key)
+
+        parents = [-1] * len(keys)
+        if kind == "prefix":
+            # Longest proper prefix already in the table: the nearest entry
+            # on the stack of open prefixes while walking in sorted order.
+            stack: List[int] = []
+            for i, key in enumerate(keys):
+                while stack and not key.startswith(keys[stack[-1]]):
+                    stack.pop()
+                parents[i] = stack[-1] if stack else -1
+                stack.append(i)
+
+        def meta(i, key, by_key=by_key, parents=parents):
+            category, vendor = by_key[key]
+            return CATEGORIES.index(category), vendor_ids[vendor], parents[i]
+
+        add_table(keys, meta)
+
+    add_table([v.encode("utf-8") for v in vendors], lambda i, key: (0, 0, -1))
+
+    header = _HEADER.pack(
+        MAGIC, len(tables["name"]), len(tables["prefix"]), len(tables["domain"]), len(vendors)
+    )
+    return header + b"".join(sections) + bytes(blob)
+
+
+# --- lookup ---
+
+class KnowledgeBase:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, *counts = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a cookie knowledge base index")
+
+        self._tables = {}
+        offset = _HEADER.size
+        for kind, count in zip(_KINDS + ("vendor",), counts):
+            self._tables[kind] = (offset, count)
+            offset += count * _RECORD.size
+        self._blob = offset
+
+        base, count = self._tables["vendor"]
+        self._vendors = [self._key(base, i).decode("utf-8") for i in range(count)]
+
+    def _record(self, base: int, i: int) -> tuple:
+        return _RECORD.unpack_from(self._buf, base + i * _RECORD.size)
+
+    def _key(self, base: int, i: int) -> bytes:
+        off, length = _KEY_REF.unpack_from(self._buf, base + i * _RECORD.size)
+        start = self._blob + off
+        return self._buf[start:start + length]
+
+    def _floor(self, kind: str, key: bytes) -> int:
+        """Index of the largest entry <= key, or -1."""
+        base, count = self._tables[kind]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(base, mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def _classification(self, kind: str, i: int) -> Classification:
+        base, _ = self._tables[kind]
+        _, _, category, vendor, _ = self._record(base, i)
+        return Classification(CATEGORIES[category], self._vendors[vendor], kind)
+
+    def lookup_name(self, name: str) -> Optional[Classification]:
+        key = name.encode("utf-8")
+
+        i = self._floor("name", key)
+        if i >= 0 and self._key(self._tables["name"][0], i) == key:
+            return self._classification("name", i)
+
+        # Any table prefix of `key` sorts between itself and `key`, so it is
+        # a prefix of the floor entry too; walk the floor's prefix chain.
+        base, _ = self._tables["prefix"]
+        i = self._floor("prefix", key)
+        while i >= 0:
+            if key.startswith(self._key(base, i)):
+                return self._classification("prefix", i)
+            i = self._record(base, i)[4]
+        return None
+
+    def lookup_domain(self, domain: str) -> Optional[Classification]:
+        host = normalize_host(domain)
+        site = registrable_domain(host)
+        base, _ = self._tables["domain"]
+        while host:
+            key = host.encode("utf-8")
+            i = self._floor("domain", key)
+            if i >= 0 and self._key(base, i) == key:
+                return self._classification("domain", i)
+            if host == site:
+                break
+            host = host.partition(".")[2]
+        return None
+
+    def classify(self, name: str, domain: str = "") -> Optional[Classification]:
+        """A known cookie name wins over a known tracker domain."""
+        return self.lookup_name(name) or (self.lookup_domain(domain) if domain else None)
+
+
+@lru_cache(maxsize=None)
+def knowledge_base() -> KnowledgeBase:
+    return KnowledgeBase(os.getenv("COOKIE_KB_PATH") or INDEX_PATH)
+
+
+@lru_cache(maxsize=int(os.getenv("COOKIE_KB_CACHE_SIZE", "65536")))
+def classify_cookie(name: str, domain: str = "") -> Optional[Classification]:
+    return knowledge_base().classify(name, domain)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile the known-cookie knowledge base")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--src", default=str(SOURCE_PATH), help="Source TSV")
+    build.add_argument("--out", default=str(INDEX_PATH), help="Compiled index")
+    args = ap.parse_args()
+
+    with open(args.src, encoding="utf-8") as f:
+        data = build_index(f)
+    tmp = args.out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, args.out)
+    print(f"Wrote {args.out} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
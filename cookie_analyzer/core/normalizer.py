@@ -0,0 +1,46 @@
+from typing import Any, Dict
+
+from cookie_analyzer.core.schemas import (
+    Cookie,
+    Category,
+    ConsentUI,
+    CookieAnalyzerInput,
+)
+
+
+def normalize_input(raw: Dict[str, Any]) -> CookieAnalyzerInput:
+    """
+    Build a CookieAnalyzerInput from a plain dict shaped like the backend's
+    CookieReq (what the extension and crawler send). Unknown keys are ignored.
+    """
+    ui = raw["consent_ui"]
+
+    return CookieAnalyzerInput(
+        site_domain=raw["site_domain"],
+        cookies=[
+            Cookie(
+                name=c["name"],
+                domain=c["domain"],
+                expiry_days=int(c["expiry_days"]),
+                secure=bool(c["secure"]),
+                sameSite=c["sameSite"],
+                value=str(c.get("value") or ""),
+            )
+            for c in raw.get("cookies", [])
+        ],
+        consent_ui=ConsentUI(
+            accept_clicks=int(ui["accept_clicks"]),
+            reject_clicks=int(ui["reject_clicks"]),
+            manage_preferences_visible=bool(ui["manage_preferences_visible"]),
+            consent_required_to_proceed=bool(ui["consent_required_to_proceed"]),
+            categories=[
+                Category(
+                    label=cat["label"],
+                    description=cat["description"],
+                    prechecked=bool(cat["prechecked"]),
+                )
+                for cat in ui.get("categories", [])
+            ],
+        ),
+        cmp_detected=raw.get("cmp_detected", "unknown"),
+    )
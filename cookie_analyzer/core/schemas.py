@@ -8,6 +8,7 @@ class Cookie:
     expiry_days: int
     secure: bool
     sameSite: str
+    value: str = ""
 
 
 @dataclass
@@ -1,18 +1,57 @@
 import argparse
 import json
-from cookie_analyzer.analyzer import analyze_cookie_usage
-from cookie_analyzer.schemas import CookieAnalyzerInput
+import os
+import sys
+
+from cookie_analyzer.core.engine import analyze_cookie_usage
+from cookie_analyzer.core.normalizer import normalize_input
+
+def run_batch(args):
+    import gc
+    from concurrent.futures import ProcessPoolExecutor
+
+    from cookie_analyzer.core.batch import iter_bulk
+    from cookie_analyzer.core.domains import suffix_trie
+    from cookie_analyzer.core.engine import prewarm
+
+    stats = {}
+    if args.preload:
+        # load everything workers would load on their own, then fork them
+        # to share it copy-on-write
+        prewarm()
+        gc.freeze()
+    else:
+        suffix_trie()  # load the PSL once; forked workers inherit it
+    with ProcessPoolExecutor(max_workers=args.workers) as pool, \
+            open(args.inp, "r", encoding="utf-8") as fin, \
+            open(args.out, "w", encoding="utf-8") as fout:
+        for line in iter_bulk(fin, pool, chunk_size=args.chunk_size, stats=stats):
+            fout.write(line + "\n")
+
+    print(
+        f"Analyzed {stats['sites']} sites in {stats['seconds']}s "
+        f"({stats['sites_per_sec']} sites/sec)",
+        file=sys.stderr,
+    )
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--in", dest="inp", required=True)
-    ap.add_argument("--out", dest="out", required=True)
+    ap.add_argument("--in", dest="inp", required=True, help="Input JSON file (NDJSON with --batch)")
+    ap.add_argument("--out", dest="out", required=True, help="Output JSON file (NDJSON with --batch)")
+    ap.add_argument("--batch", action="store_true", help="One site per line in, one result per line out")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (--batch)")
+    ap.add_argument("--chunk-size", type=int, default=64, help="Sites per worker task (--batch)")
+    ap.add_argument("--preload", action="store_true", help="Load all lookup tables and numpy before forking the workers (--batch)")
     args = ap.parse_args()
 
+    if args.batch:
+        run_batch(args)
+        return
+
     with open(args.inp, "r") as f:
         raw = json.load(f)
 
-    inp = CookieAnalyzerInput(**raw)
+    inp = normalize_input(raw)
     result = analyze_cookie_usage(inp)
 
     with open(args.out, "w") as f:
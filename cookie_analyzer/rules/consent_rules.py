@@ -1,19 +1,35 @@
-import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
+
+from cookie_analyzer.core.identifiers import IDENTIFIER_THRESHOLD, score_identifiers
+from cookie_analyzer.core.knowledge import NON_ESSENTIAL, classify_cookie
 
 # --- heuristics ---
-UUID_REGEX = re.compile(
-    r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$",
-    re.IGNORECASE,
-)
+ESSENTIAL_KEYWORDS = ["session", "csrf", "xsrf", "auth"]
+
 
-BASE64_REGEX = re.compile(r"^[A-Za-z0-9+/=]{20,}$")
+def is_non_essential(cookie_name: str, domain: str = "") -> bool:
+    """
+    Known cookies and tracker domains are looked up in the knowledge base;
+    anything else falls back to an allowlist of essential-sounding keywords.
+    """
+    return tracking_vendor(cookie_name, domain) is not None
 
 
-def is_non_essential(cookie_name: str) -> bool:
-    """Basic allowlist-style exclusion for essential cookies"""
-    essential_keywords = ["session", "csrf", "xsrf", "auth"]
-    return not any(k in cookie_name.lower() for k in essential_keywords)
+@lru_cache(maxsize=65536)
+def tracking_vendor(cookie_name: str, domain: str = "") -> Optional[str]:
+    """
+    None for essential cookies. Otherwise the analytics/marketing vendor
+    from the knowledge base, or "" if it is not known.
+    """
+    known = classify_cookie(cookie_name, domain)
+    if known is not None:
+        if known.category not in NON_ESSENTIAL:
+            return None
+        return known.vendor if known.category in ("analytics", "marketing") else ""
+    if any(k in cookie_name.lower() for k in ESSENTIAL_KEYWORDS):
+        return None
+    return ""
 
 
 def detect_pre_consent_tracking(dom_cookies: List[Dict], cmp_info: Dict):
@@ -24,7 +40,7 @@ def detect_pre_consent_tracking(dom_cookies: List[Dict], cmp_info: Dict):
         return flags
 
     for c in dom_cookies:
-        if is_non_essential(c["name"]):
+        if is_non_essential(c["name"], c.get("domain", "")):
             flags.append({
                 "type": "PRE_CONSENT_TRACKING",
                 "severity": "HIGH",
@@ -38,20 +54,24 @@ def detect_pre_consent_tracking(dom_cookies: List[Dict], cmp_info: Dict):
 def detect_user_profiling_identifiers(cookies):
     flags = []
 
+    names, values = [], []
     for c in cookies:
         # Support both dict-based and dataclass-based cookies
         if isinstance(c, dict):
-            name = c.get("name", "")
-            value = str(c.get("value", ""))
+            names.append(c.get("name", ""))
+            values.append(str(c.get("value", "")))
         else:
-            name = c.name
-            value = ""  # Browser cookies may not expose value
+            names.append(c.name)
+            values.append(getattr(c, "value", ""))  # Browser cookies may not expose value
 
-        if UUID_REGEX.match(value) or BASE64_REGEX.match(value) or len(value) > 40:
+    # One call for every value; large jars are scored in a single batched pass.
+    for name, score in zip(names, score_identifiers(values)):
+        if score >= IDENTIFIER_THRESHOLD:
             flags.append({
                 "type": "USER_PROFILING_IDENTIFIER",
                 "severity": "HIGH",
                 "cookie": name,
+                "likelihood": score,
                 "description": "Cookie value resembles a persistent user identifier"
             })
 
@@ -69,12 +89,6 @@ def detect_non_standard_consent_signals(cookies, cmp_info):
     if standard_cmp_present:
         return flags
 
-    consent_like_cookies = {
-        "ckns_policy",
-        "ckns_explicit",
-        "_pprv",
-    }
-
     for c in cookies:
         # Support both dict and Cookie dataclass
         if isinstance(c, dict):
@@ -82,7 +96,8 @@ def detect_non_standard_consent_signals(cookies, cmp_info):
         else:
             name = c.name
 
-        if name in consent_like_cookies:
+        known = classify_cookie(name)
+        if known is not None and known.category == "consent":
             flags.append({
                 "type": "NON_STANDARD_CONSENT_SIGNAL",
                 "severity": "MEDIUM",
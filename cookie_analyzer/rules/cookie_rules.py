@@ -1,63 +1,48 @@
-from typing import Set, Dict
-from cookie_analyzer.core.schemas import Cookie, ConsentUI
+"""
+Deterministic checks on cookie metadata.
+Populate flags and objective facts.
+"""
+from cookie_analyzer.core.identifiers import IDENTIFIER_THRESHOLD
+from cookie_analyzer.rules.registry import RuleContext, rule
 
 
-def run_cookie_checks(
-    cookies: list[Cookie],
-    consent_ui: ConsentUI,
-    site_domain: str,
-    flags: Set[str],
-    facts: Dict[str, object],
-) -> None:
+@rule("third_party_cookie", needs=("third_party_domains",))
+def _check_third_party_cookies(ctx: RuleContext) -> None:
     """
-    Run deterministic checks on cookie metadata.
-    Populates flags and objective facts.
+    Flag cookies whose registrable domain (eTLD+1) differs from the site's.
     """
+    third_party_domains = ctx["third_party_domains"]
 
-    _check_third_party_cookies(cookies, site_domain, flags, facts)
-    _check_long_retention(cookies, flags, facts)
-    _check_tracking_enabled_by_default(consent_ui, flags)
-
+    if third_party_domains:
+        ctx.flags.add("third_party_cookie")
+        ctx.facts["third_party_domains"] = third_party_domains
 
-def _check_third_party_cookies(
-    cookies: list[Cookie],
-    site_domain: str,
-    flags: Set[str],
-    facts: Dict[str, object],
-) -> None:
-    third_party_domains = set()
 
-    for cookie in cookies:
-        if site_domain not in cookie.domain:
-            third_party_domains.add(cookie.domain)
+@rule("long_retention", needs=("max_retention_days",))
+def _check_long_retention(ctx: RuleContext) -> None:
+    max_retention = ctx["max_retention_days"]
 
-    if third_party_domains:
-        flags.add("third_party_cookie")
-        facts["third_party_domains"] = sorted(third_party_domains)
+    if max_retention > 180:
+        ctx.flags.add("long_retention")
+        ctx.facts["max_retention_days"] = max_retention
 
 
-def _check_long_retention(
-    cookies: list[Cookie],
-    flags: Set[str],
-    facts: Dict[str, object],
-) -> None:
-    max_retention = 0
+@rule("tracking_enabled_by_default", needs=("nonessential_prechecked",))
+def _check_tracking_enabled_by_default(ctx: RuleContext) -> None:
+    if ctx["nonessential_prechecked"]:
+        ctx.flags.add("tracking_enabled_by_default")
 
-    for cookie in cookies:
-        if cookie.expiry_days > max_retention:
-            max_retention = cookie.expiry_days
 
-    if max_retention > 180:
-        flags.add("long_retention")
-        facts["max_retention_days"] = max_retention
-
-
-def _check_tracking_enabled_by_default(
-    consent_ui: ConsentUI,
-    flags: Set[str],
-) -> None:
-    for category in consent_ui.categories:
-        label = category.label.lower()
-        if label in {"analytics", "marketing"} and category.prechecked:
-            flags.add("tracking_enabled_by_default")
-            break
+@rule("user_profiling_identifier", needs=("identifier_scores",))
+def _check_identifier_values(ctx: RuleContext) -> None:
+    """
+    Flag cookies whose value looks like a persistent user identifier.
+    """
+    names = {
+        cookie.name
+        for cookie, score in zip(ctx.data.cookies, ctx["identifier_scores"])
+        if score >= IDENTIFIER_THRESHOLD
+    }
+    if names:
+        ctx.flags.add("user_profiling_identifier")
+        ctx.facts["identifier_cookies"] = sorted(names)
@@ -1,79 +1,41 @@
-from typing import Set, Dict
-from cookie_analyzer.core.schemas import ConsentUI, Cookie
+"""
+Detect misleading or deceptive consent practices by
+cross-checking UI claims against actual behavior.
+"""
+from cookie_analyzer.rules.registry import RuleContext, rule
 
 
-def run_deception_checks(
-    consent_ui: ConsentUI,
-    cookies: list[Cookie],
-    flags: Set[str],
-    facts: Dict[str, object],
-) -> None:
-    """
-    Detect misleading or deceptive consent practices by
-    cross-checking UI claims against actual behavior.
-    """
-
-    _check_misleading_essential_claim(consent_ui, flags)
-    _check_category_behavior_mismatch(consent_ui, cookies, flags, facts)
-    _check_preconsent_tracking(cookies, flags)
-
-
-def _check_misleading_essential_claim(
-    consent_ui: ConsentUI,
-    flags: Set[str],
-) -> None:
+@rule("misleading_claim", needs=("claims_essential_only", "nonessential_prechecked"))
+def _check_misleading_essential_claim(ctx: RuleContext) -> None:
     """
     Flag if the UI implies only essential cookies are used,
     but non-essential categories are enabled.
     """
-    claims_essential_only = any(
-        "essential" in category.description.lower()
-        for category in consent_ui.categories
-    )
+    if ctx["claims_essential_only"] and ctx["nonessential_prechecked"]:
+        ctx.flags.add("misleading_claim")
 
-    nonessential_enabled = any(
-        category.label.lower() in {"analytics", "marketing"}
-        and category.prechecked
-        for category in consent_ui.categories
-    )
 
-    if claims_essential_only and nonessential_enabled:
-        flags.add("misleading_claim")
-
-
-def _check_category_behavior_mismatch(
-    consent_ui: ConsentUI,
-    cookies: list[Cookie],
-    flags: Set[str],
-    facts: Dict[str, object],
-) -> None:
+@rule("category_mismatch", needs=("analytics_prechecked", "third_party_domains"))
+def _check_category_behavior_mismatch(ctx: RuleContext) -> None:
     """
     Flag if analytics-labeled categories include
     obvious third-party advertising cookies.
     """
-    analytics_enabled = any(
-        category.label.lower() == "analytics" and category.prechecked
-        for category in consent_ui.categories
-    )
-
-    third_party_present = any(
-        "." in cookie.domain for cookie in cookies
-    )
-
-    if analytics_enabled and third_party_present:
-        flags.add("category_mismatch")
-        facts["category_mismatch_reason"] = (
+    if ctx["analytics_prechecked"] and ctx["third_party_domains"]:
+        ctx.flags.add("category_mismatch")
+        ctx.facts["category_mismatch_reason"] = (
             "Analytics category includes third-party tracking cookies"
         )
 
 
-def _check_preconsent_tracking(
-    cookies: list[Cookie],
-    flags: Set[str],
-) -> None:
+@rule("potential_preconsent_tracking", needs=("tracking_cookies", "tracker_vendors"))
+def _check_preconsent_tracking(ctx: RuleContext) -> None:
     """
     Placeholder: flag if cookies exist before consent.
-    Currently inferred from presence of non-essential cookies.
+    Currently inferred from presence of non-essential cookies, as classified
+    by the known-cookie knowledge base.
     """
-    if cookies:
-        flags.add("potential_preconsent_tracking")
+    if ctx["tracking_cookies"]:
+        ctx.flags.add("potential_preconsent_tracking")
+        if ctx["tracker_vendors"]:
+            ctx.facts["tracker_vendors"] = ctx["tracker_vendors"]
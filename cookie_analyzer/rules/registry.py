@@ -0,0 +1,218 @@
+"""
+Rule registry for the cookie analyzer.
+
+Rules are plain functions registered with @rule, each declaring the derived
+features it reads. Features are registered with @feature and computed at
+most once per input, however many rules use them; one provider may fill
+several related features in a single pass over the input. The engine runs every
+enabled rule in registration order (ui_rules, cookie_rules,
+deception_rules), so flags and facts come out exactly as before. Rules
+listed in COOKIE_DISABLED_RULES (comma-separated names) start disabled.
+
+Per-rule call counts, hit counts and time are recorded when instrumentation
+is on (COOKIE_RULE_STATS=1 or set_instrumentation(True)). They are
+per-process, so each bulk-analysis worker keeps its own. Separately,
+run_rules can fill a per-call `timings` dict with the time spent in each
+rule module.
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from cookie_analyzer.core.domains import registrable_domain
+from cookie_analyzer.core.identifiers import score_identifiers
+from cookie_analyzer.core.schemas import CookieAnalyzerInput
+from cookie_analyzer.rules.consent_rules import tracking_vendor
+
+
+@dataclass
+class Rule:
+    name: str
+    func: Callable[["RuleContext"], None]
+    needs: Tuple[str, ...] = ()
+    enabled: bool = True
+    group: str = ""  # defining module, e.g. "ui_rules"
+
+
+@dataclass
+class RuleStats:
+    calls: int = 0
+    hits: int = 0
+    total_ns: int = 0
+
+
+# feature name -> (provider, names the provider returns, in order)
+FEATURES: Dict[str, Tuple[Callable[["RuleContext"], Any], Tuple[str, ...]]] = {}
+RULES: List[Rule] = []
+STATS: Dict[str, RuleStats] = {}
+_active: List[Callable[["RuleContext"], None]] = []
+
+_instrumented = os.getenv("COOKIE_RULE_STATS", "") not in ("", "0")
+_disabled = {n.strip() for n in os.getenv("COOKIE_DISABLED_RULES", "").split(",") if n.strip()}
+
+
+def feature(*names: str):
+    """
+    Register a provider for one or more derived features. With several
+    names the provider returns a tuple of values in the same order.
+    """
+    def register(func):
+        for name in names:
+            FEATURES[name] = (func, names)
+        return func
+    return register
+
+
+def rule(name: str, needs: Tuple[str, ...] = ()):
+    """Register a rule; it may add flags/facts to the context it is given."""
+    def register(func):
+        for n in needs:
+            if n not in FEATURES:
+                raise ValueError(f"rule {name!r} needs unknown feature {n!r}")
+        RULES.append(Rule(
+            name=name,
+            func=func,
+            needs=tuple(needs),
+            enabled=name not in _disabled,
+            group=func.__module__.rpartition(".")[2],
+        ))
+        STATS[name] = RuleStats()
+        if name not in _disabled:
+            _active.append(func)
+        return func
+    return register
+
+
+class RuleContext:
+    """One input, its lazily computed features, and the flags/facts found so far."""
+
+    def __init__(self, data: CookieAnalyzerInput, features: Optional[Dict[str, Any]] = None):
+        self.data = data
+        self.flags: Set[str] = set()
+        self.facts: Dict[str, Any] = {}
+        # Callers may pass precomputed feature values (e.g. bulk workers).
+        self._features: Dict[str, Any] = dict(features or {})
+
+    def __getitem__(self, name: str) -> Any:
+        features = self._features
+        if name not in features:
+            provider, names = FEATURES[name]
+            if len(names) == 1:
+                features[name] = provider(self)
+            else:
+                features.update(zip(names, provider(self)))
+        return features[name]
+
+
+def set_instrumentation(on: bool) -> None:
+    global _instrumented
+    _instrumented = on
+
+
+def set_enabled(name: str, enabled: bool) -> None:
+    for r in RULES:
+        if r.name == name:
+            r.enabled = enabled
+            _active[:] = [r.func for r in RULES if r.enabled]
+            return
+    raise KeyError(name)
+
+
+def run_rules(ctx: RuleContext, timings: Optional[Dict[str, float]] = None) -> None:
+    """`timings`, if given, receives milliseconds per rule module (group)."""
+    if not _instrumented and timings is None:
+        for func in _active:
+            func(ctx)
+        return
+
+    perf_ns = time.perf_counter_ns
+    for r in RULES:
+        if not r.enabled:
+            continue
+        before = len(ctx.flags)
+        t0 = perf_ns()
+        r.func(ctx)
+        elapsed = perf_ns() - t0
+        if timings is not None:
+            timings[r.group] = timings.get(r.group, 0.0) + elapsed / 1e6
+        if _instrumented:
+            stats = STATS[r.name]
+            stats.total_ns += elapsed
+            stats.calls += 1
+            if len(ctx.flags) > before:
+                stats.hits += 1
+
+
+def rule_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Calls, hits (calls that added a flag) and time per rule. A shared
+    feature's cost is counted against the first rule that reads it.
+    """
+    out = {}
+    for r in RULES:
+        s = STATS[r.name]
+        out[r.name] = {
+            "enabled": r.enabled,
+            "needs": list(r.needs),
+            "calls": s.calls,
+            "hits": s.hits,
+            "total_ms": round(s.total_ns / 1e6, 3),
+            "mean_us": round(s.total_ns / s.calls / 1e3, 3) if s.calls else 0.0,
+        }
+    return out
+
+
+def reset_stats() -> None:
+    for name in STATS:
+        STATS[name] = RuleStats()
+
+
+# --- shared features ---
+
+NONESSENTIAL_LABELS = {"analytics", "marketing"}
+
+
+@feature("nonessential_prechecked", "analytics_prechecked", "claims_essential_only")
+def _category_features(ctx: RuleContext) -> Tuple[bool, bool, bool]:
+    nonessential = analytics = essential = False
+    for c in ctx.data.consent_ui.categories:
+        if c.prechecked:
+            label = c.label.lower()
+            if label in NONESSENTIAL_LABELS:
+                nonessential = True
+                analytics = analytics or label == "analytics"
+        if not essential and "essential" in c.description.lower():
+            essential = True
+    return nonessential, analytics, essential
+
+
+@feature("third_party_domains", "max_retention_days")
+def _cookie_features(ctx: RuleContext) -> Tuple[List[str], int]:
+    site = registrable_domain(ctx.data.site_domain)
+    third_party = set()
+    max_retention = 0
+    for c in ctx.data.cookies:
+        if registrable_domain(c.domain) != site:
+            third_party.add(c.domain)
+        if c.expiry_days > max_retention:
+            max_retention = c.expiry_days
+    return sorted(third_party), max_retention
+
+
+@feature("tracking_cookies", "tracker_vendors")
+def _tracking_features(ctx: RuleContext) -> Tuple[List[str], List[str]]:
+    tracking = []
+    vendors = set()
+    for c in ctx.data.cookies:
+        vendor = tracking_vendor(c.name, c.domain)
+        if vendor is not None:
+            tracking.append(c.name)
+            if vendor:
+                vendors.add(vendor)
+    return tracking, sorted(vendors)
+
+
+@feature("identifier_scores")
+def _identifier_scores(ctx: RuleContext) -> List[float]:
+    return score_identifiers([c.value for c in ctx.data.cookies])
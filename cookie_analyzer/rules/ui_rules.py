@@ -1,48 +1,41 @@
-from typing import Set
-from cookie_analyzer.core.schemas import ConsentUI
+"""
+Deterministic checks on the consent UI structure.
+"""
+from cookie_analyzer.rules.registry import RuleContext, rule
 
 
-def run_ui_checks(consent_ui: ConsentUI, flags: Set[str]) -> None:
-    """
-    Run deterministic checks on the consent UI structure.
-    Mutates the flags set in-place.
-    """
-
-    _check_asymmetric_choice(consent_ui, flags)
-    _check_forced_consent(consent_ui, flags)
-    _check_hidden_preferences(consent_ui, flags)
-    _check_prechecked_nonessential(consent_ui, flags)
-
-
-def _check_asymmetric_choice(consent_ui: ConsentUI, flags: Set[str]) -> None:
+@rule("asymmetric_choice")
+def _check_asymmetric_choice(ctx: RuleContext) -> None:
     """
     Flag if rejecting cookies requires more user effort than accepting.
     """
+    consent_ui = ctx.data.consent_ui
     if consent_ui.accept_clicks < consent_ui.reject_clicks:
-        flags.add("asymmetric_choice")
+        ctx.flags.add("asymmetric_choice")
 
 
-def _check_forced_consent(consent_ui: ConsentUI, flags: Set[str]) -> None:
+@rule("forced_consent")
+def _check_forced_consent(ctx: RuleContext) -> None:
     """
     Flag if consent is required to proceed on the site.
     """
-    if consent_ui.consent_required_to_proceed:
-        flags.add("forced_consent")
+    if ctx.data.consent_ui.consent_required_to_proceed:
+        ctx.flags.add("forced_consent")
 
 
-def _check_hidden_preferences(consent_ui: ConsentUI, flags: Set[str]) -> None:
+@rule("hidden_preferences")
+def _check_hidden_preferences(ctx: RuleContext) -> None:
     """
     Flag if users cannot easily access cookie preferences.
     """
-    if not consent_ui.manage_preferences_visible:
-        flags.add("hidden_preferences")
+    if not ctx.data.consent_ui.manage_preferences_visible:
+        ctx.flags.add("hidden_preferences")
 
 
-def _check_prechecked_nonessential(consent_ui: ConsentUI, flags: Set[str]) -> None:
+@rule("prechecked_nonessential", needs=("nonessential_prechecked",))
+def _check_prechecked_nonessential(ctx: RuleContext) -> None:
     """
     Flag if non-essential categories (analytics/marketing) are pre-enabled.
     """
-    for category in consent_ui.categories:
-        label = category.label.lower()
-        if label in {"analytics", "marketing"} and category.prechecked:
-            flags.add("prechecked_nonessential")
+    if ctx["nonessential_prechecked"]:
+        ctx.flags.add("prechecked_nonessential")
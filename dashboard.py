@@ -1,5 +1,8 @@
+import os
+from datetime import date
 import streamlit as st
 import pandas as pd
+import requests
 
 # ---------------- CONFIG ----------------
 st.set_page_config(
@@ -7,52 +10,68 @@ st.set_page_config(
     layout="wide",
 )
 
-# ---------------- SAMPLE DATA ----------------
+# ---------------- DATA ----------------
+# History comes from the backend's /history API (needs MONGO_URI set there).
+# Everything is memoized with a TTL, so reruns from widget clicks are
+# served from the cache; only a TTL expiry or a page not seen yet reaches
+# the backend.
+API_URL = os.getenv("PLAINSIGHT_API", "http://localhost:8000").rstrip("/")
+CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+PAGE_SIZE = 25
+
 USER = {
     "name": "Alex",
     "email": "alex@example.com",
     "privacy_mode": "Balanced",
 }
 
-HISTORY = [
-    {
-        "site": "amazon.com",
-        "category": "Shopping",
-        "risk_level": "Medium",
-        "score": 5,
-        "summary": "Collects device and purchase data. Shares with partners for analytics.",
-        "takeaways": [
-            "Device and purchase data is collected",
-            "Data may be shared with third parties",
-            "Retention period is not clearly stated"
-        ]
-    },
-    
-    {
-        "site": "linkedin.com",
-        "category": "Social",
-        "risk_level": "High",
-        "score": 8,
-        "summary": "Extensive tracking and third-party sharing. Retention and deletion rights unclear.",
-        "takeaways": [
-            "Tracks user activity across sessions",
-            "Shares data with advertisers and partners",
-            "Deletion rights are unclear"
-        ]
-    },
-    {
-        "site": "notion.so",
-        "category": "Productivity",
-        "risk_level": "Low",
-        "score": 2,
-        "summary": "Minimal data collection with clear user controls.",
-        "takeaways": [
-            "Collects minimal account information",
-            "No aggressive tracking detected",
-            "User controls are clearly described"
-        ]
-    }
-]
+
+@st.cache_resource
+def http_session():
+    return requests.Session()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_summary():
+    resp = http_session().get(f"{API_URL}/history/summary", timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_rollup(dim, start=None, limit=10):
+    params = {"limit": limit}
+    if start:
+        params["start"] = start
+    resp = http_session().get(f"{API_URL}/history/rollups/{dim}", params=params, timeout=10)
+    resp.raise_for_status()
+    return {row["key"]: row["n"] for row in resp.json()["counts"]}
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_page(cursor, risk_level, category):
+    params = {"limit": PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    if risk_level != "All":
+        params["risk_level"] = risk_level
+    if category != "All":
+        params["category"] = category
+    resp = http_session().get(f"{API_URL}/history", params=params, timeout=10)
+    resp.raise_for_status()
+    page = resp.json()
+
+    df = pd.DataFrame([
+        {
+            "Website": h["site"],
+            "Category": h["category"],
+            "Risk": f'{risk_emoji(h["risk_level"])} {h["risk_level"]}',
+            "Score": f'{h["score"]}/10',
+            "Analyzed": h["created_at"][:10],
+        }
+        for h in page["items"]
+    ])
+    return page, df
 
 # ---------------- HELPERS ----------------
 def risk_emoji(level):
@@ -68,39 +87,82 @@ st.caption("Your Privacy Risk Dashboard")
 
 st.markdown("---")
 
+try:
+    summary = fetch_summary()
+except requests.RequestException as e:
+    st.error(f"Could not load history from {API_URL}: {e}")
+    st.stop()
+
 # ---------------- OVERVIEW CARDS ----------------
-total = len(HISTORY)
-high = sum(1 for x in HISTORY if x["risk_level"] == "High")
-medium = sum(1 for x in HISTORY if x["risk_level"] == "Medium")
-low = sum(1 for x in HISTORY if x["risk_level"] == "Low")
+risk = summary["risk_levels"]
 
 c1, c2, c3, c4 = st.columns(4)
 
-c1.metric("Sites Analyzed", total)
-c2.metric("High Risk", high, delta=None)
-c3.metric("Medium Risk", medium, delta=None)
-c4.metric("Low Risk", low, delta=None)
+c1.metric("Sites Analyzed", summary["total"])
+c2.metric("High Risk", risk.get("High", 0), delta=None)
+c3.metric("Medium Risk", risk.get("Medium", 0), delta=None)
+c4.metric("Low Risk", risk.get("Low", 0), delta=None)
+
+month_start = date.today().replace(day=1).isoformat()
+try:
+    month_risk = fetch_rollup("policy_risk", start=month_start)
+    trackers = fetch_rollup("tracker")
+except requests.RequestException:
+    month_risk, trackers = {}, {}
+
+m1, m2 = st.columns(2)
+m1.metric("High Risk This Month", month_risk.get("High", 0))
+m2.metric("Sites Analyzed This Month", sum(month_risk.values()))
+
+if trackers:
+    st.markdown("### Most Common Trackers")
+    st.bar_chart(pd.DataFrame({"Sites": trackers}))
+
+if summary["categories"]:
+    st.markdown("### By Category")
+    by_category = pd.DataFrame(
+        [{"Category": c["category"], **c["risk_levels"]} for c in summary["categories"]]
+    ).set_index("Category")
+    st.bar_chart(by_category[["High", "Medium", "Low"]])
 
 st.markdown("---")
 
 # ---------------- ACTIVITY / HISTORY ----------------
 st.subheader("Privacy Activity")
 
-df = pd.DataFrame([
-    {
-        "Website": h["site"],
-        "Category": h["category"],
-        "Risk": f'{risk_emoji(h["risk_level"])} {h["risk_level"]}',
-        "Score": f'{h["score"]}/10'
-    }
-    for h in HISTORY
-])
-
-st.dataframe(df, use_container_width=True, hide_index=True)
+f1, f2 = st.columns(2)
+risk_filter = f1.selectbox("Risk", ["All", "High", "Medium", "Low"])
+category_filter = f2.selectbox("Category", ["All"] + [c["category"] for c in summary["categories"]])
+
+# Cursors of the pages before the current one; reset when a filter changes.
+filters = (risk_filter, category_filter)
+if st.session_state.get("filters") != filters:
+    st.session_state.filters = filters
+    st.session_state.cursors = [None]
+
+try:
+    page, df = fetch_page(st.session_state.cursors[-1], risk_filter, category_filter)
+except requests.RequestException as e:
+    st.error(f"Could not load history from {API_URL}: {e}")
+    st.stop()
+
+if df.empty:
+    st.info("No analyzed sites yet.")
+else:
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+n1, n2, n3 = st.columns([1, 1, 4])
+if n1.button("← Newer", disabled=len(st.session_state.cursors) == 1):
+    st.session_state.cursors.pop()
+    st.rerun()
+if n2.button("Older →", disabled=page["next_cursor"] is None):
+    st.session_state.cursors.append(page["next_cursor"])
+    st.rerun()
+n3.caption(f"Page {len(st.session_state.cursors)}")
 
 st.markdown("### Details")
 
-for h in HISTORY:
+for h in page["items"]:
     with st.expander(f'{risk_emoji(h["risk_level"])} {h["site"]} — {h["risk_level"]} ({h["score"]}/10)'):
         st.markdown(f"**Summary:** {h['summary']}")
         st.markdown("**Key Takeaways:**")
@@ -116,7 +178,7 @@ p1, p2 = st.columns(2)
 p1.write(f"**Name:** {USER['name']}")
 p1.write(f"**Email:** {USER['email']}")
 p2.write(f"**Privacy Mode:** {USER['privacy_mode']}")
-p2.write("**Last Scan:** Today")
+p2.write(f"**Last Scan:** {(summary['last_analyzed'] or '—')[:10]}")
 
 st.markdown("---")
 
@@ -14,15 +14,11 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
     return true; // async response
   }
 
-  // 🔹 Fetch PDF as bytes
-  if (msg.type === "FETCH_PDF") {
-    fetch(msg.url)
-      .then(res => res.arrayBuffer())
-      .then(buffer => {
-        sendResponse({
-          bytes: Array.from(new Uint8Array(buffer))
-        });
-      })
+  // 🔹 Analyze a PDF policy: the file goes to the backend as-is and is
+  //    parsed there page by page, so it never passes through the side panel
+  if (msg.type === "ANALYZE_PDF") {
+    analyzePDF(msg.url, msg.captured_at)
+      .then(policyOut => sendResponse({ policyOut }))
       .catch(err => sendResponse({ error: err.message }));
 
     return true;
@@ -39,3 +35,52 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
 });
 
 
+
+
+// ================= PDF POLICY =================
+const BACKEND = "http://localhost:8000";
+
+async function sha256Hex(buffer) {
+  const digest = await crypto.subtle.digest("SHA-256", buffer);
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, "0")).join("");
+}
+
+async function analyzePDF(url, capturedAt) {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`PDF fetch ${res.status}`);
+  const blob = await res.blob();
+
+  // Same conditional upload as text policies: the hash is over the file's
+  // bytes, and an unchanged PDF is answered without sending it.
+  try {
+    const check = await fetch(`${BACKEND}/policy/analyze/hash`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        url,
+        captured_at: capturedAt,
+        content_hash: await sha256Hex(await blob.arrayBuffer())
+      })
+    });
+    if (check.ok) {
+      const hit = await check.json();
+      if (hit.status === "hit") return hit;
+    }
+  } catch (e) {
+    // fall through to the upload
+  }
+
+  const params = new URLSearchParams({ url, captured_at: capturedAt });
+  const upload = await fetch(`${BACKEND}/policy/analyze/pdf?${params}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/pdf" },
+    body: blob
+  });
+
+  if (!upload.ok) {
+    const txt = await upload.text();
+    throw new Error(`Backend ${upload.status}: ${txt}`);
+  }
+
+  return await upload.json();
+}
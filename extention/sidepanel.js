@@ -1,7 +1,3 @@
-// ================= PDF.js SETUP =================
-pdfjsLib.GlobalWorkerOptions.workerSrc =
-  chrome.runtime.getURL("lib/pdf/pdf.worker.js");
-
 // ================= DOM ELEMENTS =================
 const btn = document.getElementById("readText");
 const output = document.getElementById("output");
@@ -128,43 +124,32 @@ function fetchHTML(url, domCookies, browserCookies, cmpInfo) {
         return;
       }
 
-      const parser = new DOMParser();
-      const doc = parser.parseFromString(response.html, "text/html");
-      const text = doc.body.innerText;
-
-      buildAndRenderJSON(url, text, domCookies, browserCookies, cmpInfo);
+      // The backend extracts the policy from the page's HTML itself,
+      // leaving out menus, banners and footers.
+      const meta = { url, captured_at: new Date().toISOString() };
+      renderAnalysis(url, () => runPolicySummariser(meta, response.html), domCookies, browserCookies, cmpInfo);
     }
   );
 }
 
 // ================= PDF POLICY =================
+// The background worker uploads the PDF to the backend, which extracts the
+// text itself; the side panel only gets the analysis back.
 function fetchPDF(url, domCookies, browserCookies, cmpInfo) {
-  chrome.runtime.sendMessage(
-    { type: "FETCH_PDF", url },
-    async response => {
-      if (!response || response.error) {
-        output.innerHTML = "<li>Error loading PDF</li>";
-        return;
-      }
-
-      try {
-        const uint8Array = new Uint8Array(response.bytes);
-        const pdf = await pdfjsLib.getDocument({ data: uint8Array }).promise;
-
-        let text = "";
-
-        for (let i = 1; i <= pdf.numPages; i++) {
-          const page = await pdf.getPage(i);
-          const content = await page.getTextContent();
-          text += content.items.map(item => item.str).join(" ") + "\n\n";
+  const analyzePolicy = () => new Promise((resolve, reject) => {
+    chrome.runtime.sendMessage(
+      { type: "ANALYZE_PDF", url, captured_at: new Date().toISOString() },
+      response => {
+        if (!response || response.error) {
+          reject(new Error(response?.error || "Error loading PDF"));
+        } else {
+          resolve(response.policyOut);
         }
-
-        buildAndRenderJSON(url, text, domCookies, browserCookies, cmpInfo);
-      } catch (err) {
-        output.innerHTML = `<li>PDF parse error: ${err.message}</li>`;
       }
-    }
-  );
+    );
+  });
+
+  renderAnalysis(url, analyzePolicy, domCookies, browserCookies, cmpInfo);
 }
 
 // ================= CMP DETECTION =================
@@ -197,11 +182,48 @@ async function getCMPInfo(tabId) {
 
   return result;
 }
-async function runPolicySummariser(policyJSON) {
-  const res = await fetch("http://localhost:8000/policy/analyze", {
+// ================= POLICY UPLOAD =================
+// The hash is taken over the UTF-8 bytes of the page, as the backend does.
+async function sha256Hex(text) {
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, "0")).join("");
+}
+
+async function gzip(text) {
+  const stream = new Blob([text]).stream().pipeThrough(new CompressionStream("gzip"));
+  return await new Response(stream).arrayBuffer();
+}
+
+async function runPolicySummariser(meta, html) {
+  // 1. Hash only: if the backend's last capture of this URL had exactly
+  //    this page, it answers from that and the page is never sent.
+  try {
+    const check = await fetch("http://localhost:8000/policy/analyze/hash", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ ...meta, content_hash: await sha256Hex(html) })
+    });
+    if (check.ok) {
+      const hit = await check.json();
+      if (hit.status === "hit") return hit;
+    }
+  } catch (e) {
+    // fall through to the full upload
+  }
+
+  // 2. Full upload, gzip-compressed (browsers have no zstd CompressionStream).
+  const headers = { "Content-Type": "text/html; charset=utf-8" };
+  let body = html;
+  if (typeof CompressionStream !== "undefined") {
+    body = await gzip(body);
+    headers["Content-Encoding"] = "gzip";
+  }
+
+  const params = new URLSearchParams(meta);
+  const res = await fetch(`http://localhost:8000/policy/analyze/html?${params}`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(policyJSON)
+    headers,
+    body
   });
 
   if (!res.ok) {
@@ -372,15 +394,9 @@ async function runCookieAnalyzer(cookiePayload) {
 
 
 
-// ================= BUILD JSON + RENDER =================
-async function buildAndRenderJSON(url, text, domCookies, browserCookies, cmpInfo) {
-
-  // 🔹 Policy payload
-  const policyJSON = {
-    url: url,
-    raw_text: text,
-    captured_at: new Date().toISOString()
-  };
+// ================= RENDER =================
+// analyzePolicy: async () => policy analysis (HTML or PDF route)
+async function renderAnalysis(url, analyzePolicy, domCookies, browserCookies, cmpInfo) {
 
   // 🔹 Cookie analyzer payload (MATCHES BACKEND SCHEMA)
   const cookieAnalyzerPayload = buildCookieAnalyzerPayload(
@@ -394,7 +410,7 @@ async function buildAndRenderJSON(url, text, domCookies, browserCookies, cmpInfo
   // --- POLICY ---
   let policyOut = null;
   try {
-    policyOut = await runPolicySummariser(policyJSON);
+    policyOut = await analyzePolicy();
   } catch (e) {
     policyOut = { error: String(e.message || e) };
   }
@@ -1,18 +1,104 @@
 import argparse
 import json
-from dotenv import load_dotenv
+import os
+import sys
 
-from src.pipeline.run_pipeline import run_policy_pipeline
-from src.pipeline.types import PolicyInput
+# The pipeline modules are imported by the mode that needs them, so a
+# single-file run never loads the batch machinery and vice versa.
+
+def load_env():
+    """
+    Load the nearest .env above this file, as load_dotenv() would; when
+    there is none, python-dotenv is not imported at all.
+    """
+    d = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(d, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(d)
+        if parent == d:
+            return
+        d = parent
+
+def prewarm():
+    """Import the batch stages and compile their regexes before the pool forks."""
+    import gc
+    from src.pipeline import patterns, run_pipeline  # noqa: F401
+
+    patterns.prewarm()
+    gc.freeze()  # keep the collector from touching (and copying) inherited objects
+
+def run_batch(args):
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    from src.pipeline.batch import analyze_batch, read_jsonl
+    from src.pipeline.openrouter_client import async_client_from_env
+
+    if args.preload:
+        prewarm()
+
+    async def _run():
+        llm = async_client_from_env()
+        stats = {}
+        try:
+            with ProcessPoolExecutor(max_workers=args.workers) as pool, \
+                    open(args.inp, "r", encoding="utf-8") as fin, \
+                    open(args.out, "w", encoding="utf-8") as fout:
+                async for result in analyze_batch(
+                    read_jsonl(fin),
+                    executor=pool,
+                    llm=llm,
+                    llm_concurrency=args.llm_concurrency,
+                    stats=stats,
+                ):
+                    fout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        finally:
+            stats["llm"] = llm.stats()
+            await llm.aclose()
+        return stats
+
+    stats = asyncio.run(_run())
+    print(
+        f" Wrote {stats['docs']} results to {args.out} "
+        f"in {stats['seconds']}s ({stats['docs_per_sec']} docs/sec)",
+        file=sys.stderr,
+    )
+    llm = stats["llm"]
+    if llm["calls"]:
+        print(
+            f" LLM: {llm['ok']}/{llm['calls']} answered, {llm['retries']} retries, "
+            f"{llm['short_circuited']} skipped (breaker {llm['breaker']['state']})",
+            file=sys.stderr,
+        )
 
 def main():
-    load_dotenv()
+    load_env()
 
     ap = argparse.ArgumentParser()
-    ap.add_argument("--in", dest="inp", required=True, help="Input JSON file")
-    ap.add_argument("--out", dest="out", required=True, help="Output JSON file")
+    ap.add_argument("--in", dest="inp", required=True, help="Input JSON file (JSONL with --batch)")
+    ap.add_argument("--out", dest="out", required=True, help="Output JSON file (JSONL with --batch)")
+    ap.add_argument("--batch", action="store_true", help="Read one policy per line and stream one result per line")
+    ap.add_argument("--workers", type=int, help="Processes for the deterministic stages (--batch; default: POLICY_BATCH_WORKERS or CPU count)")
+    ap.add_argument("--llm-concurrency", type=int, help="Max in-flight LLM calls (--batch; default: POLICY_BATCH_LLM_CONCURRENCY or 4)")
+    ap.add_argument("--preload", action="store_true", help="Compile everything before forking the workers, which then share it (--batch)")
     args = ap.parse_args()
 
+    if args.batch:
+        from src.pipeline.batch import default_workers, default_llm_concurrency
+
+        args.workers = args.workers or default_workers()
+        args.llm_concurrency = args.llm_concurrency or default_llm_concurrency()
+        run_batch(args)
+        return
+
+    from src.pipeline.run_pipeline import run_policy_pipeline
+    from src.pipeline.types import PolicyInput
+
     with open(args.inp, "r", encoding="utf-8") as f:
         raw = json.load(f)
 
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, Optional
+
+from .types import PolicyInput
+from .clean import clean_text
+from .cache import PolicyCache, cache_key
+from .openrouter_client import AsyncOpenRouterClient
+from .run_pipeline import _analyze_deterministic, _merge_llm, _build_result
+
+
+def _clean_job(raw_text: str) -> tuple[str, float]:
+    """Runs in a worker process: cleaning only, which the cache key needs."""
+    t0 = time.perf_counter()
+    cleaned = clean_text(raw_text)
+    return cleaned, time.perf_counter() - t0
+
+
+def _deterministic_job(cleaned: str) -> tuple[dict, float]:
+    """Runs in a worker process: scan + score on a cache miss, no I/O."""
+    t0 = time.perf_counter()
+    analysis = _analyze_deterministic(cleaned)
+    return analysis, time.perf_counter() - t0
+
+
+async def read_jsonl(lines) -> AsyncIterator[Optional[PolicyInput]]:
+    """
+    Turn JSONL lines (sync or async iterable of str/bytes) into PolicyInputs.
+    Blank lines are skipped; a line that isn't a JSON object becomes None.
+    """
+    async def _lines():
+        if hasattr(lines, "__aiter__"):
+            async for line in lines:
+                yield line
+        else:
+            for line in lines:
+                yield line
+
+    async for line in _lines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line)
+            yield PolicyInput(
+                url=raw.get("url", ""),
+                title=raw.get("title", ""),
+                raw_text=raw.get("raw_text", ""),
+                captured_at=raw.get("captured_at")
+            )
+        except (ValueError, AttributeError):
+            yield None
+
+
+async def _analyze_one(
+    inp: PolicyInput,
+    executor: Executor,
+    llm: AsyncOpenRouterClient,
+    llm_slots: asyncio.Semaphore,
+    cache: Optional[PolicyCache],
+) -> dict:
+    t0 = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    cleaned, det_s = await loop.run_in_executor(executor, _clean_job, inp.raw_text)
+
+    key = cache_key(cleaned, llm.model) if cache is not None else None
+    analysis = await cache.aget(key) if key is not None else None
+
+    llm_s = 0.0
+    if analysis is None:
+        async def _llm():
+            nonlocal llm_s
+            t1 = time.perf_counter()
+            async with llm_slots:
+                out = await llm.write_takeaways(cleaned)
+            llm_s = time.perf_counter() - t1
+            return out
+
+        # scan + score only on a miss, alongside the LLM call
+        (deterministic, scan_s), llm_out = await asyncio.gather(
+            loop.run_in_executor(executor, _deterministic_job, cleaned),
+            _llm(),
+        )
+        det_s += scan_s
+
+        analysis, cacheable = _merge_llm(deterministic, llm_out)
+        if key is not None and cacheable:
+            cache.set(key, analysis)
+
+    result = _build_result(inp, analysis)
+    result["timings_ms"] = {
+        "deterministic": round(det_s * 1000, 2),
+        "llm": round(llm_s * 1000, 2),
+        "total": round((time.perf_counter() - t0) * 1000, 2),
+    }
+    return result
+
+
+async def analyze_batch(
+    inputs: AsyncIterator[Optional[PolicyInput]],
+    executor: Executor,
+    llm: AsyncOpenRouterClient,
+    llm_concurrency: int = 4,
+    max_pending: int = 64,
+    cache: Optional[PolicyCache] = None,
+    stats: Optional[dict] = None,
+) -> AsyncIterator[dict]:
+    """
+    Analyze a stream of policies, yielding results in input order.
+
+    Deterministic stages run on `executor` (normally a process pool); at most
+    `llm_concurrency` LLM calls are in flight at once, and at most
+    `max_pending` documents are held in memory. A None input (see
+    read_jsonl) yields an error record in its place. If `stats` is given it is
+    filled with docs / seconds / docs_per_sec when the stream ends.
+    """
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    pending: deque = deque()
+    started = time.perf_counter()
+    done = 0
+
+    async def _drain_one():
+        nonlocal done
+        index, task = pending.popleft()
+        try:
+            result = await task
+        except Exception as e:
+            result = {"error": repr(e)}
+        result["index"] = index
+        done += 1
+        return result
+
+    index = 0
+    async for inp in inputs:
+        if inp is None:
+            task = asyncio.ensure_future(_invalid())
+        else:
+            task = asyncio.ensure_future(_analyze_one(inp, executor, llm, llm_slots, cache))
+        pending.append((index, task))
+        index += 1
+
+        # Emit finished results as soon as everything before them is done.
+        while pending and (len(pending) >= max_pending or pending[0][1].done()):
+            yield await _drain_one()
+
+    while pending:
+        yield await _drain_one()
+
+    if stats is not None:
+        elapsed = time.perf_counter() - started
+        stats["docs"] = done
+        stats["seconds"] = round(elapsed, 3)
+        stats["docs_per_sec"] = round(done / elapsed, 2) if elapsed > 0 else 0.0
+
+
+async def _invalid() -> dict:
+    return {"error": "invalid JSON line"}
+
+
+def default_workers() -> int:
+    return int(os.getenv("POLICY_BATCH_WORKERS", str(os.cpu_count() or 1)))
+
+
+def default_llm_concurrency() -> int:
+    return int(os.getenv("POLICY_BATCH_LLM_CONCURRENCY", "4"))
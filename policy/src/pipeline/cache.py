@@ -0,0 +1,137 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Bump whenever cleaning, sectioning, signal patterns, scoring or prompts change
+# in a way that alters results, so stale cache entries stop matching.
+PIPELINE_VERSION = "2"
+
+
+def cache_key(cleaned: str, model: str) -> str:
+    h = hashlib.sha256()
+    h.update(f"{PIPELINE_VERSION}\0{model}\0".encode("utf-8"))
+    h.update(cleaned.encode("utf-8"))
+    return h.hexdigest()
+
+
+class PolicyCache:
+    """
+    Bounded in-memory LRU with a TTL, optionally backed by a SQLite file so
+    entries survive restarts. Values must be JSON-serialisable dicts; get()
+    returns a copy, so callers may modify what they get back. Inside an
+    event loop use aget(), which reads the SQLite file in a worker thread.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+
+        self._mem: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "sets": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS policy_results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM policy_results WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self._get_mem(key)
+        if value is None and self._db is not None:
+            value = self._get_disk(key)
+        return copy.deepcopy(value)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        value = self._get_mem(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._get_disk, key)
+        return copy.deepcopy(value)
+
+    def _get_mem(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= time.time():
+                    self._mem.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._mem[key]
+                self._stats["expired"] += 1
+            if self._db is None:
+                self._stats["misses"] += 1
+            return None
+
+    def _get_disk(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM policy_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                if row[1] >= time.time():
+                    value = json.loads(row[0])
+                    self._put_mem(key, row[1], value)
+                    self._stats["disk_hits"] += 1
+                    return value
+                self._db.execute("DELETE FROM policy_results WHERE key = ?", (key,))
+                self._db.commit()
+                self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._put_mem(key, expires_at, value)
+            self._stats["sets"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO policy_results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+                self._db.commit()
+
+    def _put_mem(self, key: str, expires_at: float, value: dict) -> None:
+        self._mem[key] = (expires_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            out: dict[str, Any] = dict(self._stats)
+            out["entries"] = len(self._mem)
+            out["max_entries"] = self.max_entries
+            out["ttl_seconds"] = self.ttl_seconds
+            out["disk"] = self.db_path
+            lookups = out["hits"] + out["disk_hits"] + out["misses"]
+            out["hit_rate"] = round((out["hits"] + out["disk_hits"]) / lookups, 4) if lookups else 0.0
+            return out
+
+
+def cache_from_env() -> PolicyCache:
+    """
+    POLICY_CACHE_SIZE  max in-memory entries (default 1024)
+    POLICY_CACHE_TTL   seconds an entry stays valid (default 86400)
+    POLICY_CACHE_DB    optional SQLite file for the on-disk tier
+    """
+    return PolicyCache(
+        max_entries=int(os.getenv("POLICY_CACHE_SIZE", "1024")),
+        ttl_seconds=float(os.getenv("POLICY_CACHE_TTL", "86400")),
+        db_path=os.getenv("POLICY_CACHE_DB") or None,
+    )
@@ -1,27 +1,86 @@
-import re
+from typing import Iterable, Iterator, Union
 
-def clean_text(text: str) -> str:
-    t = (text or "").replace("\r", "\n")
-    t = re.sub(r"[ \t]+", " ", t)
-    t = re.sub(r"\n{3,}", "\n\n", t)
+from . import patterns
 
-    lines = [ln.strip() for ln in t.split("\n")]
-    out = []
+MAX_CHARS = 120_000
+
+NAV_LINES = {"home", "about", "contact", "login", "sign up", "privacy", "terms", "cookies"}
+
+# (spaces/tabs, one line), compiled on first use, see patterns.py
+patterns.register("clean", lambda: (patterns.compile(r"[ \t]+"), patterns.compile(r"[^\r\n]+")))
+
+
+def _iter_raw_lines(source: Union[str, Iterable[str]], max_chars: int = MAX_CHARS) -> Iterator[str]:
+    """
+    Yield the non-empty \\r/\\n-separated lines of `source` one at a time.
+    `source` is either a whole string or an iterable of string chunks (a line
+    may span chunks). Nothing larger than one line is ever copied. A line
+    still open after `max_chars` characters is kept with its spaces
+    collapsed; once that reaches `max_chars` it is yielded as it stands and
+    reading stops, since that line alone fills iter_clean_lines' budget.
+    """
+    spaces, line = patterns.get("clean")
+    if isinstance(source, str):
+        for m in line.finditer(source):
+            yield m.group()
+        return
+
+    partial: list[str] = []
+    size = 0
+    for chunk in source:
+        cut = max(chunk.rfind("\n"), chunk.rfind("\r"))
+        if cut == -1:
+            partial.append(chunk)
+            size += len(chunk)
+            if size > max_chars:
+                head = spaces.sub(" ", "".join(partial)).lstrip()
+                if len(head.rstrip()) >= max_chars:
+                    yield head
+                    return
+                partial, size = [head], len(head)
+            continue
+
+        head = chunk[:cut]
+        if partial:
+            partial.append(head)
+            head = "".join(partial)
+            partial, size = [], 0
+        for m in line.finditer(head):
+            yield m.group()
+
+        if cut + 1 < len(chunk):
+            partial.append(chunk[cut + 1:])
+            size = len(chunk) - cut - 1
+
+    if partial:
+        yield from _iter_raw_lines("".join(partial))
+
+
+def iter_clean_lines(source: Union[str, Iterable[str]], max_chars: int = MAX_CHARS) -> Iterator[str]:
+    """
+    Single pass over `source`: collapse spaces/tabs, strip, drop short and
+    navigation lines and immediate duplicates. Stops reading as soon as the
+    lines produced so far fill `max_chars` once joined with "\\n".
+    """
+    spaces = patterns.get("clean")[0]
+    total = -1  # no separator before the first line
     last = None
-    for ln in lines:
+    for raw in _iter_raw_lines(source, max_chars):
+        ln = spaces.sub(" ", raw).strip()
         if len(ln) < 3:
             continue
-        low = ln.lower()
-        if low in {"home", "about", "contact", "login", "sign up", "privacy", "terms", "cookies"}:
+        if ln.lower() in NAV_LINES:
             continue
-        if last is not None and ln == last:
+        if ln == last:
             continue
-        out.append(ln)
+
+        yield ln
         last = ln
 
-    cleaned = "\n".join(out).strip()
+        total += len(ln) + 1
+        if total >= max_chars:
+            return
 
-    if len(cleaned) > 120_000:
-        cleaned = cleaned[:120_000]
 
-    return cleaned
+def clean_text(text: Union[str, Iterable[str], None]) -> str:
+    return "\n".join(iter_clean_lines(text or ""))[:MAX_CHARS]
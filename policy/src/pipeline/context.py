@@ -0,0 +1,132 @@
+"""
+The part of a policy that goes into the LLM prompt.
+
+Sending the first N characters keeps the preamble and loses retention and
+user rights, which most policies put last. pack_context() fills a token
+budget with the paragraphs that say the most instead:
+
+1. coverage: for every signal and data category the policy mentions, the
+   paragraph that mentions the most things at once along with it
+2. then the remaining paragraphs of each risk section in turn, best first,
+   so that no section takes the whole budget
+
+Cleaned text is one paragraph per line, and every line is classified and
+scanned as classify_chunk() and scan_signals() would
+(split_into_sections/extract_signals at paragraph level), in one pass per
+pattern over the whole text.
+Picked paragraphs keep their original order; "[...]" marks left-out text.
+The result depends only on (text, budget), and recent results are kept,
+so retries and repeat calls do not pack again.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from .section import classify_lines
+from .signals import scan_lines
+
+DEFAULT_CONTEXT_TOKENS = 2000
+CHARS_PER_TOKEN = 4
+GAP = "[...]"
+
+# order in which sections take turns for the budget left after coverage
+SECTION_ORDER = [
+    "data_collection", "third_party_sharing", "cookies_tracking", "retention",
+    "user_rights", "data_usage", "security", "other",
+]
+
+_CACHE_SIZE = 256
+_packed: "OrderedDict[Tuple[bytes, int], str]" = OrderedDict()
+# prompts are built on several threads at once; packing runs outside the lock
+_packed_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English prose)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _select(paragraphs: List[str], budget: int) -> Dict[int, str]:
+    """Index -> text (possibly cut) of the paragraphs to send, within `budget` tokens."""
+    low = "\n".join(paragraphs).lower()
+    hits = scan_lines(low)
+    sections = classify_lines(low)
+    # more distinct hits first, then longer (more context), then earlier
+    rank = sorted(range(len(paragraphs)), key=lambda i: (-len(hits[i]), -len(paragraphs[i]), i))
+
+    chosen: Dict[int, str] = {}
+    left = budget
+
+    def take(i: int) -> bool:
+        nonlocal left
+        cost = estimate_tokens(paragraphs[i]) + 1  # the newline, and a gap marker at most
+        if cost <= left:
+            chosen[i] = paragraphs[i]
+        elif not chosen and left > 1:
+            # a first paragraph larger than the whole budget is cut, not skipped
+            chosen[i] = paragraphs[i][:(left - 1) * CHARS_PER_TOKEN]
+            cost = left
+        else:
+            return False
+        left -= cost
+        return True
+
+    covered = set()
+    for i in rank:
+        new = set(hits[i]) - covered
+        if new and take(i):
+            covered |= new
+
+    queues = {sec: [i for i in rank if sections[i] == sec and i not in chosen] for sec in SECTION_ORDER}
+    for i in rank:
+        queues.setdefault(sections[i], [])
+    while left > 1 and any(queues.values()):
+        for sec, queue in queues.items():
+            while queue:
+                if take(queue.pop(0)):
+                    break
+
+    return chosen
+
+
+def pack_context(cleaned: str, budget_tokens: int = DEFAULT_CONTEXT_TOKENS) -> str:
+    """
+    At most about `budget_tokens` tokens of `cleaned` (clean_text output)
+    for the prompt; the text itself when it fits.
+    """
+    if estimate_tokens(cleaned) <= budget_tokens:
+        return cleaned
+
+    key = (hashlib.blake2b(cleaned.encode("utf-8"), digest_size=16).digest(), budget_tokens)
+    with _packed_lock:
+        packed = _packed.get(key)
+        if packed is not None:
+            _packed.move_to_end(key)
+            return packed
+
+    paragraphs = cleaned.split("\n")
+    chosen = _select(paragraphs, budget_tokens)
+    out = []
+    last = -1
+    for i in sorted(chosen):
+        if i != last + 1:
+            out.append(GAP)
+        out.append(chosen[i])
+        last = i
+    if last != len(paragraphs) - 1:
+        out.append(GAP)
+    packed = "\n".join(out)
+
+    with _packed_lock:
+        _packed[key] = packed
+        _packed.move_to_end(key)
+        if len(_packed) > _CACHE_SIZE:
+            _packed.popitem(last=False)
+    return packed
+
+
+def context_tokens_from_env() -> int:
+    """POLICY_CONTEXT_TOKENS  token budget for the policy text in the LLM prompt (default 2000)"""
+    return int(os.getenv("POLICY_CONTEXT_TOKENS", str(DEFAULT_CONTEXT_TOKENS)))
@@ -0,0 +1,322 @@
+"""
+Policy text from raw HTML, without the page around it.
+
+The page is parsed as it streams in (html.parser, stdlib) and cut into
+blocks: paragraphs, headings, list items, cells. Markup that is never
+policy text (scripts, styles, <nav>, <aside>, <footer>, forms) is skipped
+whole. So are elements with a navigation or dialog role, or an id or class
+token naming a consent banner, breadcrumbs, a sidebar, share or newsletter
+box, unless they hold more than SKIP_MAX_BYTES of text: a policy page
+wrapped in <div class="cookie-banner"> is still a policy. <body>, <main>
+and <article> are never skipped by attribute. The remaining blocks are
+judged by text density, as jusText and boilerpipe do:
+
+- a block mostly made of link text is boilerplate (menus, link lists)
+- a block of LONG_BLOCK characters or more with little link text is content
+- anything in between (headings, short list items, captions) is kept when
+  the run of such blocks it belongs to touches content on either side, so
+  "Email address" under "We collect:" stays and a copyright line between
+  two link lists goes; a heading also needs content after it
+
+Only one such run is ever buffered. Kept blocks come out one per line,
+ready for clean_text, and `stats` reports how much text was dropped.
+
+Until FALLBACK_BYTES of text are kept, nothing is yielded and the text of
+every block is held as well. A page that ends before that, keeping under
+FALLBACK_SHARE of it, comes out as all of that text instead (stats
+"fallback"): a short policy is better read with its menus than not at all.
+"""
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from . import patterns
+
+LONG_BLOCK = 70
+MAX_LINK_DENSITY = 0.5
+
+# never text, or never policy text
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe", "object", "head",
+    "nav", "aside", "footer", "form", "button", "select", "textarea",
+}
+# skipped elements whose text a reader would never have seen
+INVISIBLE_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "object", "head"}
+SKIP_ROLES = {"navigation", "banner", "contentinfo", "dialog", "alertdialog", "menu", "menubar", "search"}
+
+BLOCK_TAGS = {
+    "p", "div", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th",
+    "section", "article", "main", "header", "blockquote", "pre", "address",
+    "figure", "figcaption", "caption", "details", "summary", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# never skipped for their role, id or class
+CONTAINER_TAGS = {"html", "body", "main", "article"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+SKIP_MAX_BYTES = 4096
+FALLBACK_BYTES = 2048
+FALLBACK_SHARE = 0.2
+
+# Boilerplate id or class token, compiled on first use, see patterns.py.
+# Whole tokens only: "has-sidebar" or "cookie-consent-policy" are not
+# boilerplate. Consent vendors also use their name as a prefix
+# (onetrust-banner-sdk, CybotCookiebotDialog).
+patterns.register("extract", lambda: patterns.compile(
+    r"(?:cybot)?(?:onetrust|cookiebot|didomi|usercentrics|qc-cmp2?|truste|osano|iubenda)(?:[-_][\w-]*|dialog\w*)?|"
+    r"cookie-?(?:banner|bar|consent|popup)|consent-?(?:banner|manager|modal|popup)|"
+    r"breadcrumbs?|sidebar|newsletter|(?:social|share)-?(?:bar|buttons|icons|links)|skip-?link",
+    re.IGNORECASE,
+))
+
+# (text, link characters, is heading, in a skipped element)
+Block = Tuple[str, int, bool, bool]
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+class _BlockParser(HTMLParser):
+    """
+    Cuts a page into text blocks, leaving out elements skipped by tag.
+    Blocks of an element skipped by attribute are held back until it ends
+    and then come out marked as skipped, or come out as usual once they
+    pass SKIP_MAX_BYTES.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[Block] = []
+        self.skipped_bytes = 0  # visible text inside elements skipped by tag
+        self._banner = patterns.get("extract")
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._held_tag: Optional[str] = None
+        self._held_depth = 0
+        self._held: List[Block] = []
+        self._held_bytes = 0
+        self._parts: List[str] = []
+        self._link_chars = 0
+        self._in_link = 0
+        self._heading = 0
+
+    def _boilerplate(self, tag: str, attrs) -> bool:
+        if tag in CONTAINER_TAGS:
+            return False
+        for name, value in attrs:
+            if not value:
+                continue
+            if name == "role" and value.strip().lower() in SKIP_ROLES:
+                return True
+            if name in ("id", "class") and any(self._banner.fullmatch(token) for token in value.split()):
+                return True
+        return False
+
+    def _flush(self) -> None:
+        if not self._parts:
+            return
+        text = " ".join("".join(self._parts).split())
+        if text:
+            block = (text, min(self._link_chars, len(text)), self._heading > 0, False)
+            if self._held_tag is None:
+                self.blocks.append(block)
+            else:
+                self._held.append(block)
+                self._held_bytes += _utf8_len(text)
+                if self._held_bytes > SKIP_MAX_BYTES:
+                    # too much text for a banner or a sidebar
+                    self.blocks.extend(self._held)
+                    self._release()
+        self._parts = []
+        self._link_chars = 0
+
+    def _release(self) -> None:
+        self._held_tag = None
+        self._held = []
+        self._held_bytes = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in VOID_TAGS:
+            pass
+        elif tag in SKIP_TAGS:
+            self._flush()
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        elif tag == self._held_tag:
+            self._held_depth += 1
+        elif self._held_tag is None and self._boilerplate(tag, attrs):
+            self._flush()
+            self._held_tag, self._held_depth = tag, 1
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in HEADINGS:
+            self._heading += 1
+        elif tag == "a":
+            self._in_link += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self._skip_tag is None and tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag == self._held_tag:
+            self._held_depth -= 1
+            if self._held_depth == 0:
+                self._flush()
+                if self._held_tag is not None:
+                    self.blocks.extend((text, links, heading, True) for text, links, heading, _ in self._held)
+                    self._release()
+        if tag in HEADINGS:
+            self._heading = max(0, self._heading - 1)
+        elif tag == "a":
+            self._in_link = max(0, self._in_link - 1)
+
+    def handle_data(self, data):
+        if self._skip_tag is not None:
+            if self._skip_tag not in INVISIBLE_TAGS:
+                self.skipped_bytes += _utf8_len(" ".join(data.split()))
+            return
+        self._parts.append(data)
+        if self._in_link:
+            self._link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        self._flush()
+        # an element left open holds the rest of the page
+        self.blocks.extend((text, links, heading, True) for text, links, heading, _ in self._held)
+        self._release()
+
+
+def _is_content(block: Block) -> Optional[bool]:
+    """True: content, False: boilerplate, None: depends on the neighbours."""
+    text, link_chars, heading, _ = block
+    if link_chars > MAX_LINK_DENSITY * len(text):
+        return False
+    if len(text) >= LONG_BLOCK and not heading:
+        return True
+    return None
+
+
+def iter_html_text(
+    source: Union[str, Iterable[str]],
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    The content blocks of the HTML in `source` (a string or string chunks),
+    each ending in a newline. `stats`, if given, is kept up to date with
+    html_bytes (read), text_bytes (visible text seen), kept_bytes,
+    dropped_bytes (text_bytes - kept_bytes), blocks / blocks_dropped and
+    fallback, so it is complete once iteration ends and partial if it is
+    stopped.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(
+        html_bytes=0, text_bytes=0, kept_bytes=0, dropped_bytes=0, blocks=0, blocks_dropped=0, fallback=False,
+    )
+
+    parser = _BlockParser()
+    run: List[Block] = []  # undecided blocks since the last decided one
+    after_content = False
+    # until FALLBACK_BYTES are kept: the kept text, and the text of every block
+    pending: Optional[List[str]] = []
+    seen: List[str] = []
+
+    def drop(blocks: List[Block]) -> None:
+        for block in blocks:
+            stats["dropped_bytes"] += _utf8_len(block[0])
+        stats["blocks_dropped"] += len(blocks)
+
+    def end_run() -> List[Block]:
+        """The run when no content follows it: kept after content, minus trailing headings."""
+        keep = len(run) if after_content else 0
+        while keep and run[keep - 1][2]:
+            keep -= 1
+        drop(run[keep:])
+        return run[:keep]
+
+    def judge(blocks: List[Block]) -> List[str]:
+        nonlocal run, after_content
+        # text of skipped elements (menus, banners, footers) is dropped as it is seen
+        stats["text_bytes"] += parser.skipped_bytes
+        stats["dropped_bytes"] += parser.skipped_bytes
+        parser.skipped_bytes = 0
+        kept: List[Block] = []
+        for block in blocks:
+            stats["blocks"] += 1
+            stats["text_bytes"] += _utf8_len(block[0])
+            if pending is not None:
+                seen.append(block[0])
+            if block[3]:
+                drop([block])
+                continue
+            verdict = _is_content(block)
+            if verdict is None:
+                run.append(block)
+                continue
+            if verdict:
+                kept.extend(run)
+                kept.append(block)
+            else:
+                kept.extend(end_run())
+                drop([block])
+            run = []
+            after_content = verdict
+        texts = [block[0] for block in kept]
+        stats["kept_bytes"] += sum(_utf8_len(text) for text in texts)
+        return texts
+
+    def ready(texts: List[str]) -> List[str]:
+        """What may be yielded now that `texts` are kept."""
+        nonlocal pending
+        if pending is None:
+            return texts
+        pending.extend(texts)
+        if stats["kept_bytes"] < FALLBACK_BYTES:
+            return []
+        texts, pending = pending, None
+        seen.clear()
+        return texts
+
+    chunks = [source] if isinstance(source, str) else source
+    for chunk in chunks:
+        stats["html_bytes"] += _utf8_len(chunk)
+        parser.feed(chunk)
+        blocks, parser.blocks = parser.blocks, []
+        for text in ready(judge(blocks)):
+            yield text + "\n"
+
+    parser.close()
+    tail = judge(parser.blocks)
+    last = [block[0] for block in end_run()]
+    stats["kept_bytes"] += sum(_utf8_len(text) for text in last)
+    if pending is not None:
+        everything = sum(_utf8_len(text) for text in seen)
+        if stats["kept_bytes"] < FALLBACK_SHARE * everything:
+            # extraction kept almost nothing: better the page's plain text
+            stats.update(fallback=True, kept_bytes=everything, dropped_bytes=stats["text_bytes"] - everything)
+            stats["blocks_dropped"] = 0
+            tail, last = seen, []
+        else:
+            tail = pending + tail
+    for text in tail + last:
+        yield text + "\n"
+
+
+def extract_text(html: str, stats: Optional[Dict[str, Any]] = None) -> str:
+    return "".join(iter_html_text(html, stats))
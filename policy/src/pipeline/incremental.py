@@ -0,0 +1,279 @@
+"""
+Change detection for re-captured policies.
+
+Each analysed policy leaves a snapshot keyed by URL: a hash of the raw text
+and, for every paragraph (line) of the cleaned text, a fingerprint, its
+section and which signals / data categories it mentions. On re-capture only
+new paragraphs are classified and scanned. Signal and data patterns never
+span a line, so OR-ing per-paragraph hits gives exactly the whole-text
+result. The LLM is only asked again when an added or removed paragraph sits
+in a risk-relevant section or a signal changes. A byte-identical
+re-capture is answered from the snapshot alone, which lookup_unchanged()
+does from the raw text's hash, before any text is sent; except when the
+snapshot holds the deterministic fallback and a key is configured, so the
+LLM gets another try.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections import Counter
+from typing import Iterable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .types import PolicyInput
+from .clean import clean_text
+from .section import classify_chunk
+from .signals import SIGNAL_PATTERNS, DATA_PATTERNS, scan_signals, scan_data_collected
+from .cache import PolicyCache, PIPELINE_VERSION, cache_key
+from .openrouter_client import AsyncOpenRouterClient
+from .run_pipeline import _analysis_from_signals, _merge_llm, _build_result, _timed
+
+RISK_SECTIONS = {"data_collection", "third_party_sharing", "retention", "user_rights", "cookies_tracking"}
+
+_SIGNAL_NAMES = [name for name, _ in SIGNAL_PATTERNS]
+_DATA_LABELS = [label for label, _ in DATA_PATTERNS]
+
+# paragraphs listed per side of the diff; the counts are always complete
+MAX_LISTED = 20
+PREVIEW_CHARS = 160
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _fingerprint(paragraph: str) -> str:
+    return hashlib.blake2b(paragraph.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _snapshot_key(url: str) -> str:
+    # scheme and host are case-insensitive; path and query are not
+    parts = urlsplit((url or "").strip())
+    userinfo, at, host = parts.netloc.rpartition("@")
+    url = urlunsplit(parts._replace(scheme=parts.scheme.lower(), netloc=userinfo + at + host.lower()))
+    return f"snapshot:{PIPELINE_VERSION}:{url}"
+
+
+def _scan_paragraph(paragraph: str) -> list:
+    """[fingerprint, section, signal bits, data bits, preview]"""
+    low = paragraph.lower()
+    signals = scan_signals(low)
+    data = set(scan_data_collected(low))
+    sig_bits = sum(1 << i for i, name in enumerate(_SIGNAL_NAMES) if signals[name])
+    data_bits = sum(1 << i for i, label in enumerate(_DATA_LABELS) if label in data)
+    return [_fingerprint(paragraph), classify_chunk(low), sig_bits, data_bits, paragraph[:PREVIEW_CHARS]]
+
+
+def _rescan(cleaned: str, previous: Optional[list]) -> tuple[list, list, list]:
+    """
+    Per-paragraph records for `cleaned`, reusing `previous` records whose
+    fingerprint is unchanged. Returns (records, added, removed).
+    """
+    known = {rec[0]: rec for rec in previous or []}
+
+    records = []
+    for paragraph in cleaned.split("\n") if cleaned else []:
+        fp = _fingerprint(paragraph)
+        rec = known.get(fp)
+        records.append(rec if rec is not None else _scan_paragraph(paragraph))
+
+    before = Counter(rec[0] for rec in previous or [])
+    after = Counter(rec[0] for rec in records)
+    added_fps = after - before
+    removed_fps = before - after
+
+    added = []
+    for rec in records:
+        if added_fps[rec[0]] > 0:
+            added_fps[rec[0]] -= 1
+            added.append(rec)
+    removed = []
+    for rec in previous or []:
+        if removed_fps[rec[0]] > 0:
+            removed_fps[rec[0]] -= 1
+            removed.append(rec)
+
+    return records, added, removed
+
+
+def _aggregate(records: list) -> tuple[dict, list[str]]:
+    sig_bits = 0
+    data_bits = 0
+    for rec in records:
+        sig_bits |= rec[2]
+        data_bits |= rec[3]
+    signals = {name: bool(sig_bits >> i & 1) for i, name in enumerate(_SIGNAL_NAMES)}
+    data = sorted(label for i, label in enumerate(_DATA_LABELS) if data_bits >> i & 1)
+    return signals, data
+
+
+def _describe(records: list) -> list[dict]:
+    return [{"section": rec[1], "text": rec[4]} for rec in records[:MAX_LISTED]]
+
+
+def _build_changes(prev: Optional[dict], snapshot: dict, added: list, removed: list, llm_rerun: bool) -> dict:
+    if prev is None:
+        return {"status": "new", "llm_rerun": llm_rerun}
+
+    before, after = prev["signals"], snapshot["signals"]
+    prev_data, data = set(prev["data_collected"]), set(snapshot["data_collected"])
+
+    return {
+        "status": "changed" if added or removed or prev["content_hash"] != snapshot["content_hash"] else "unchanged",
+        "previous_captured_at": prev.get("captured_at"),
+        "paragraphs": {
+            "added": len(added),
+            "removed": len(removed),
+            "unchanged": len(snapshot["paragraphs"]) - len(added),
+        },
+        "sections_changed": sorted({rec[1] for rec in added + removed}),
+        "added": _describe(added),
+        "removed": _describe(removed),
+        "signals_changed": {
+            name: {"before": before[name], "after": after[name]}
+            for name in _SIGNAL_NAMES if before[name] != after[name]
+        },
+        "data_collected": {"added": sorted(data - prev_data), "removed": sorted(prev_data - data)},
+        "risk_score": {
+            "before": prev["analysis"]["policy_risk_score"],
+            "after": snapshot["analysis"]["policy_risk_score"],
+        },
+        "llm_rerun": llm_rerun,
+    }
+
+
+def _reusable(prev: dict) -> bool:
+    """Whether an identical re-capture may be answered with prev's analysis."""
+    # the fallback is not pinned while an LLM is configured (see _merge_llm)
+    return prev["llm"] or not os.getenv("OPENROUTER_API_KEY")
+
+
+def _unchanged_result(inp: PolicyInput, prev: dict) -> dict:
+    result = _build_result(inp, prev["analysis"])
+    result["changes"] = {
+        "status": "unchanged",
+        "previous_captured_at": prev.get("captured_at"),
+        "paragraphs": {"added": 0, "removed": 0, "unchanged": len(prev["paragraphs"])},
+        "llm_rerun": False,
+    }
+    return result
+
+
+async def lookup_unchanged(
+    inp: PolicyInput,
+    raw_hash: str,
+    snapshots: PolicyCache,
+    timings: Optional[dict] = None,
+) -> Optional[dict]:
+    """
+    The result run_policy_pipeline_incremental would give for a capture of
+    inp.url whose raw text has sha256 `raw_hash` (hex, of the UTF-8 bytes),
+    when that is the text of the URL's last capture; None when the text
+    itself is needed. inp.raw_text is not read.
+    """
+    t = time.perf_counter()
+    prev = await snapshots.aget(_snapshot_key(inp.url))
+    _timed(timings, "snapshot", t)
+    if prev is None or prev["raw_hash"] != raw_hash or not _reusable(prev):
+        return None
+    return _unchanged_result(inp, prev)
+
+
+async def run_policy_pipeline_incremental(
+    inp: PolicyInput,
+    llm: AsyncOpenRouterClient,
+    snapshots: PolicyCache,
+    cache: Optional[PolicyCache] = None,
+    timings: Optional[dict] = None,
+    source: Optional[Iterable[str]] = None,
+    raw_hash: Optional[str] = None,
+) -> dict:
+    """
+    run_policy_pipeline_async plus a "changes" diff against the last
+    capture of the same URL. `timings`, if given, receives milliseconds per
+    stage: snapshot, clean, scan, score, cache, llm.
+
+    `source` replaces inp.raw_text with text chunks that are pulled only as
+    cleaning needs them (pages of a PDF, see pdf.iter_pdf_text; their
+    extraction counts towards "clean"). `raw_hash` then identifies the
+    original bytes for the unchanged check.
+    """
+    t = time.perf_counter()
+    key = _snapshot_key(inp.url)
+    raw_hash = raw_hash or _sha256(inp.raw_text or "")
+    prev = await snapshots.aget(key)
+    t = _timed(timings, "snapshot", t)
+
+    # Byte-identical re-capture: no cleaning, no regex, no LLM.
+    if prev is not None and prev["raw_hash"] == raw_hash and _reusable(prev):
+        return _unchanged_result(inp, prev)
+
+    cleaned = await asyncio.to_thread(clean_text, inp.raw_text if source is None else source)
+    t = _timed(timings, "clean", t)
+    records, added, removed = await asyncio.to_thread(_rescan, cleaned, prev["paragraphs"] if prev else None)
+    t = _timed(timings, "scan", t)
+
+    signals, data_collected = _aggregate(records)
+    deterministic = _analysis_from_signals(signals, data_collected)
+    t = _timed(timings, "score", t)
+
+    llm_rerun = (
+        prev is None
+        or not prev["llm"]
+        or any(rec[1] in RISK_SECTIONS for rec in added + removed)
+        # a signal can flip from any section; the old risks would be stale
+        or prev["signals"] != signals
+    )
+
+    if llm_rerun:
+        ckey = cache_key(cleaned, llm.model) if cache is not None else None
+        analysis = await cache.aget(ckey) if ckey is not None else None
+        # with a key configured, only LLM-backed analyses are ever cached
+        used_llm = analysis is not None and bool(os.getenv("OPENROUTER_API_KEY"))
+        t = _timed(timings, "cache", t)
+        if analysis is None:
+            llm_out = await llm.write_takeaways(cleaned)
+            t = _timed(timings, "llm", t)
+            used_llm = isinstance(llm_out, dict)
+            analysis, cacheable = _merge_llm(deterministic, llm_out)
+            if ckey is not None and cacheable:
+                cache.set(ckey, analysis)
+                t = _timed(timings, "cache", t)
+    else:
+        # Nothing risk-relevant moved: keep the previous LLM wording, but the
+        # score always follows the current text.
+        analysis = dict(prev["analysis"])
+        analysis["policy_risk_score"] = deterministic["policy_risk_score"]
+        analysis["risk_level"] = deterministic["risk_level"]
+        used_llm = True
+
+    snapshot = {
+        "raw_hash": raw_hash,
+        "content_hash": _sha256(cleaned),
+        "captured_at": inp.captured_at,
+        "paragraphs": records,
+        "signals": signals,
+        "data_collected": data_collected,
+        "analysis": analysis,
+        "llm": used_llm,
+    }
+    snapshots.set(key, snapshot)
+    _timed(timings, "snapshot", t)
+
+    result = _build_result(inp, analysis)
+    result["changes"] = _build_changes(prev, snapshot, added, removed, llm_rerun)
+    return result
+
+
+def snapshots_from_env() -> PolicyCache:
+    """
+    POLICY_SNAPSHOT_SIZE  max URLs kept in memory (default 1024)
+    POLICY_SNAPSHOT_TTL   seconds a snapshot is kept (default 30 days)
+    POLICY_CACHE_DB       shared with the result cache for the on-disk tier
+    """
+    return PolicyCache(
+        max_entries=int(os.getenv("POLICY_SNAPSHOT_SIZE", "1024")),
+        ttl_seconds=float(os.getenv("POLICY_SNAPSHOT_TTL", str(30 * 86400))),
+        db_path=os.getenv("POLICY_CACHE_DB") or None,
+    )
@@ -1,23 +1,36 @@
+import asyncio
+import hashlib
+import json
+import logging
 import os
-import requests
+from typing import Callable, Optional
+
+from .context import DEFAULT_CONTEXT_TOKENS, context_tokens_from_env, pack_context
+from .resilience import CircuitOpen, LLMError, LLMExecutor, executor_from_env
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_MODEL = "openai/gpt-4o-mini"
 
-def openrouter_write_takeaways(
-    cleaned_text: str,
-    model: str = "openai/gpt-4o-mini"
-):
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        return None
+# Calls refused by the open breaker are counted in stats() ("short_circuited")
+# and only logged at debug level: a brownout refuses every call.
+logger = logging.getLogger(__name__)
 
-    headers = {
+
+def _endpoint() -> str:
+    # Read at call time so the CLI's load_dotenv() and test stubs can point it elsewhere.
+    return os.getenv("OPENROUTER_URL", OPENROUTER_URL)
+
+
+def _headers(api_key: str) -> dict:
+    return {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
         "HTTP-Referer": "http://localhost",
         "X-Title": "PolicyPipeline"
     }
 
+
+def _build_payload(cleaned_text: str, model: str, context_tokens: int) -> dict:
     system_prompt = (
         "You analyze website privacy policies.\n"
         "Keep it short and precise.\n"
@@ -27,7 +40,8 @@ def openrouter_write_takeaways(
     )
 
     user_prompt = f"""
-    Analyze the following privacy policy text.
+    Analyze the following privacy policy text. Parts of it may have been
+    left out; "[...]" marks where.
 
     Return JSON with EXACT keys:
     - summary_simple: string (3 sentences)
@@ -42,10 +56,10 @@ def openrouter_write_takeaways(
     - Plain English
 
     Policy text:
-    \"\"\"{cleaned_text[:12000]}\"\"\"
+    \"\"\"{pack_context(cleaned_text, context_tokens)}\"\"\"
     """.strip()
 
-    payload = {
+    return {
         "model": model,
         "messages": [
             {"role": "system", "content": system_prompt},
@@ -54,21 +68,168 @@ def openrouter_write_takeaways(
         "temperature": 0.3
     }
 
-    try:
-        r = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=30)
-        r.raise_for_status()
-        data = r.json()
 
-        content = data["choices"][0]["message"]["content"].strip()
+def _parse_response(data: dict) -> Optional[dict]:
+    content = data["choices"][0]["message"]["content"].strip()
 
-        import json
-        start = content.find("{")
-        end = content.rfind("}")
-        if start == -1 or end == -1:
-            return None
+    start = content.find("{")
+    end = content.rfind("}")
+    if start == -1 or end == -1:
+        return None
+
+    return json.loads(content[start:end+1])
+
+
+# Rate limit, retries and breaker for the sync path, created on first use.
+_sync_executor: Optional[LLMExecutor] = None
+
+
+def openrouter_write_takeaways(
+    cleaned_text: str,
+    model: str = DEFAULT_MODEL,
+    context_tokens: Optional[int] = None,
+):
+    global _sync_executor
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return None
+
+    payload = _build_payload(cleaned_text, model, context_tokens or context_tokens_from_env())
+
+    import requests  # only the CLI's sync path needs it; slow to import
 
-        return json.loads(content[start:end+1])
+    if _sync_executor is None:
+        _sync_executor = executor_from_env()
+    timeout = float(os.getenv("OPENROUTER_TIMEOUT", "30"))
+    try:
+        r = _sync_executor.run_sync(
+            lambda: requests.post(_endpoint(), headers=_headers(api_key), json=payload, timeout=timeout)
+        )
+        return _parse_response(r.json())
 
+    except CircuitOpen as e:
+        logger.debug("OPENROUTER: %s", e)
+        return None
+    except LLMError as e:
+        print("OPENROUTER:", e)
+        return None
     except Exception as e:
         print("OPENROUTER ERROR:", repr(e))
         return None
+
+
+class AsyncOpenRouterClient:
+    """
+    asyncio counterpart of openrouter_write_takeaways for the FastAPI backend.
+
+    - one pooled keep-alive httpx.AsyncClient for every call
+    - concurrent calls for the same text share a single in-flight request
+    - latency_budget (seconds) caps how long a caller waits; on a miss the
+      caller gets None and falls back to the deterministic takeaways, while
+      the request itself keeps running for anyone else still waiting on it
+    - context_tokens bounds the policy text in the prompt, see context.py
+    - every call goes through `executor` (rate limit, retries with backoff,
+      circuit breaker, see resilience.py); stats() reports on it
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 30.0,
+        latency_budget: Optional[float] = None,
+        max_connections: int = 20,
+        context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        executor: Optional[LLMExecutor] = None,
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.context_tokens = context_tokens
+        self.timeout = timeout
+        self.latency_budget = latency_budget
+        self.max_connections = max_connections
+        self.executor = executor or LLMExecutor()
+
+        self._client = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def write_takeaways(self, cleaned_text: str) -> Optional[dict]:
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            return None
+
+        # packing a long policy scans it again; keep that off the event loop
+        payload = await asyncio.to_thread(_build_payload, cleaned_text, self.model, self.context_tokens)
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post(api_key, payload))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        try:
+            if self.latency_budget is None:
+                return await asyncio.shield(task)
+            return await asyncio.wait_for(asyncio.shield(task), self.latency_budget)
+        except asyncio.TimeoutError:
+            print("OPENROUTER: latency budget exceeded, using deterministic takeaways")
+            return None
+
+    async def _post(self, api_key: str, payload: dict) -> Optional[dict]:
+        url = self.base_url or _endpoint()
+        try:
+            r = await self.executor.run(lambda: self._http().post(url, headers=_headers(api_key), json=payload))
+            return _parse_response(r.json())
+
+        except CircuitOpen as e:
+            logger.debug("OPENROUTER: %s", e)
+            return None
+        except LLMError as e:
+            print("OPENROUTER:", e)
+            return None
+        except Exception as e:
+            print("OPENROUTER ERROR:", repr(e))
+            return None
+
+    def stats(self) -> dict:
+        return {**self.executor.stats(), "in_flight": len(self._inflight)}
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def async_client_from_env(observer: Optional[Callable[[str, float], None]] = None) -> AsyncOpenRouterClient:
+    """
+    `observer`, if given, is called with (outcome, seconds) after every
+    HTTP attempt. Rate limit, retry and breaker settings: executor_from_env.
+
+    OPENROUTER_URL              endpoint override (e.g. a local stub server)
+    OPENROUTER_TIMEOUT          per-request HTTP timeout in seconds (default 30)
+    OPENROUTER_LATENCY_BUDGET   max seconds a request waits for the LLM (default: no budget)
+    OPENROUTER_MAX_CONNECTIONS  pooled connection limit (default 20)
+    POLICY_CONTEXT_TOKENS       token budget for the policy text in the prompt (default 2000)
+    """
+    budget = os.getenv("OPENROUTER_LATENCY_BUDGET")
+    return AsyncOpenRouterClient(
+        timeout=float(os.getenv("OPENROUTER_TIMEOUT", "30")),
+        latency_budget=float(budget) if budget else None,
+        max_connections=int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "20")),
+        context_tokens=context_tokens_from_env(),
+        executor=executor_from_env(observer),
+    )
@@ -0,0 +1,49 @@
+"""
+Shared registry of the pipeline's regular expressions.
+
+Modules register a named group of patterns at import, which only stores a
+builder; the group compiles on first use, once per process, and every
+caller shares the result. Identical pattern strings compile once across
+groups. prewarm() builds every registered group up front, so a server that
+forks its workers afterwards (--preload) hands them compiled patterns
+instead of each worker compiling its own.
+"""
+import re
+from typing import Any, Callable, Dict, Tuple
+
+_BUILDERS: Dict[str, Callable[[], Any]] = {}
+_GROUPS: Dict[str, Any] = {}
+_PATTERNS: Dict[Tuple[str, int], re.Pattern] = {}
+
+
+def compile(pattern: str, flags: int = 0) -> re.Pattern:
+    """re.compile, cached without the re module's size limit."""
+    key = (pattern, flags)
+    compiled = _PATTERNS.get(key)
+    if compiled is None:
+        compiled = _PATTERNS[key] = re.compile(pattern, flags)
+    return compiled
+
+
+def register(name: str, build: Callable[[], Any]) -> None:
+    """Register `build`, called with no arguments, as the group `name`."""
+    _BUILDERS[name] = build
+    _GROUPS.pop(name, None)
+
+
+def get(name: str) -> Any:
+    group = _GROUPS.get(name)
+    if group is None:
+        group = _GROUPS[name] = _BUILDERS[name]()
+    return group
+
+
+def prewarm() -> int:
+    """Build every registered group; returns the number of compiled patterns."""
+    for name in _BUILDERS:
+        get(name)
+    return len(_PATTERNS)
+
+
+def stats() -> Dict[str, int]:
+    return {"groups": len(_BUILDERS), "built": len(_GROUPS), "patterns": len(_PATTERNS)}
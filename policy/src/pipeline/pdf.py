@@ -0,0 +1,140 @@
+"""
+Page-by-page text extraction for PDF policies.
+
+iter_pdf_text() spreads page ranges over an executor, keeps at most
+`window` ranges in flight and yields their text in page order. Whoever
+stops iterating early (clean_text does once it has MAX_CHARS) stops
+extraction with it: pages past that point are never parsed. Workers open
+the file by path, so it has to be on disk.
+
+pypdf (pip install cookie-analyzer[pdf]) is handed an open file rather
+than the path, which it would copy whole into memory. It still parses the
+cross-reference table when the reader is created, so each worker thread
+keeps its reader of the last few files (keyed by path, size and mtime)
+for the following page ranges instead of opening the file per range.
+Readers of files that have since been deleted are closed on the next open.
+"""
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+DEFAULT_MAX_PAGES = 300
+PAGES_PER_TASK = 8
+# open readers kept per worker thread
+READERS_PER_WORKER = 2
+
+_local = threading.local()
+
+
+class PdfError(ValueError):
+    """The file is not a PDF pypdf can read (corrupt, encrypted, not a PDF)."""
+
+
+def _open(path: str):
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PyPdfError
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ImportError("PDF policies need pypdf: pip install cookie-analyzer[pdf]")
+
+    f = open(path, "rb")
+    try:
+        reader = PdfReader(f)
+        locked = reader.is_encrypted and not reader.decrypt("")
+    except (PyPdfError, ValueError, KeyError, TypeError) as e:
+        f.close()
+        raise PdfError(f"{type(e).__name__}: {e}") from None
+    except BaseException:
+        f.close()
+        raise
+    if locked:
+        f.close()
+        raise PdfError("encrypted with a password")
+    return reader
+
+
+def _reader(path: str):
+    """This thread's reader of `path`, opened on first use."""
+    readers: "OrderedDict[tuple, Any]" = getattr(_local, "readers", None)
+    if readers is None:
+        readers = _local.readers = OrderedDict()
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    reader = readers.get(key)
+    if reader is not None:
+        readers.move_to_end(key)
+        return reader
+
+    for old in list(readers):
+        if old[0] == path or not os.path.exists(old[0]):
+            readers.pop(old).stream.close()
+    reader = _open(path)
+    readers[key] = reader
+    while len(readers) > READERS_PER_WORKER:
+        readers.popitem(last=False)[1].stream.close()
+    return reader
+
+
+def page_count(path: str) -> int:
+    return len(_reader(path).pages)
+
+
+def extract_pages(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); a page that fails to parse gives ""."""
+    reader = _reader(path)
+    out = []
+    for i in range(start, stop):
+        try:
+            out.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            out.append("")
+    return out
+
+
+def _submit(executor: Optional[Executor], fn: Callable, *args: Any) -> Future:
+    if executor is not None:
+        return executor.submit(fn, *args)
+    future: Future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def iter_pdf_text(
+    path: str,
+    executor: Optional[Executor] = None,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    window: int = 4,
+    pages_per_task: int = PAGES_PER_TASK,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    Text of the first `max_pages` pages, one string per page ending in a
+    newline, extracted on `executor` (inline without one). Blocks on the
+    workers, so run it off the event loop. `stats`, if given, gets "pages"
+    (in the file) and "pages_read" (yielded so far). Raises PdfError.
+    """
+    total = _submit(executor, page_count, path).result()
+    n = min(total, max_pages)
+    if stats is not None:
+        stats.update(pages=total, pages_read=0)
+
+    pending: Deque[Future] = deque()
+    start = 0
+    try:
+        while start < n or pending:
+            while start < n and len(pending) < window:
+                stop = min(start + pages_per_task, n)
+                pending.append(_submit(executor, extract_pages, path, start, stop))
+                start = stop
+            for text in pending.popleft().result():
+                if stats is not None:
+                    stats["pages_read"] += 1
+                yield text + "\n"
+    finally:
+        for future in pending:
+            future.cancel()
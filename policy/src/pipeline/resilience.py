@@ -0,0 +1,317 @@
+"""
+How LLM calls are made: rate limited, retried, and skipped while the
+provider is down.
+
+- TokenBucket: at most `rate` calls per second with bursts of `burst`, per
+  process; callers wait for a token instead of being refused.
+- Retries: 429, 5xx, timeouts and connection errors are retried with
+  exponential backoff and full jitter (a random wait between 0 and
+  base * 2**attempt, capped), or after the server's Retry-After when it
+  sends one. Other 4xx responses are not retried.
+- CircuitBreaker: after `failure_threshold` calls in a row fail even with
+  their retries, calls are refused at once (CircuitOpen) for
+  `reset_timeout` seconds. Then a single probe call goes through and its
+  outcome closes or re-opens the breaker. A call waiting to retry gives
+  up with CircuitOpen once other calls have opened the breaker.
+
+LLMExecutor puts the three together around a transport-agnostic call
+(anything returning an object with .status_code and .headers, as httpx
+and requests responses do) and keeps counters and latencies for stats().
+Callers treat LLMError like any other missing LLM answer and fall back to
+the deterministic takeaways.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 1024
+
+
+class LLMError(Exception):
+    """The call gave no usable response; see the subclasses."""
+
+
+class CircuitOpen(LLMError):
+    pass
+
+
+class RetriesExhausted(LLMError):
+    pass
+
+
+class RequestRejected(LLMError):
+    """A response that retrying will not fix (4xx other than 429)."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how many seconds to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.opened = 0  # times the breaker tripped
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. In half-open, only one probe may."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._state = CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """The call that was allowed ended without saying anything about the provider."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            retry_in = self.reset_timeout - (self._clock() - self._opened_at) if state == OPEN else 0.0
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "retry_in_s": round(max(retry_in, 0.0), 3),
+            }
+
+
+def _retry_after(response) -> Optional[float]:
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # an HTTP date; fall back to the backoff
+
+
+class LLMExecutor:
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 10,
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        observer: Optional[Callable[[str, float], None]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # called with (outcome, seconds) after every attempt, e.g. a histogram
+        self.observer = observer
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.counts = {
+            "calls": 0, "ok": 0, "failed": 0, "rejected": 0, "short_circuited": 0,
+            "attempts": 0, "retries": 0, "throttled_s": 0.0,
+        }
+
+    def _count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counts[name] += n
+
+    def backoff(self, attempt: int, response=None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        after = _retry_after(response)
+        if after is not None:
+            return min(after, self.backoff_max)
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _observe(self, outcome: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+        if self.observer is not None:
+            self.observer(outcome, seconds)
+
+    def _start(self) -> None:
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpen(f"provider unhealthy, retrying in {self.breaker.stats()['retry_in_s']}s")
+
+    def _check_open(self) -> None:
+        """Before a retry: give up if the breaker opened since the call started."""
+        if self.breaker.state == OPEN:
+            self.breaker.release()
+            self._count("short_circuited")
+            raise CircuitOpen(f"breaker opened while retrying, retrying in {self.breaker.stats()['retry_in_s']}s")
+
+    def _outcome(self, response, error: Optional[BaseException]) -> str:
+        if error is not None:
+            return "error"
+        if response.status_code < 400:
+            return "ok"
+        return "retry" if response.status_code in RETRY_STATUS else "rejected"
+
+    def _finish(self, outcome: str, response, error: Optional[BaseException]):
+        """Outcome of the last attempt -> the response, or the matching LLMError."""
+        if outcome == "ok":
+            self.breaker.record(True)
+            self._count("ok")
+            return response
+        if outcome == "rejected":
+            self.breaker.release()
+            self._count("rejected")
+            raise RequestRejected(f"HTTP {response.status_code}")
+        self.breaker.record(False)
+        self._count("failed")
+        detail = repr(error) if error is not None else f"HTTP {response.status_code}"
+        raise RetriesExhausted(f"{self.retries + 1} attempts, last: {detail}")
+
+    async def run(self, call: Callable[[], Awaitable[Any]]):
+        """await call() under the rate limit, retries and breaker; returns its 2xx response."""
+        self._start()
+        try:
+            for attempt in range(self.retries + 1):
+                wait = self.bucket.reserve()
+                if wait:
+                    self._count("throttled_s", wait)
+                    await asyncio.sleep(wait)
+
+                self._count("attempts")
+                response, error = None, None
+                t = time.perf_counter()
+                try:
+                    response = await call()
+                except Exception as e:
+                    error = e
+                outcome = self._outcome(response, error)
+                self._observe(outcome, time.perf_counter() - t)
+
+                if outcome in ("ok", "rejected") or attempt == self.retries:
+                    return self._finish(outcome, response, error)
+                self._check_open()
+                self._count("retries")
+                await asyncio.sleep(self.backoff(attempt, response))
+                self._check_open()
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+    def run_sync(self, call: Callable[[], Any]):
+        """run() for blocking transports (the CLI's requests path)."""
+        self._start()
+        for attempt in range(self.retries + 1):
+            wait = self.bucket.reserve()
+            if wait:
+                self._count("throttled_s", wait)
+                time.sleep(wait)
+
+            self._count("attempts")
+            response, error = None, None
+            t = time.perf_counter()
+            try:
+                response = call()
+            except Exception as e:
+                error = e
+            outcome = self._outcome(response, error)
+            self._observe(outcome, time.perf_counter() - t)
+
+            if outcome in ("ok", "rejected") or attempt == self.retries:
+                return self._finish(outcome, response, error)
+            self._check_open()
+            self._count("retries")
+            time.sleep(self.backoff(attempt, response))
+            self._check_open()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            latencies = sorted(self._latencies)
+
+        def pct(q: float) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+
+        counts["throttled_s"] = round(counts["throttled_s"], 3)
+        return {
+            **counts,
+            "breaker": self.breaker.stats(),
+            "latency_ms": {"samples": len(latencies), "p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+
+def executor_from_env(observer: Optional[Callable[[str, float], None]] = None) -> LLMExecutor:
+    """
+    OPENROUTER_RATE               calls per second, per process (default 5; 0 = unlimited)
+    OPENROUTER_BURST              calls allowed at once above the rate (default 10)
+    OPENROUTER_RETRIES            retries after a 429/5xx/timeout (default 2)
+    OPENROUTER_BACKOFF            first retry's maximum wait in seconds, doubling after (default 0.5)
+    OPENROUTER_BACKOFF_MAX        longest wait between retries (default 8)
+    OPENROUTER_BREAKER_FAILURES   failed calls in a row that open the breaker (default 5)
+    OPENROUTER_BREAKER_RESET      seconds the breaker stays open before a probe (default 30)
+    """
+    return LLMExecutor(
+        rate=float(os.getenv("OPENROUTER_RATE", "5")),
+        burst=int(os.getenv("OPENROUTER_BURST", "10")),
+        retries=int(os.getenv("OPENROUTER_RETRIES", "2")),
+        backoff_base=float(os.getenv("OPENROUTER_BACKOFF", "0.5")),
+        backoff_max=float(os.getenv("OPENROUTER_BACKOFF_MAX", "8")),
+        failure_threshold=int(os.getenv("OPENROUTER_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("OPENROUTER_BREAKER_RESET", "30")),
+        observer=observer,
+    )
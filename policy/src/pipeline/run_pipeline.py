@@ -1,47 +1,152 @@
-from .types import PolicyInput
+import asyncio
+import os
+import time
+from typing import Optional
+
+from .types import PolicyInput, Signals
 from .clean import clean_text
-from .section import split_into_sections
-from .signals import extract_signals, extract_data_collected
+from .signals import scan_policy_text
 from .score import score_policy
 from .takeaways import build_takeaways
-from .openrouter_client import openrouter_write_takeaways
+from .openrouter_client import openrouter_write_takeaways, AsyncOpenRouterClient, DEFAULT_MODEL
 from .risk_labels import risks_and_red_flags
+from .cache import PolicyCache, cache_key
 
 
-def run_policy_pipeline(inp: PolicyInput) -> dict:
-    cleaned = clean_text(inp.raw_text)
-    sections = split_into_sections(cleaned)
+def _is_policy_page(url: str) -> bool:
+    return any(k in (url or "").lower() for k in ["privacy", "terms", "legal", "cookie"])
+
+
+def _timed(timings: Optional[dict], stage: str, t0: float) -> float:
+    """Add the milliseconds since `t0` to timings[stage]; returns the current time."""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (now - t0) * 1000
+    return now
+
 
-    is_policy_page = any(k in (inp.url or "").lower() for k in ["privacy", "terms", "legal", "cookie"])
+def _analyze_deterministic(cleaned: str, timings: Optional[dict] = None) -> dict:
+    """Everything that depends only on the cleaned text, without the LLM."""
+    t = time.perf_counter()
+    signals, data_collected = scan_policy_text(cleaned.lower())
+    t = _timed(timings, "scan", t)
+    analysis = _analysis_from_signals(signals, data_collected)
+    _timed(timings, "score", t)
+    return analysis
 
-    signals = extract_signals(sections)
-    data_collected = extract_data_collected(cleaned)
 
+def _analysis_from_signals(signals: Signals, data_collected: list[str]) -> dict:
     score, level, reasons = score_policy(signals, data_collected)
 
     key_takeaways, summary_simple = build_takeaways(signals, data_collected)
     risks, red_flags = risks_and_red_flags(signals)
 
-    llm = openrouter_write_takeaways(cleaned)
+    return {
+        "summary_simple": summary_simple,
+        "key_takeaways": key_takeaways,
+        "risks": risks,
+        "red_flags": red_flags,
+        "policy_risk_score": score,
+        "risk_level": level,
+    }
 
-    if isinstance(llm, dict):
-        summary_simple = llm.get("summary_simple", summary_simple)
-        key_takeaways = llm.get("key_takeaways", key_takeaways)
-        risks = llm.get("risks", risks)
-        red_flags = llm.get("red_flags", red_flags)
 
+def _merge_llm(analysis: dict, llm) -> tuple[dict, bool]:
+    """
+    Overlay LLM output on the deterministic analysis.
+    Returns the analysis and whether it is safe to cache.
+    """
+    if isinstance(llm, dict):
+        analysis = dict(analysis)
+        analysis["summary_simple"] = llm.get("summary_simple", analysis["summary_simple"])
+        analysis["key_takeaways"] = llm.get("key_takeaways", analysis["key_takeaways"])
+        analysis["risks"] = llm.get("risks", analysis["risks"])
+        analysis["red_flags"] = llm.get("red_flags", analysis["red_flags"])
+        return analysis, True
 
+    # Don't pin the deterministic fallback in the cache when the LLM was
+    # configured but failed or missed its deadline; the next request should
+    # try it again.
+    return analysis, not os.getenv("OPENROUTER_API_KEY")
 
 
+def _build_result(inp: PolicyInput, analysis: dict) -> dict:
     return {
         "url": inp.url,
         "title": inp.title,
-        "is_policy_page": is_policy_page,
-        "summary_simple": summary_simple,
-        "key_takeaways": key_takeaways,
-        "risks": risks,
-        "red_flags": red_flags,
-        "policy_risk_score": score,
-        "risk_level": level,
+        "is_policy_page": _is_policy_page(inp.url),
+        "summary_simple": analysis["summary_simple"],
+        "key_takeaways": analysis["key_takeaways"],
+        "risks": analysis["risks"],
+        "red_flags": analysis["red_flags"],
+        "policy_risk_score": analysis["policy_risk_score"],
+        "risk_level": analysis["risk_level"],
         "captured_at": inp.captured_at,
     }
+
+
+def run_policy_pipeline(
+    inp: PolicyInput,
+    cache: Optional[PolicyCache] = None,
+    timings: Optional[dict] = None,
+) -> dict:
+    """
+    `timings`, if given, receives milliseconds per stage: clean, cache,
+    scan, score, llm.
+    """
+    t = time.perf_counter()
+    cleaned = clean_text(inp.raw_text)
+    t = _timed(timings, "clean", t)
+
+    key = cache_key(cleaned, DEFAULT_MODEL) if cache is not None else None
+    analysis = cache.get(key) if key is not None else None
+    t = _timed(timings, "cache", t)
+
+    if analysis is None:
+        deterministic = _analyze_deterministic(cleaned, timings)
+        t = time.perf_counter()
+        llm_out = openrouter_write_takeaways(cleaned)
+        _timed(timings, "llm", t)
+        analysis, cacheable = _merge_llm(deterministic, llm_out)
+        if key is not None and cacheable:
+            cache.set(key, analysis)
+
+    return _build_result(inp, analysis)
+
+
+async def _timed_llm(llm: AsyncOpenRouterClient, cleaned: str, timings: Optional[dict]):
+    t = time.perf_counter()
+    out = await llm.write_takeaways(cleaned)
+    _timed(timings, "llm", t)
+    return out
+
+
+async def run_policy_pipeline_async(
+    inp: PolicyInput,
+    llm: AsyncOpenRouterClient,
+    cache: Optional[PolicyCache] = None,
+    timings: Optional[dict] = None,
+) -> dict:
+    """
+    Same result as run_policy_pipeline, for use inside an event loop.
+    The CPU-bound stages run in a worker thread; the LLM call goes through
+    the shared async client, concurrently with scan and score.
+    """
+    t = time.perf_counter()
+    cleaned = await asyncio.to_thread(clean_text, inp.raw_text)
+    t = _timed(timings, "clean", t)
+
+    key = cache_key(cleaned, llm.model) if cache is not None else None
+    analysis = await cache.aget(key) if key is not None else None
+    _timed(timings, "cache", t)
+
+    if analysis is None:
+        deterministic, llm_out = await asyncio.gather(
+            asyncio.to_thread(_analyze_deterministic, cleaned, timings),
+            _timed_llm(llm, cleaned, timings),
+        )
+        analysis, cacheable = _merge_llm(deterministic, llm_out)
+        if key is not None and cacheable:
+            cache.set(key, analysis)
+
+    return _build_result(inp, analysis)
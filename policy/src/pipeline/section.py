@@ -1,4 +1,7 @@
-import re
+from bisect import bisect_right
+from typing import Iterator
+
+from . import patterns
 from .types import PolicySections
 
 SECTION_MAP = {
@@ -11,25 +14,99 @@ SECTION_MAP = {
     "security": [r"security", r"protect", r"encryption", r"safeguard"],
 }
 
+# Compiled on first use, see patterns.py. Each entry is a bound .search so
+# the per-chunk loop skips the re module's pattern cache lookup.
+patterns.register("section", lambda: [
+    (sec, [patterns.compile(p).search for p in pats])
+    for sec, pats in SECTION_MAP.items()
+])
+
+
+def classify_chunk(ch_low: str) -> str:
+    """
+    Return the best section for an already-lowercased chunk.
+    Score = number of SECTION_MAP patterns present, ties go to the section
+    listed first, and "other" when nothing matches.
+    """
+    best = "other"
+    best_score = 0
+
+    for sec, searches in patterns.get("section"):
+        # A section can only win with strictly more hits than the current best.
+        if len(searches) <= best_score:
+            continue
+
+        score = 0
+        remaining = len(searches)
+        for search in searches:
+            remaining -= 1
+            if search(ch_low):
+                score += 1
+            elif score + remaining <= best_score:
+                break
+
+        if score > best_score:
+            best_score = score
+            best = sec
+
+    return best
+
+
+def line_starts(text: str) -> list[int]:
+    """Offset of every line of `text`; bisect_right(starts, pos) - 1 is pos's line."""
+    starts = [0]
+    pos = text.find("\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = text.find("\n", pos + 1)
+    return starts
+
+
+def lines_matching(pattern: str, low: str, starts: list[int]) -> Iterator[int]:
+    """Indexes of the lines of `low` (split at `starts`) where `pattern` occurs."""
+    search = patterns.compile(pattern).search
+    pos = 0
+    while (m := search(low, pos)) is not None:
+        line = bisect_right(starts, m.start()) - 1
+        yield line
+        if line + 1 == len(starts):
+            return
+        pos = starts[line + 1]
+
+
+def classify_lines(low: str) -> list[str]:
+    """
+    classify_chunk() of every line of an already-lowercased text, with one
+    pass over the text per pattern instead of one search per line and
+    pattern. Patterns never span lines, so the answers are the same.
+    """
+    starts = line_starts(low)
+    scores = {sec: [0] * len(starts) for sec in SECTION_MAP}
+    for sec, pats in SECTION_MAP.items():
+        counts = scores[sec]
+        for pat in pats:
+            for line in lines_matching(pat, low, starts):
+                counts[line] += 1
+
+    out = []
+    for line in range(len(starts)):
+        best, best_score = "other", 0
+        for sec, counts in scores.items():
+            if counts[line] > best_score:
+                best, best_score = sec, counts[line]
+        out.append(best)
+    return out
+
+
+def split_into_chunks(cleaned: str) -> list[str]:
+    return [c.strip() for c in cleaned.split("\n\n") if c.strip()]
+
+
 def split_into_sections(cleaned: str) -> PolicySections:
-    chunks = [c.strip() for c in cleaned.split("\n\n") if c.strip()]
-    out: PolicySections = {}
-    out["other"] = ""
-
-    for ch in chunks:
-        ch_low = ch.lower()
-        best = "other"
-        best_score = 0
-
-        for sec, pats in SECTION_MAP.items():
-            score = 0
-            for p in pats:
-                if re.search(p, ch_low):
-                    score += 1
-            if score > best_score:
-                best_score = score
-                best = sec
-
-        out[best] = (out.get(best, "") + ch + "\n\n").strip()
-    # remove empty
-    return {k: v for k, v in out.items() if v.strip()}
+    grouped: dict[str, list[str]] = {"other": []}
+
+    for ch in split_into_chunks(cleaned):
+        grouped.setdefault(classify_chunk(ch.lower()), []).append(ch)
+
+    # remove empty; chunks are concatenated back to back, as they always have been
+    return {k: "".join(v) for k, v in grouped.items() if v}
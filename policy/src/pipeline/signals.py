@@ -1,4 +1,6 @@
 import re
+from . import patterns
+from .section import line_starts, lines_matching
 from .types import Signals, PolicySections
 
 DATA_PATTERNS = [
@@ -11,22 +13,110 @@ DATA_PATTERNS = [
     ("Cookies", r"\bcookie\b"),
 ]
 
-def extract_data_collected(text: str):
-    low = text.lower()
-    found = []
+SIGNAL_PATTERNS = [
+    ("mentions_tracking", r"(track|tracking|analytics|advertis)"),
+    ("mentions_third_party_sharing", r"(third party|share(d)? with|partners|advertis|service provider)"),
+    ("mentions_sale_of_data", r"\bsell\b|\bsale of\b"),
+    ("mentions_retention_limit", r"(retain.*\d+ (day|month|year)s?|retention period|we keep.*\d+)"),
+    ("mentions_opt_out", r"(opt[- ]out|withdraw consent|unsubscribe|do not sell)"),
+    ("mentions_deletion_right", r"(delete your data|right to delete|erasure)"),
+]
+
+# Compiled on first use, see patterns.py. The retention signal is handled by
+# _mentions_retention_limit() instead of its regex, see below.
+patterns.register("signals.data", lambda: [
+    (label, patterns.compile(pat).search) for label, pat in DATA_PATTERNS
+])
+patterns.register("signals.signals", lambda: [
+    (name, patterns.compile(pat).search) for name, pat in SIGNAL_PATTERNS if name != "mentions_retention_limit"
+])
+patterns.register("signals.retention", lambda: (
+    patterns.compile(r"\d (?:day|month|year)"),
+    patterns.compile(r"\d"),
+    patterns.compile(r"retention period"),
+))
+
+
+def _after_on_same_line(low: str, word: str, pattern: re.Pattern) -> bool:
+    """True if `pattern` occurs after some `word` on the same line."""
+    pos = low.find(word)
+    while pos != -1:
+        eol = low.find("\n", pos)
+        if eol == -1:
+            eol = len(low)
+        if pattern.search(low, pos + len(word), eol):
+            return True
+        pos = low.find(word, eol)
+    return False
+
+
+def _mentions_retention_limit(low: str) -> bool:
+    """
+    Same answer as the mentions_retention_limit regex. Its greedy ".*"
+    rescans the rest of the line for every "retain" it meets, which is
+    quadratic on long single-line policies; here each line is scanned once,
+    from its first "retain"/"we keep" onwards.
+    """
+    duration, digit, retention_period = patterns.get("signals.retention")
+    return (
+        _after_on_same_line(low, "retain", duration)
+        or retention_period.search(low) is not None
+        or _after_on_same_line(low, "we keep", digit)
+    )
+
+
+def scan_data_collected(low: str) -> list[str]:
+    """extract_data_collected for text that is already lowercased."""
+    return sorted(label for label, search in patterns.get("signals.data") if search(low))
+
+
+def scan_signals(low: str) -> Signals:
+    """extract_signals for text that is already lowercased and joined."""
+    out = {name: bool(search(low)) for name, search in patterns.get("signals.signals")}
+    out["mentions_retention_limit"] = _mentions_retention_limit(low)
+    return {name: out[name] for name, _ in SIGNAL_PATTERNS}
+
+
+def scan_lines(low: str) -> list[list[str]]:
+    """
+    Signal names and data labels found on each line of an already-lowercased
+    text: what scan_signals and scan_data_collected would report for the
+    line, in pattern order. One pass over the text per pattern.
+    """
+    starts = line_starts(low)
+    hits: list[list[str]] = [[] for _ in starts]
+    for name, pat in SIGNAL_PATTERNS:
+        if name == "mentions_retention_limit":
+            # the regex is quadratic on long lines; check candidate lines only
+            lines = set()
+            for word in ("retain", "retention period", "we keep"):
+                lines.update(lines_matching(re.escape(word), low, starts))
+            for line in sorted(lines):
+                end = starts[line + 1] - 1 if line + 1 < len(starts) else len(low)
+                if _mentions_retention_limit(low[starts[line]:end]):
+                    hits[line].append(name)
+            continue
+        for line in lines_matching(pat, low, starts):
+            hits[line].append(name)
     for label, pat in DATA_PATTERNS:
-        if re.search(pat, low):
-            found.append(label)
-    return sorted(set(found))
+        for line in lines_matching(pat, low, starts):
+            hits[line].append(label)
+    return hits
+
+
+def scan_policy_text(low: str) -> tuple[Signals, list[str]]:
+    """
+    Signals and data categories from one lowercased copy of the cleaned text.
+    Gives the same result as extract_signals(split_into_sections(cleaned))
+    plus extract_data_collected(cleaned): cleaned text has no blank lines, so
+    it is a single section and the joined sections equal the text itself.
+    """
+    return scan_signals(low), scan_data_collected(low)
+
+
+def extract_data_collected(text: str):
+    return scan_data_collected(text.lower())
+
 
 def extract_signals(sections: PolicySections) -> Signals:
-    full = "\n".join(sections.values()).lower()
-
-    return {
-        "mentions_tracking": bool(re.search(r"(track|tracking|analytics|advertis)", full)),
-        "mentions_third_party_sharing": bool(re.search(r"(third party|share(d)? with|partners|advertis|service provider)", full)),
-        "mentions_sale_of_data": bool(re.search(r"\bsell\b|\bsale of\b", full)),
-        "mentions_retention_limit": bool(re.search(r"(retain.*\d+ (day|month|year)s?|retention period|we keep.*\d+)", full)),
-        "mentions_opt_out": bool(re.search(r"(opt[- ]out|withdraw consent|unsubscribe|do not sell)", full)),
-        "mentions_deletion_right": bool(re.search(r"(delete your data|right to delete|erasure)", full)),
-    }
+    return scan_signals("\n".join(sections.values()).lower())
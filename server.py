@@ -1,17 +1,24 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from pymongo import MongoClient
-from datetime import datetime
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.db import MissingDictionary, store_from_env
 
-# MongoDB connection
+
+# MongoDB connection (MONGO_URI overrides)
 MONGO_URI = "mongodb://localhost:2xxx/XOX"
-client = MongoClient(MONGO_URI)
-db = client["Polocies_tracker"]
-policies = db["polocies"]
+store = store_from_env(MONGO_URI)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await store.ensure_indexes()
+    yield
+    await store.aclose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,20 +31,20 @@ class PolicyPayload(BaseModel):
     text: str
 
 @app.post("/save-policy")
-def save_policy(data: PolicyPayload):
-    document = {
-        "url": data.url,
-        "text": data.text,
-        "created_at": datetime.utcnow()
-    }
-    policies.insert_one(document)
-    return {"status": "saved"}
-from bson import ObjectId
+async def save_policy(data: PolicyPayload):
+    status = await store.save(data.url, data.text)
+    return {"status": status}
 
 @app.get("/policies")
-def get_policies():
-    data = []
-    for p in policies.find().sort("created_at", -1).limit(50):
-        p["_id"] = str(p["_id"])
-        data.append(p)
-    return data
+async def get_policies():
+    return await store.list_recent(50)
+
+@app.get("/policies/{capture_id}")
+async def get_policy(capture_id: str):
+    try:
+        doc = await store.get(capture_id)
+    except MissingDictionary as e:
+        raise HTTPException(status_code=500, detail=f"Policy text cannot be decompressed: {e}")
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return doc
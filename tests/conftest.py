@@ -0,0 +1,41 @@
+"""
+Shared setup for the tests.
+
+    pip install -e .[test]
+    pytest
+
+policy/src goes on the path the way backend.app puts it there, so the
+pipeline is imported as `pipeline.*`. The LLM is never called:
+OPENROUTER_API_KEY is cleared, and tests that need an LLM use the fake
+server from benchmarks.fake_openrouter.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_SRC = os.path.join(ROOT, "policy", "src")
+for path in (ROOT, POLICY_SRC):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+os.environ.pop("OPENROUTER_API_KEY", None)
+
+
+@pytest.fixture(scope="session")
+def fake_llm_server():
+    from benchmarks.fake_openrouter import create_app, serve_in_thread
+
+    base, server = serve_in_thread(create_app())
+    yield base
+    server.should_exit = True
+
+
+@pytest.fixture
+def fake_llm(fake_llm_server, monkeypatch):
+    """Base URL of a fake OpenRouter server, healthy and instant; set_state() changes it."""
+    from benchmarks.fake_openrouter import set_state
+
+    set_state(fake_llm_server, latency=0.0, fail_rate=0.0, status=503, retry_after=None)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "fake")
+    return fake_llm_server
@@ -0,0 +1,37 @@
+"""PolicyCache: copies on read, SQLite tier read off the event loop."""
+import asyncio
+import threading
+
+from pipeline.cache import PolicyCache
+
+
+def test_get_returns_a_copy():
+    cache = PolicyCache()
+    cache.set("k", {"risks": ["tracking"], "score": 3})
+    got = cache.get("k")
+    got["risks"].append("sharing")
+    got["score"] = 9
+    assert cache.get("k") == {"risks": ["tracking"], "score": 3}
+
+
+def test_aget_reads_the_database_in_a_worker_thread(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    PolicyCache(db_path=path).set("k", {"score": 3})
+    cache = PolicyCache(db_path=path)
+    threads = []
+    real = cache._get_disk
+
+    def recorded(key):
+        threads.append(threading.current_thread())
+        return real(key)
+
+    monkeypatch.setattr(cache, "_get_disk", recorded)
+
+    async def main():
+        return await cache.aget("k"), await cache.aget("k"), await cache.aget("missing")
+
+    assert asyncio.run(main()) == ({"score": 3}, {"score": 3}, None)
+    # the second read is served from memory
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
@@ -0,0 +1,122 @@
+"""clean_text against the multi-pass implementation it replaced."""
+import random
+import re
+
+import pytest
+
+from pipeline.clean import MAX_CHARS, clean_text
+
+
+def legacy_clean_text(text: str) -> str:
+    t = (text or "").replace("\r", "\n")
+    t = re.sub(r"[ \t]+", " ", t)
+    t = re.sub(r"\n{3,}", "\n\n", t)
+
+    lines = [ln.strip() for ln in t.split("\n")]
+    out = []
+    last = None
+    for ln in lines:
+        if len(ln) < 3:
+            continue
+        low = ln.lower()
+        if low in {"home", "about", "contact", "login", "sign up", "privacy", "terms", "cookies"}:
+            continue
+        if last is not None and ln == last:
+            continue
+        out.append(ln)
+        last = ln
+
+    cleaned = "\n".join(out).strip()
+
+    if len(cleaned) > 120_000:
+        cleaned = cleaned[:120_000]
+
+    return cleaned
+
+
+PIECES = [
+    "Home", "ABOUT", " privacy ", "We collect\tyour  email.", "We collect\tyour  email.",
+    "ok", "a", "", " ", "\t\t", " nbsp ", "\x0bvt", "Sign up", "sign  up",
+    "Third party partners may receive data.", "x" * 300,
+]
+SEPARATORS = ["\n", "\r\n", "\r", "\n\n\n\n", " \n ", "\t\n"]
+
+
+def fuzz_text(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(PIECES) + rng.choice(SEPARATORS) for _ in range(n))
+
+
+def chunked(text: str, cuts) -> list:
+    cuts = sorted(cuts)
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_identical_to_legacy(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        text = fuzz_text(rng, rng.randint(0, 60))
+        expected = legacy_clean_text(text)
+        assert clean_text(text) == expected
+        cuts = rng.sample(range(len(text) + 1), min(len(text) + 1, 5))
+        assert clean_text(iter(chunked(text, cuts))) == expected
+
+
+def test_every_chunk_boundary():
+    text = "Home\r\nWe collect\tyour  email.\r\nWe collect your email.\rShared  with partners\n\n\nok\r\n"
+    expected = legacy_clean_text(text)
+    for cut in range(len(text) + 1):
+        assert clean_text(iter(chunked(text, [cut]))) == expected, cut
+    assert clean_text(iter(text)) == expected  # one character per chunk
+
+
+def test_crlf_split_across_chunks():
+    chunks = ["We collect your email.\r", "\nWe share it with partners.\r", "\n", "Retained 30 days."]
+    text = "".join(chunks)
+    assert clean_text(iter(chunks)) == legacy_clean_text(text)
+    assert clean_text(iter(chunks)) == "We collect your email.\nWe share it with partners.\nRetained 30 days."
+
+
+@pytest.mark.parametrize("size", [MAX_CHARS - 1, MAX_CHARS, MAX_CHARS + 1])
+def test_truncation_at_max_chars(size):
+    # lines ending exactly at, just before and just after the budget
+    line = "y" * 999
+    text = (line + "\n") * (size // 1000) + "z" * (size % 1000) + "\n" + "w" * 5000
+    expected = legacy_clean_text(text)
+    assert len(expected) <= MAX_CHARS
+    assert clean_text(text) == expected
+    assert clean_text(iter(chunked(text, range(0, len(text), 4093)))) == expected
+
+
+def test_duplicate_line_straddling_the_limit():
+    for text in [("y" * 70_000 + "\n") * 3, ("z" * 70_000 + "\r\n") * 3]:
+        assert clean_text(text) == legacy_clean_text(text)
+
+
+def test_stops_reading_at_the_budget():
+    read = []
+
+    def source():
+        for i in range(10_000):
+            read.append(i)
+            yield f"Paragraph {i} about the data we collect.\n"
+
+    out = clean_text(source())
+    assert len(out) == MAX_CHARS
+    assert len(read) < 10_000
+
+
+def test_long_line_without_newlines_is_cut():
+    read = []
+
+    def source():
+        yield "Intro line.\n"
+        for i in range(100_000):
+            read.append(i)
+            yield "word \t " if i % 2 else "data"
+
+    expected = legacy_clean_text("".join(source()))
+    read.clear()
+    assert clean_text(source()) == expected
+    assert len(expected) == MAX_CHARS
+    assert len(read) < 100_000
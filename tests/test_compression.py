@@ -0,0 +1,75 @@
+"""DecompressRequest: compressed request bodies through a small ASGI app."""
+import gzip
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.compression import DecompressRequest  # noqa: E402
+
+BODY = b"We collect your email address and share it with partners.\n" * 2000
+MAX_SIZE = 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(DecompressRequest, max_size=MAX_SIZE)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        return {"size": len(body), "ok": body == BODY}
+
+    with TestClient(app) as c:
+        yield c
+
+
+def post(client, data: bytes, encoding: str):
+    return client.post("/echo", content=data, headers={"Content-Encoding": encoding})
+
+
+def test_gzip(client):
+    assert post(client, gzip.compress(BODY), "gzip").json() == {"size": len(BODY), "ok": True}
+    assert post(client, gzip.compress(BODY)[:-10], "gzip").status_code == 400
+
+
+def test_unknown_encoding(client):
+    assert post(client, BODY, "br").status_code == 415
+
+
+@pytest.fixture
+def zstandard():
+    return pytest.importorskip("zstandard")
+
+
+def test_zstd(client, zstandard):
+    data = zstandard.ZstdCompressor().compress(BODY)
+    assert post(client, data, "zstd").json() == {"size": len(BODY), "ok": True}
+
+
+def test_zstd_concatenated_frames(client, zstandard):
+    c = zstandard.ZstdCompressor()
+    half = len(BODY) // 2
+    data = c.compress(BODY[:half]) + c.compress(BODY[half:])
+    assert post(client, data, "zstd").json() == {"size": len(BODY), "ok": True}
+
+
+def test_zstd_truncated(client, zstandard):
+    # multi-block frame: a prefix decodes to part of the body
+    data = zstandard.ZstdCompressor(level=1, write_content_size=False).compress(
+        bytes(range(256)) * 3000
+    )
+    for cut in (len(data) - 1, len(data) // 2, 5):
+        r = post(client, data[:cut], "zstd")
+        assert r.status_code == 400, cut
+        assert "truncated" in r.text or "zstd" in r.text
+
+
+def test_zstd_bomb(client, zstandard):
+    data = zstandard.ZstdCompressor().compress(b"\0" * (64 * MAX_SIZE))
+    assert len(data) < 4096
+    assert post(client, data, "zstd").status_code == 413
@@ -0,0 +1,142 @@
+"""backend.db against the mongomock-motor stand-in (MONGO_URI=mongomock://)."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("mongomock_motor")
+
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError  # noqa: E402
+
+from backend.db import BufferedWriter, MissingDictionary, PolicyStore, database_from_env  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setenv("MONGO_URI", "mongomock://")
+    monkeypatch.setenv("MONGO_DB", "test")
+    return database_from_env()
+
+
+class Flaky:
+    """A collection that fails insert_many while `down`, or fails the documents in `reject`."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.down = False
+        self.reject = set()
+        self.calls = 0
+
+    async def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        if self.down:
+            raise ServerSelectionTimeoutError("no servers")
+        errors = []
+        for i, doc in enumerate(docs):
+            if doc["n"] in self.reject:
+                errors.append({"index": i, "code": 121, "errmsg": "Document failed validation"})
+                continue
+            try:
+                await self.collection.insert_one(doc)
+            except Exception:
+                errors.append({"index": i, "code": 11000, "errmsg": "E11000 duplicate key"})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+
+def test_policy_store_roundtrip(db):
+    async def run():
+        store = PolicyStore(db, max_buffer=2, max_delay=60)
+        await store.ensure_indexes()
+        text = "We collect your email address.\n" * 50
+        assert await store.save("https://a.example/privacy", text) == "queued"
+        await store.save("https://b.example/privacy", text)
+        listed = await store.list_recent()
+        got = await store.get(listed[0]["_id"])
+        await store.aclose()
+        return listed, got, store.stats
+
+    listed, got, stats = asyncio.run(run())
+    assert sorted(d["url"] for d in listed) == ["https://a.example/privacy", "https://b.example/privacy"]
+    assert "text" not in listed[0] and got["text"] == "We collect your email address.\n" * 50
+    assert stats["bodies_written"] == 1 and stats["bodies_deduped"] == 1
+
+
+def test_partial_failure_requeues_only_failed_documents(db):
+    async def run():
+        flaky = Flaky(db["docs"])
+        writer = BufferedWriter(flaky, max_docs=100, max_delay=60)
+        flaky.reject = {1}
+        for n in range(3):
+            await writer.add({"n": n})
+        with pytest.raises(BulkWriteError):
+            await writer.flush()
+        assert len(writer) == 1
+
+        flaky.reject = set()
+        assert await writer.flush() == 1
+        return await db["docs"].count_documents({}), writer.stats
+
+    count, stats = asyncio.run(run())
+    assert count == 3
+    assert stats["written"] == 3 and stats["errors"] == 1
+
+
+def test_already_stored_documents_are_not_retried(db):
+    async def run():
+        writer = BufferedWriter(db["docs"], max_docs=100, max_delay=60)
+        docs = [{"n": n} for n in range(3)]
+        await db["docs"].insert_one(docs[0])  # stored by an earlier, partly failed flush
+        for doc in docs:
+            await writer.add(doc)
+        await writer.flush()
+        await writer.add({"n": 3})
+        await writer.flush()
+        return await db["docs"].count_documents({}), len(writer), writer.stats
+
+    count, pending, stats = asyncio.run(run())
+    assert count == 4 and pending == 0
+    assert stats["duplicates"] == 1 and stats["errors"] == 0
+
+
+def test_outage_does_not_raise_from_add_and_is_bounded(db):
+    async def run():
+        flaky = Flaky(db["docs"])
+        flaky.down = True
+        writer = BufferedWriter(flaky, max_docs=2, max_delay=0.01, max_pending=5)
+        for n in range(20):
+            await writer.add({"n": n})
+        # one size-triggered attempt; after that only the timer retries
+        calls_while_down = flaky.calls
+        flaky.down = False
+        await asyncio.sleep(0.1)
+        return calls_while_down, len(writer), writer.stats, await db["docs"].distinct("n")
+
+    calls, pending, stats, stored = asyncio.run(run())
+    assert calls == 1
+    assert pending == 0
+    assert stats["dropped"] == 15
+    assert sorted(stored) == [15, 16, 17, 18, 19]
+
+
+def test_dictionary_trained_elsewhere_is_loaded_on_demand(db):
+    pytest.importorskip("zstandard")
+    from benchmarks.corpus import make_policy
+
+    async def run():
+        trainer, reader = PolicyStore(db, max_buffer=0), PolicyStore(db, max_buffer=0)
+        await trainer.ensure_indexes()
+        await reader.ensure_indexes()  # started before the dictionary exists
+        for seed in range(40):
+            await trainer.save(f"https://s{seed}.example/privacy", make_policy(4000, seed))
+        version = await trainer.train_dictionary(samples=40, dict_size=16_384)
+        text = make_policy(4000, 99)
+        await trainer.save("https://new.example/privacy", text)
+        h = (await db["polocies"].find_one({"url": "https://new.example/privacy"}))["content_hash"]
+        assert (await db["policy_bodies"].find_one({"_id": h}))["dict_version"] == version
+        assert await reader.get_text(h) == text
+
+        await db["compression_dicts"].delete_many({})
+        with pytest.raises(MissingDictionary):
+            await PolicyStore(db).get_text(h)
+
+    asyncio.run(run())
@@ -0,0 +1,62 @@
+"""Boilerplate removal from policy page HTML."""
+import pytest
+
+from benchmarks.corpus import make_policy, make_policy_html
+from pipeline.extract import SKIP_MAX_BYTES, extract_text, iter_html_text
+
+POLICY = make_policy(6000, seed=1)
+PARAGRAPHS = "".join(f"<p>{line}</p>" for line in POLICY.split("\n") if line.strip())
+BANNER = '<p>We use cookies to improve your experience. Accept all or manage your choices.</p>'
+
+
+def words(text):
+    return text.split()
+
+
+@pytest.mark.parametrize("page", [
+    '<html><body class="page has-sidebar">{}</body></html>',
+    '<html><body><div class="trusted-content">{}</div></body></html>',
+    '<html><body><div id="cookie-consent-policy">{}</div></body></html>',
+    '<html><body><main class="sidebar">{}</main></body></html>',
+    '<html><body><article id="cookie-banner">{}</article></body></html>',
+])
+def test_policy_in_look_alike_containers_is_kept(page):
+    stats = {}
+    assert words(extract_text(page.format(PARAGRAPHS), stats)) == words(POLICY)
+    assert stats["dropped_bytes"] == 0 and not stats["fallback"]
+
+
+@pytest.mark.parametrize("attrs", [
+    'id="onetrust-banner-sdk"', 'id="CybotCookiebotDialog"', 'class="ot-x cookie-banner"',
+    'class="qc-cmp2-container"', 'role="dialog"', 'class="breadcrumbs"',
+])
+def test_banners_are_skipped(attrs):
+    page = f"<html><body><div {attrs}>{BANNER}</div>{PARAGRAPHS}</body></html>"
+    out = extract_text(page)
+    assert "We use cookies" not in out
+    assert words(out) == words(POLICY)
+
+
+def test_text_heavy_element_is_kept():
+    page = f'<div class="cookie-banner">{PARAGRAPHS}</div>'
+    assert len(POLICY.encode()) > SKIP_MAX_BYTES
+    assert words(extract_text(page)) == words(POLICY)
+
+
+def test_short_page_falls_back_to_plain_text():
+    page = (
+        '<div class="sidebar"><p>We collect your email address and share it with partners.</p></div>'
+        '<ul><li><a href="/a">Home</a></li><li><a href="/b">Contact</a></li></ul>'
+    )
+    stats = {}
+    out = extract_text(page, stats)
+    assert "We collect your email address" in out
+    assert "Home" in out
+    assert stats["fallback"] and stats["dropped_bytes"] == 0
+
+
+def test_chunked_input_gives_the_same_text():
+    html = make_policy_html(20_000, seed=3)
+    for size in (1, 97, 4096):
+        chunks = [html[i:i + size] for i in range(0, len(html), size)]
+        assert "".join(iter_html_text(chunks)) == extract_text(html)
@@ -0,0 +1,82 @@
+"""Recording analyses from the API: outages and repeat visits."""
+import hashlib
+
+import pytest
+
+pytest.importorskip("mongomock_motor")
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from pymongo.errors import ServerSelectionTimeoutError  # noqa: E402
+
+from backend.db import HistoryStore, database_from_env  # noqa: E402
+from benchmarks.corpus import make_cookie_jar  # noqa: E402
+
+POLICY = "\n".join([
+    "Information We Collect",
+    "We collect your email address, IP address and device identifiers when you use the service.",
+    "How We Share Information",
+    "We share your information with advertising partners and analytics providers.",
+])
+
+
+class Down:
+    """A collection whose database cannot be reached."""
+
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ServerSelectionTimeoutError("no servers")
+        return fail
+
+
+@pytest.fixture
+def history(monkeypatch):
+    import backend.app
+
+    monkeypatch.setenv("MONGO_URI", "mongomock://")
+    store = HistoryStore(database_from_env(), max_buffer=0)
+    store.rollups.max_delay = 0  # write counters at once
+    monkeypatch.setattr(backend.app, "history", store)
+    return store
+
+
+@pytest.fixture
+def client(history):
+    from backend.app import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_repeat_visits_are_recorded_once(client, history):
+    body = {"url": "https://example.com/privacy", "raw_text": POLICY, "category": "News"}
+    assert client.post("/policy/analyze", json=body).status_code == 200
+    assert client.post("/policy/analyze", json=body).json()["changes"]["status"] == "unchanged"
+    check = {"url": body["url"], "content_hash": hashlib.sha256(POLICY.encode("utf-8")).hexdigest()}
+    assert client.post("/policy/analyze/hash", json=check).json()["status"] == "hit"
+
+    assert client.get("/history/summary").json()["total"] == 1
+    assert history.stats == {"recorded": 1, "unchanged": 2, "errors": 0}
+
+
+def test_html_body_hash_answers_repeat_visits(client):
+    page = "<html><body>" + "".join(f"<p>{line}</p>" for line in POLICY.split("\n")) + "</body></html>"
+    url = "https://example.com/privacy.html"
+    r = client.post("/policy/analyze/html", params={"url": url}, content=page.encode("utf-8"),
+                    headers={"Content-Type": "text/html; charset=utf-8"})
+    assert r.status_code == 200
+    check = {"url": url, "content_hash": hashlib.sha256(page.encode("utf-8")).hexdigest()}
+    assert client.post("/policy/analyze/hash", json=check).json()["status"] == "hit"
+
+
+def test_database_outage_does_not_fail_analysis(client, history):
+    history.analyses = Down()
+    history.cookie_analyses = Down()
+    history.rollups.rollups = Down()
+
+    body = {"url": "https://down.example/privacy", "raw_text": POLICY}
+    r = client.post("/policy/analyze", json=body)
+    assert r.status_code == 200 and r.json()["risk_level"]
+    assert client.post("/cookies/analyze", json=make_cookie_jar(20)).status_code == 200
+    assert history.stats["errors"] == 2
+    assert "plainsight_history_errors_total 2" in client.get("/metrics").text
@@ -0,0 +1,98 @@
+"""run_policy_pipeline_incremental: when the LLM is asked again."""
+import asyncio
+
+import pytest
+
+from pipeline.cache import PolicyCache
+from pipeline.incremental import _sha256, _snapshot_key, lookup_unchanged, run_policy_pipeline_incremental
+from pipeline.types import PolicyInput
+
+POLICY = "\n".join([
+    "Information We Collect",
+    "We collect your email address and IP address when you sign up.",
+    "How We Use Information",
+    "We use your information to improve the service and to personalise content.",
+    "Your Rights",
+    "You can request deletion of your data at any time.",
+])
+ANSWER = {"summary_simple": "LLM summary.", "key_takeaways": ["llm"], "risks": ["llm risk"], "red_flags": []}
+
+
+class ScriptedLLM:
+    """Stands in for AsyncOpenRouterClient: returns `answers` in turn, None when down."""
+
+    model = "scripted"
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    async def write_takeaways(self, cleaned):
+        self.calls += 1
+        return self.answers.pop(0)
+
+
+def run(llm, raw_text, snapshots):
+    inp = PolicyInput(url="https://example.com/privacy", title="Privacy", raw_text=raw_text)
+    return asyncio.run(run_policy_pipeline_incremental(inp, llm, snapshots))
+
+
+@pytest.fixture
+def llm_key(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "fake")
+
+
+def test_identical_recapture_skips_the_llm(llm_key):
+    snapshots, llm = PolicyCache(), ScriptedLLM(ANSWER)
+    run(llm, POLICY, snapshots)
+    again = run(llm, POLICY, snapshots)
+    assert llm.calls == 1
+    assert again["changes"]["status"] == "unchanged"
+    assert again["summary_simple"] == "LLM summary."
+
+
+def test_fallback_is_not_pinned(llm_key):
+    snapshots, llm = PolicyCache(), ScriptedLLM(None, ANSWER)
+    first = run(llm, POLICY, snapshots)
+    assert first["summary_simple"] != "LLM summary."
+
+    inp = PolicyInput(url="https://example.com/privacy", title="Privacy", raw_text="")
+    assert asyncio.run(lookup_unchanged(inp, _sha256(POLICY), snapshots)) is None
+
+    again = run(llm, POLICY, snapshots)
+    assert llm.calls == 2
+    assert again["changes"]["status"] == "unchanged" and again["changes"]["llm_rerun"]
+    assert again["summary_simple"] == "LLM summary."
+    assert asyncio.run(lookup_unchanged(inp, _sha256(POLICY), snapshots)) is not None
+
+
+def test_fallback_is_reused_without_a_key():
+    snapshots, llm = PolicyCache(), ScriptedLLM(None)
+    run(llm, POLICY, snapshots)
+    inp = PolicyInput(url="https://example.com/privacy", title="Privacy", raw_text="")
+    assert asyncio.run(lookup_unchanged(inp, _sha256(POLICY), snapshots)) is not None
+
+
+def test_signal_change_outside_risk_sections_reruns(llm_key):
+    snapshots, llm = PolicyCache(), ScriptedLLM(ANSWER, ANSWER)
+    run(llm, POLICY, snapshots)
+    edited = POLICY.replace("to personalise content.", "to personalise content, and we may sell your information.")
+    out = run(llm, edited, snapshots)
+    changes = out["changes"]
+    assert changes["sections_changed"] == ["data_usage"]
+    assert "mentions_sale_of_data" in changes["signals_changed"]
+    assert changes["llm_rerun"] and llm.calls == 2
+
+
+def test_wording_change_outside_risk_sections_keeps_the_llm_answer(llm_key):
+    snapshots, llm = PolicyCache(), ScriptedLLM(ANSWER)
+    run(llm, POLICY, snapshots)
+    out = run(llm, POLICY.replace("improve the service", "improve our services"), snapshots)
+    assert not out["changes"]["signals_changed"]
+    assert not out["changes"]["llm_rerun"] and llm.calls == 1
+
+
+def test_snapshot_key_keeps_the_case_of_the_path():
+    assert _snapshot_key(" HTTPS://Example.COM/privacy ") == _snapshot_key("https://example.com/privacy")
+    assert _snapshot_key("https://example.com/Privacy") != _snapshot_key("https://example.com/privacy")
+    assert _snapshot_key("https://example.com/p?Lang=EN") != _snapshot_key("https://example.com/p?lang=en")
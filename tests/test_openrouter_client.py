@@ -0,0 +1,99 @@
+"""AsyncOpenRouterClient against the fake OpenRouter server."""
+import asyncio
+import time
+
+from benchmarks.fake_openrouter import ANSWER, set_state
+from pipeline.openrouter_client import AsyncOpenRouterClient
+from pipeline.resilience import LLMExecutor
+
+
+def client(base: str, **kwargs) -> AsyncOpenRouterClient:
+    executor = LLMExecutor(rate=0, retries=0)
+    return AsyncOpenRouterClient(base_url=f"{base}/v1/chat/completions", timeout=5, executor=executor, **kwargs)
+
+
+def requests_seen(base: str) -> int:
+    return set_state(base)["requests"]
+
+
+def test_answer(fake_llm):
+    async def run():
+        llm = client(fake_llm)
+        try:
+            return await llm.write_takeaways("We collect your email address.")
+        finally:
+            await llm.aclose()
+
+    assert asyncio.run(run()) == ANSWER
+
+
+def test_no_key_no_request(fake_llm, monkeypatch):
+    monkeypatch.delenv("OPENROUTER_API_KEY")
+    before = requests_seen(fake_llm)
+    assert asyncio.run(client(fake_llm).write_takeaways("We collect your email address.")) is None
+    assert requests_seen(fake_llm) == before
+
+
+def test_identical_text_shares_one_request(fake_llm):
+    set_state(fake_llm, latency=0.2)
+
+    async def run():
+        llm = client(fake_llm)
+        try:
+            same = [llm.write_takeaways("We sell your data.") for _ in range(5)]
+            other = llm.write_takeaways("We keep your data for a year.")
+            return await asyncio.gather(*same, other)
+        finally:
+            await llm.aclose()
+
+    before = requests_seen(fake_llm)
+    results = asyncio.run(run())
+    assert results == [ANSWER] * 6
+    assert requests_seen(fake_llm) - before == 2
+
+
+def test_latency_budget(fake_llm):
+    set_state(fake_llm, latency=0.5)
+
+    async def run():
+        llm = client(fake_llm, latency_budget=0.05)
+        try:
+            t = time.perf_counter()
+            missed = await llm.write_takeaways("We collect your email address.")
+            waited = time.perf_counter() - t
+            # the request keeps running for callers that arrive later
+            in_flight = llm.stats()["in_flight"]
+            llm.latency_budget = None
+            late = await llm.write_takeaways("We collect your email address.")
+            return missed, waited, in_flight, late
+        finally:
+            await llm.aclose()
+
+    before = requests_seen(fake_llm)
+    missed, waited, in_flight, late = asyncio.run(run())
+    assert missed is None and waited < 0.4
+    assert in_flight == 1
+    assert late == ANSWER
+    assert requests_seen(fake_llm) - before == 1
+
+
+def test_brownout_short_circuits_quietly(fake_llm, capsys):
+    set_state(fake_llm, fail_rate=1.0, status=503)
+
+    async def run():
+        llm = AsyncOpenRouterClient(
+            base_url=f"{fake_llm}/v1/chat/completions", timeout=5,
+            executor=LLMExecutor(rate=0, retries=0, failure_threshold=2),
+        )
+        try:
+            return [await llm.write_takeaways(f"Policy {i}.") for i in range(10)], llm.stats()
+        finally:
+            await llm.aclose()
+
+    before = requests_seen(fake_llm)
+    results, stats = asyncio.run(run())
+    assert results == [None] * 10
+    assert requests_seen(fake_llm) - before == 2
+    assert stats["short_circuited"] == 8 and stats["breaker"]["state"] == "open"
+    # one line per failed request, none per refused call
+    assert capsys.readouterr().out.count("OPENROUTER") == 2
@@ -0,0 +1,68 @@
+"""Page extraction through per-worker readers."""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from benchmarks.corpus import make_pdf
+from pipeline import pdf
+
+
+@pytest.fixture
+def opens(monkeypatch):
+    calls = []
+    real = pdf._open
+
+    def counted(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(pdf, "_open", counted)
+    return calls
+
+
+def write_pdf(path, pages, seed=0):
+    path.write_bytes(make_pdf(pages, seed))
+    return str(path)
+
+
+def test_reader_is_opened_once_per_file(tmp_path, opens):
+    path = write_pdf(tmp_path / "a.pdf", 30)
+    pages = list(pdf.iter_pdf_text(path, pages_per_task=4))
+    assert len(pages) == 30
+    assert opens == [path]
+
+    reader = pdf._reader(path)
+    assert not isinstance(reader.stream, io.BytesIO)
+    assert reader.stream.name == path
+
+
+def test_workers_give_the_same_text(tmp_path, opens):
+    path = write_pdf(tmp_path / "a.pdf", 40)
+    inline = list(pdf.iter_pdf_text(path, pages_per_task=8))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pooled = list(pdf.iter_pdf_text(path, executor=executor, window=2, pages_per_task=4))
+    assert pooled == inline
+    # the inline pass, then at most one reader per worker thread
+    assert len(opens) <= 3
+
+
+def test_changed_or_deleted_file_is_reopened(tmp_path, opens):
+    path = write_pdf(tmp_path / "a.pdf", 3, seed=1)
+    first = list(pdf.iter_pdf_text(path))
+    old = pdf._reader(path)
+
+    write_pdf(tmp_path / "a.pdf", 5, seed=2)
+    second = list(pdf.iter_pdf_text(path))
+    assert len(second) == 5 and second[:3] != first
+    assert old.stream.closed
+    assert opens == [path, path]
+
+    current = pdf._reader(path)
+    os.unlink(path)
+    other = write_pdf(tmp_path / "b.pdf", 2)
+    pdf._reader(other)
+    assert current.stream.closed
@@ -0,0 +1,183 @@
+"""Retries, Retry-After and circuit breaker transitions of LLMExecutor."""
+import asyncio
+
+import pytest
+
+from pipeline import resilience
+from pipeline.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, LLMExecutor, RequestRejected, RetriesExhausted,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def scripted(*statuses):
+    """A call answering with `statuses` in turn; .calls counts the attempts."""
+    answers = list(statuses)
+
+    def call():
+        call.calls += 1
+        return Response(*answers.pop(0)) if isinstance(answers[0], tuple) else Response(answers.pop(0))
+
+    call.calls = 0
+    return call
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits = []
+    monkeypatch.setattr(resilience.time, "sleep", waits.append)
+    return waits
+
+
+def executor(**kwargs):
+    kwargs.setdefault("rate", 0)
+    kwargs.setdefault("backoff_base", 0.01)
+    return LLMExecutor(**kwargs)
+
+
+def test_breaker_opens_after_threshold_then_probes_once():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN and breaker.opened == 1
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+
+
+def test_probe_success_closes_and_failure_reopens():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.allow()
+    breaker.record(False)
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN and breaker.opened == 2
+    assert breaker.stats()["retry_in_s"] == 10
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["consecutive_failures"] == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_released_probe_lets_the_next_one_through():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.allow()
+    breaker.record(False)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried(status, sleeps):
+    ex = executor(retries=2)
+    call = scripted(status, status, 200)
+    assert ex.run_sync(call).status_code == 200
+    assert call.calls == 3 and len(sleeps) == 2
+    assert ex.counts["retries"] == 2 and ex.counts["ok"] == 1
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404, 422])
+def test_other_4xx_is_rejected_without_retry(status, sleeps):
+    ex = executor(retries=2, failure_threshold=1)
+    call = scripted(status, 200)
+    with pytest.raises(RequestRejected):
+        ex.run_sync(call)
+    assert call.calls == 1 and sleeps == []
+    # the provider answered: a rejected request does not count against it
+    assert ex.breaker.state == CLOSED and ex.counts["rejected"] == 1
+
+
+def test_retries_exhausted_counts_one_breaker_failure(sleeps):
+    ex = executor(retries=1, failure_threshold=2)
+    with pytest.raises(RetriesExhausted):
+        ex.run_sync(scripted(503, 503))
+    assert ex.breaker.stats()["consecutive_failures"] == 1
+    assert ex.counts["attempts"] == 2 and ex.counts["failed"] == 1
+
+
+def test_retry_after_is_honoured_and_capped(sleeps):
+    ex = executor(retries=2, backoff_max=5)
+    call = scripted((429, {"Retry-After": "2"}), (503, {"Retry-After": "120"}), 200)
+    assert ex.run_sync(call).status_code == 200
+    assert sleeps == [2.0, 5.0]
+
+
+def test_retry_after_date_falls_back_to_backoff():
+    ex = executor(backoff_base=0.5)
+    wait = ex.backoff(2, Response(503, {"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}))
+    assert 0 <= wait <= 2.0
+
+
+def test_open_breaker_refuses_calls():
+    ex = executor(failure_threshold=1)
+    ex.breaker.record(False)
+    call = scripted(200)
+    with pytest.raises(CircuitOpen):
+        ex.run_sync(call)
+    assert call.calls == 0 and ex.counts["short_circuited"] == 1
+
+
+def test_retry_gives_up_once_the_breaker_opens(monkeypatch):
+    ex = executor(retries=3, failure_threshold=2)
+
+    def other_calls_fail(seconds):
+        # while this call waits to retry, others trip the breaker
+        ex.breaker.record(False)
+        ex.breaker.record(False)
+
+    monkeypatch.setattr(resilience.time, "sleep", other_calls_fail)
+    call = scripted(503, 200)
+    with pytest.raises(CircuitOpen):
+        ex.run_sync(call)
+    assert call.calls == 1
+    assert ex.counts["short_circuited"] == 1 and ex.counts["failed"] == 0
+    assert ex.breaker.opened == 1
+
+
+def test_async_retry_gives_up_once_the_breaker_opens():
+    ex = executor(retries=3, failure_threshold=1, backoff_base=0.05)
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        return Response(503)
+
+    async def main():
+        retrying = asyncio.ensure_future(ex.run(failing))
+        await asyncio.sleep(0)
+        ex.breaker.record(False)
+        with pytest.raises(CircuitOpen):
+            await retrying
+
+    asyncio.run(main())
+    assert len(attempts) == 1 and ex.counts["short_circuited"] == 1